@@ -0,0 +1,38 @@
+from .models import MonthlyBudget, Category
+
+
+def _active_budget_queryset(user):
+    return MonthlyBudget.objects.filter(user=user, is_active=True).select_related('user')
+
+
+def get_active_budget(request):
+    """The user's active budget (or None), resolved once per request"""
+    if not hasattr(request, '_active_budget'):
+        request._active_budget = _active_budget_queryset(request.user).first()
+    return request._active_budget
+
+
+async def aget_active_budget(request, user):
+    if not hasattr(request, '_active_budget'):
+        request._active_budget = await _active_budget_queryset(user).afirst()
+    return request._active_budget
+
+
+def get_active_categories(request):
+    """
+    Categories of the active budget as one queryset shared by the whole request,
+    so the view and the template evaluate it (and hit the database) only once
+    """
+    if not hasattr(request, '_active_categories'):
+        budget = get_active_budget(request)
+        request._active_categories = budget.categories.all() if budget else Category.objects.none()
+    return request._active_categories
+
+
+async def aget_active_categories(request, user):
+    budget = await aget_active_budget(request, user)
+    if budget is None:
+        return []
+    if not hasattr(request, '_active_categories'):
+        request._active_categories = [category async for category in budget.categories.all()]
+    return request._active_categories
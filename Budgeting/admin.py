@@ -1,46 +1,253 @@
-from django.contrib import admin
-from .models import MonthlyBudget, Category, Transaction, DailySummary, MonthlySummary, Goal
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections, transaction
+from django.utils.functional import cached_property
+from .cache import invalidate_budget
+from .models import MonthlyBudget, Category, Transaction, ArchivedTransaction, DailySummary, MonthlySummary, CategorySpend, Goal, Job
+
+ESTIMATE_THRESHOLD = getattr(settings, 'BUDGETING_ADMIN_ESTIMATE_THRESHOLD', 100000)
+COUNT_LIMIT = getattr(settings, 'BUDGETING_ADMIN_COUNT_LIMIT', 10000)
+INLINE_REBUILD_LIMIT = getattr(settings, 'BUDGETING_ADMIN_INLINE_REBUILD_LIMIT', 200)
+REBUILD_CHUNK_SIZE = 500
+CURSOR_VAR = 'before'
+
+# Row count kept in the table statistics; none of these scan the table
+ESTIMATE_QUERIES = {
+    'postgresql': 'SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)',
+    'mysql': 'SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s',
+    # sqlite_stat1 is only filled in by ANALYZE; its stat column starts with the row count
+    'sqlite': 'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+}
+
+
+def estimate_row_count(model, using='default'):
+    """Approximate number of rows in a model's table, or None when the database has no statistics"""
+    connection = connections[using]
+    sql = ESTIMATE_QUERIES.get(connection.vendor)
+    if sql is None:
+        return None
+    try:
+        # A savepoint, so a missing statistics table does not break the surrounding transaction
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute(sql, [model._meta.db_table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if not row or row[0] is None:
+        return None
+    count = int(str(row[0]).split()[0])
+    return count if count >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Never runs COUNT(*) over a whole big table: an unfiltered changelist shows
+    the table statistics estimate, a filtered one counts at most COUNT_LIMIT rows.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+                return estimate
+        return queryset.order_by()[:COUNT_LIMIT].count()
+
+
+class CursorChangeList(ChangeList):
+    """
+    Keyset paging on the primary key: ?before=<pk> lists the rows older than
+    that pk with WHERE pk < ... LIMIT n, so deep pages cost the same as the
+    first one and nothing is counted.
+    """
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_results(self, request):
+        queryset = self.queryset.order_by('-pk')
+        before = self.params.get(CURSOR_VAR)
+        if isinstance(before, list):
+            before = before[-1]
+        if before:
+            try:
+                queryset = queryset.filter(pk__lt=int(before))
+            except ValueError:
+                raise IncorrectLookupParameters
+        rows = list(queryset[:self.list_per_page + 1])
+
+        self.result_list = rows[:self.list_per_page]
+        next_cursor = self.result_list[-1].pk if len(rows) > self.list_per_page else None
+        self.newest_url = self.get_query_string(remove=[CURSOR_VAR]) if before else None
+        self.older_url = self.get_query_string({CURSOR_VAR: next_cursor}) if next_cursor else None
+        self.result_count = len(self.result_list)
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.can_show_all = False
+        self.multi_page = bool(self.newest_url or self.older_url)
+        self.paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+
+
+class CursorPagingMixin:
+    """Changelist for the biggest tables: newest rows first, keyset paging, no column sorting"""
+    change_list_template = 'admin/cursor_change_list.html'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    sortable_by = ()
+
+    def get_changelist(self, request, **kwargs):
+        return CursorChangeList
+
+
+class OwnerEmailSearchMixin:
+    """
+    Search by the owner's exact email (search_fields[0]): a lookup on the unique
+    users.email index followed by indexed joins, instead of LIKE '%term%'
+    over every joined row.
+    """
+    search_help_text = 'Exact email address of the owner'
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip().lower()
+        if not search_term:
+            return queryset, False
+        return queryset.filter(**{self.search_fields[0]: search_term}), False
+
 
 @admin.register(MonthlyBudget)
-class MonthlyBudgetAdmin(admin.ModelAdmin):
-    list_display = ('user', 'start_date', 'end_date', 'total_budget', 'is_active', 'created_at')
+class MonthlyBudgetAdmin(OwnerEmailSearchMixin, admin.ModelAdmin):
+    list_display = ('user', 'start_date', 'end_date', 'total_budget', 'total_income', 'total_spent', 'is_active', 'created_at')
     list_filter = ('is_active', 'start_date', 'created_at')
-    search_fields = ('user__email', 'user__name')
-    readonly_fields = ('created_at', 'updated_at')
-    date_hierarchy = 'start_date'
+    list_select_related = ('user', 'summary')
+    search_fields = ('user__email',)
+    autocomplete_fields = ('user',)
+    readonly_fields = ('archived_at', 'created_at', 'updated_at')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ['rebuild_summaries']
+
+    def get_queryset(self, request):
+        # Also for autocomplete results and the change form, where list_select_related does not apply
+        # (__str__ shows the user's name)
+        return super().get_queryset(request).select_related(*self.list_select_related)
+
+    @admin.display(description='Income', ordering='summary__total_income')
+    def total_income(self, obj):
+        summary = getattr(obj, 'summary', None)
+        return summary.total_income if summary else None
+
+    @admin.display(description='Spent', ordering='summary__total_expense')
+    def total_spent(self, obj):
+        summary = getattr(obj, 'summary', None)
+        return summary.total_expense if summary else None
+
+    @admin.action(description='Rebuild daily/monthly summaries of the selected budgets')
+    def rebuild_summaries(self, request, queryset):
+        budget_ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+        if len(budget_ids) > INLINE_REBUILD_LIMIT:
+            for start in range(0, len(budget_ids), REBUILD_CHUNK_SIZE):
+                Job.enqueue([
+                    Job.build('rebuild_summaries', MonthlyBudget(pk=pk))
+                    for pk in budget_ids[start:start + REBUILD_CHUNK_SIZE]
+                ])
+            self.message_user(request, f'Queued a summary rebuild for {len(budget_ids)} budget(s); run_worker will process them.')
+            return
+
+        for start in range(0, len(budget_ids), REBUILD_CHUNK_SIZE):
+            chunk = budget_ids[start:start + REBUILD_CHUNK_SIZE]
+            with transaction.atomic():
+                DailySummary.rebuild_for_budgets(chunk)
+                MonthlySummary.rebuild_for_budgets(chunk)
+                CategorySpend.rebuild_for_budgets(chunk)
+            for pk in chunk:
+                invalidate_budget(pk)
+        self.message_user(request, f'Rebuilt the summaries of {len(budget_ids)} budget(s).', messages.SUCCESS)
 
 @admin.register(Category)
-class CategoryAdmin(admin.ModelAdmin):
+class CategoryAdmin(OwnerEmailSearchMixin, admin.ModelAdmin):
     list_display = ('category_name', 'monthly_budget', 'allocated_amount', 'is_custom', 'created_at')
     list_filter = ('is_custom', 'category_type', 'created_at')
-    search_fields = ('category_name', 'monthly_budget__user__email')
+    list_select_related = ('monthly_budget__user',)
+    search_fields = ('monthly_budget__user__email',)
+    autocomplete_fields = ('monthly_budget',)
     readonly_fields = ('created_at',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 @admin.register(Transaction)
-class TransactionAdmin(admin.ModelAdmin):
+class TransactionAdmin(OwnerEmailSearchMixin, CursorPagingMixin, admin.ModelAdmin):
     list_display = ('transaction_type', 'amount', 'category', 'date', 'monthly_budget', 'created_at')
     list_filter = ('transaction_type', 'date', 'created_at')
-    search_fields = ('note', 'category__category_name', 'monthly_budget__user__email')
+    list_select_related = ('category', 'monthly_budget__user')
+    search_fields = ('monthly_budget__user__email',)
+    autocomplete_fields = ('monthly_budget', 'category', 'goal')
     readonly_fields = ('created_at', 'updated_at')
-    date_hierarchy = 'date'
+
+@admin.register(ArchivedTransaction)
+class ArchivedTransactionAdmin(OwnerEmailSearchMixin, CursorPagingMixin, admin.ModelAdmin):
+    """Read-only: rows only get here through the archive_transactions command"""
+    list_display = ('transaction_type', 'amount', 'category', 'date', 'monthly_budget', 'created_at')
+    list_filter = ('transaction_type',)
+    list_select_related = ('category', 'monthly_budget__user')
+    search_fields = ('monthly_budget__user__email',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
 @admin.register(DailySummary)
-class DailySummaryAdmin(admin.ModelAdmin):
+class DailySummaryAdmin(OwnerEmailSearchMixin, CursorPagingMixin, admin.ModelAdmin):
     list_display = ('date', 'monthly_budget', 'total_income', 'total_expense', 'net_amount')
     list_filter = ('date',)
+    list_select_related = ('monthly_budget__user',)
     search_fields = ('monthly_budget__user__email',)
+    autocomplete_fields = ('monthly_budget',)
     readonly_fields = ('created_at', 'updated_at')
-    date_hierarchy = 'date'
 
 @admin.register(MonthlySummary)
-class MonthlySummaryAdmin(admin.ModelAdmin):
-    list_display = ('monthly_budget', 'total_income', 'total_expense', 'remaining_balance', 'savings_rate')
+class MonthlySummaryAdmin(OwnerEmailSearchMixin, admin.ModelAdmin):
+    list_display = ('monthly_budget', 'total_income', 'total_expense', 'remaining_balance', 'savings_rate', 'is_finalized')
+    list_filter = ('is_finalized',)
+    list_select_related = ('monthly_budget__user',)
     search_fields = ('monthly_budget__user__email',)
-    readonly_fields = ('created_at', 'updated_at')
+    autocomplete_fields = ('monthly_budget',)
+    readonly_fields = ('finalized_at', 'created_at', 'updated_at')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+@admin.register(CategorySpend)
+class CategorySpendAdmin(OwnerEmailSearchMixin, admin.ModelAdmin):
+    list_display = ('category', 'monthly_budget', 'total_spent', 'transaction_count', 'updated_at')
+    list_select_related = ('category', 'monthly_budget__user')
+    search_fields = ('monthly_budget__user__email',)
+    autocomplete_fields = ('category', 'monthly_budget')
+    readonly_fields = ('updated_at',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 @admin.register(Goal)
 class GoalAdmin(admin.ModelAdmin):
-    list_display = ('title', 'user', 'target_amount', 'current_progress', 'target_date', 'is_completed')
-    list_filter = ('is_completed', 'target_date', 'created_at')
+    list_display = ('title', 'user', 'target_amount', 'current_progress', 'progress_percentage', 'target_date', 'projected_completion_date', 'is_completed')
+    list_filter = ('is_completed', 'category_type', 'target_date', 'created_at')
+    list_select_related = ('user',)
     search_fields = ('title', 'user__email', 'user__name')
-    readonly_fields = ('created_at', 'updated_at')
\ No newline at end of file
+    autocomplete_fields = ('user',)
+    readonly_fields = ('progress_percentage', 'is_completed', 'projected_completion_date', 'created_at', 'updated_at')
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'status', 'monthly_budget', 'date', 'attempts', 'run_after', 'locked_by')
+    list_filter = ('status', 'kind')
+    list_select_related = ('monthly_budget__user',)
+    search_fields = ('dedupe_key', 'last_error')
+    autocomplete_fields = ('monthly_budget',)
+    readonly_fields = ('created_at', 'updated_at')
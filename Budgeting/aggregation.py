@@ -0,0 +1,106 @@
+from decimal import Decimal
+from django.db.models import F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from .fields import MoneyField
+
+ZERO = Decimal('0.00')
+CENT = Decimal('0.01')
+
+
+def to_money(value):
+    """Round an aggregated amount to cents (SQLite hands back sums as floats)"""
+    return Decimal(value or 0).quantize(CENT)
+
+
+def money_value(amount):
+    """A Decimal amount as a parameter of expressions over money columns (sent as cents)"""
+    return Value(amount, output_field=MoneyField())
+
+
+def money_sum(field, **filters):
+    """Sum a money column as integer cents in the database, treating an empty set as 0 instead of None"""
+    return Coalesce(
+        Sum(field, filter=Q(**filters) if filters else None),
+        money_value(ZERO),
+        output_field=MoneyField(),
+    )
+
+
+def budget_totals_annotations(prefix='transactions__'):
+    """Expressions for income/expense totals, usable in aggregate() or annotate()"""
+    return {
+        'total_income': money_sum(f'{prefix}amount', **{f'{prefix}transaction_type': 'income'}),
+        'total_spent': money_sum(f'{prefix}amount', **{f'{prefix}transaction_type': 'expense'}),
+    }
+
+
+def _finish_totals(monthly_budget, totals):
+    totals = {key: to_money(value) for key, value in totals.items()}
+    totals['remaining_balance'] = monthly_budget.total_budget - totals['total_spent']
+    return totals
+
+
+def _archived_totals_query(monthly_budget):
+    # Archived budgets: the transactions are being (or have been) moved to the archive table,
+    # so the finalized MonthlySummary the archiver requires is the one complete source
+    from .models import MonthlySummary  # the models import this module
+    return MonthlySummary.objects.filter(monthly_budget=monthly_budget).values(
+        'total_income', total_spent=F('total_expense'),
+    )
+
+
+def get_budget_totals(monthly_budget):
+    """Income, expense and remaining balance for a budget in a single query"""
+    if monthly_budget.archived_at:
+        totals = _archived_totals_query(monthly_budget).first()
+        if totals is not None:
+            return _finish_totals(monthly_budget, totals)
+    totals = monthly_budget.transactions.aggregate(**budget_totals_annotations(prefix=''))
+    return _finish_totals(monthly_budget, totals)
+
+
+async def aget_budget_totals(monthly_budget):
+    if monthly_budget.archived_at:
+        totals = await _archived_totals_query(monthly_budget).afirst()
+        if totals is not None:
+            return _finish_totals(monthly_budget, totals)
+    totals = await monthly_budget.transactions.aaggregate(**budget_totals_annotations(prefix=''))
+    return _finish_totals(monthly_budget, totals)
+
+
+def _categories_with_spent(monthly_budget):
+    # Spent comes from the CategorySpend rollup, so transactions are never scanned here
+    return monthly_budget.categories.annotate(
+        spent=Coalesce(F('spend__total_spent'), money_value(ZERO), output_field=MoneyField()),
+    )
+
+
+def _summarize_categories(categories):
+    summary = []
+    for category in categories:
+        spent = to_money(category.spent)
+        summary.append({
+            'category': category,
+            'allocated': category.allocated_amount,
+            'spent': spent,
+            'remaining': category.allocated_amount - spent,
+            'percentage': (spent / category.allocated_amount * 100) if category.allocated_amount > 0 else 0
+        })
+    return summary
+
+
+def get_categories_summary(monthly_budget):
+    """Per-category spent/remaining/percentage breakdown in a single query over the rollup"""
+    return _summarize_categories(_categories_with_spent(monthly_budget))
+
+
+async def aget_categories_summary(monthly_budget):
+    return _summarize_categories([category async for category in _categories_with_spent(monthly_budget)])
+
+
+def get_budget_overview(monthly_budget):
+    """Everything the dashboard shows about a budget: totals plus category breakdown"""
+    overview = get_budget_totals(monthly_budget)
+    overview['total_budget'] = monthly_budget.total_budget
+    overview['categories_summary'] = get_categories_summary(monthly_budget)
+    return overview
@@ -0,0 +1,379 @@
+import hashlib
+import json
+from functools import wraps
+from django.db.models import Count, Max
+from django.db.transaction import atomic
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.views.decorators.http import condition, require_http_methods
+from .active_budget import aget_active_budget, get_active_budget
+from .cache import get_dashboard_data
+from .models import Category, Transaction, ArchivedTransaction, MonthlySummary, Goal
+from .trends import DEFAULT_ROLLING_WINDOW, PERIODS, get_trends
+from .simulation import DEFAULT_MONTHS, DEFAULT_PATHS, InvalidScenario, Scenario, simulate_budget
+from .pagination import InvalidCursor, get_page_size, paginate_transactions
+from .search import get_search_page, parse_date, search_transactions
+from .validation import clean_transaction_data, parse_id
+
+
+def api_login_required(view_func):
+    """Like login_required, but answers 401 JSON instead of redirecting to the login page"""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required'}, status=401)
+        return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+def _freshness_queries(budget):
+    return (
+        MonthlySummary.objects.filter(monthly_budget=budget).values_list('updated_at', flat=True),
+        budget.transactions.order_by(),
+        budget.categories.order_by(),
+    )
+
+
+def _budget_state(request, budget, summary_updated, transactions, categories):
+    timestamps = [budget.updated_at, summary_updated, transactions['latest'], categories['latest']]
+    last_modified = max(t for t in timestamps if t is not None)
+    fingerprint = ':'.join(str(part) for part in [
+        budget.pk, *timestamps, transactions['count'], categories['count'], request.get_full_path(),
+    ])
+    return hashlib.md5(fingerprint.encode()).hexdigest(), last_modified
+
+
+def get_budget_state(request):
+    """
+    Cheap freshness check for the active budget: a few indexed lookups of
+    updated_at columns instead of the aggregation queries.
+    Returns (etag, last_modified), memoized for the request.
+    """
+    if hasattr(request, '_api_budget_state'):
+        return request._api_budget_state
+
+    budget = get_active_budget(request)
+    if budget is None:
+        request._api_budget_state = (None, None)
+        return request._api_budget_state
+
+    summary, transactions, categories = _freshness_queries(budget)
+    request._api_budget_state = _budget_state(
+        request,
+        budget,
+        summary.first(),
+        transactions.aggregate(latest=Max('updated_at'), count=Count('pk')),
+        categories.aggregate(latest=Max('updated_at'), count=Count('pk')),
+    )
+    return request._api_budget_state
+
+
+async def aget_budget_state(request, user):
+    """Async get_budget_state; also memoizes the active budget for the sync helpers"""
+    if hasattr(request, '_api_budget_state'):
+        return request._api_budget_state
+
+    budget = await aget_active_budget(request, user)
+    if budget is None:
+        request._api_budget_state = (None, None)
+        return request._api_budget_state
+
+    summary, transactions, categories = _freshness_queries(budget)
+    request._api_budget_state = _budget_state(
+        request,
+        budget,
+        await summary.afirst(),
+        await transactions.aaggregate(latest=Max('updated_at'), count=Count('pk')),
+        await categories.aaggregate(latest=Max('updated_at'), count=Count('pk')),
+    )
+    return request._api_budget_state
+
+
+def budget_etag(request, *args, **kwargs):
+    return get_budget_state(request)[0]
+
+
+def budget_last_modified(request, *args, **kwargs):
+    return get_budget_state(request)[1]
+
+
+def transactions_etag(request, *args, **kwargs):
+    # ?q= searches every budget of the user, so the active budget's state says nothing about the results
+    return None if request.GET.get('q', '').strip() else budget_etag(request)
+
+
+def transactions_last_modified(request, *args, **kwargs):
+    return None if request.GET.get('q', '').strip() else budget_last_modified(request)
+
+
+def no_active_budget():
+    return JsonResponse({'error': 'Please set up your budget first.'}, status=404)
+
+
+def serialize_budget(budget):
+    return {
+        'id': budget.budgetId,
+        'start_date': budget.start_date,
+        'end_date': budget.end_date,
+        'total_budget': budget.total_budget,
+        'is_active': budget.is_active,
+    }
+
+
+def serialize_transaction(transaction):
+    return {
+        'id': transaction.transactionId,
+        'type': transaction.transaction_type,
+        'amount': transaction.amount,
+        'category_id': transaction.category_id,
+        'goal_id': transaction.goal_id,
+        'date': transaction.date,
+        'note': transaction.note,
+        'created_at': transaction.created_at,
+        'updated_at': transaction.updated_at,
+    }
+
+
+def serialize_category_summary(item):
+    category = item['category']
+    return {
+        'id': category.categoryId,
+        'name': category.category_name,
+        'type': category.category_type,
+        'color': category.color,
+        'allocated': item['allocated'],
+        'spent': item['spent'],
+        'remaining': item['remaining'],
+        'percentage': round(item['percentage'], 2),
+    }
+
+
+def parse_body(request):
+    """JSON request body, falling back to form data"""
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+    return request.POST
+
+
+def save_transaction(request, budget, transaction=None):
+    """Validate the request body and create or update a transaction; returns a JsonResponse"""
+    data = parse_body(request)
+    if data is None:
+        return JsonResponse({'errors': ['Invalid JSON body']}, status=400)
+
+    # PATCH keeps the fields it does not mention
+    if transaction is not None and request.method == 'PATCH':
+        current = serialize_transaction(transaction)
+        data = {key: data.get(key, current[key]) for key in ('type', 'amount', 'category_id', 'goal_id', 'date', 'note')}
+
+    amount = data.get('amount')
+    cleaned, errors = clean_transaction_data(
+        data.get('type'), str(amount) if amount is not None else None, data.get('category_id'), data.get('date')
+    )
+    category_id = cleaned['category_id']
+    if category_id and not Category.objects.filter(categoryId=category_id, monthly_budget=budget).exists():
+        errors.append('Unknown category')
+    try:
+        goal_id = parse_id(data.get('goal_id'))
+    except ValueError:
+        goal_id = None
+        errors.append('Invalid goal')
+    if goal_id and not Goal.objects.filter(goalId=goal_id, user=request.user).exists():
+        errors.append('Unknown goal')
+    note = data.get('note') or ''
+    if not isinstance(note, str):
+        errors.append('Invalid note')
+    if errors:
+        return JsonResponse({'errors': errors}, status=400)
+
+    created = transaction is None
+    with atomic():
+        if created:
+            transaction = Transaction(monthly_budget=budget)
+        else:
+            transaction.apply_to_summaries(sign=-1)
+        transaction.transaction_type = cleaned['transaction_type']
+        transaction.amount = cleaned['amount']
+        transaction.category_id = category_id
+        transaction.goal_id = goal_id
+        transaction.date = cleaned['date']
+        transaction.note = note.strip()
+        transaction.save()
+        transaction.apply_to_summaries()
+
+    return JsonResponse(serialize_transaction(transaction), status=201 if created else 200)
+
+
+@api_login_required
+@require_http_methods(['GET', 'HEAD'])
+@condition(etag_func=budget_etag, last_modified_func=budget_last_modified)
+def budget_summary(request):
+    """Totals of the active budget"""
+    budget = get_active_budget(request)
+    if budget is None:
+        return no_active_budget()
+    data = get_dashboard_data(request.user, budget)
+    return JsonResponse({
+        'budget': serialize_budget(budget),
+        'total_budget': data['total_budget'],
+        'total_income': data['total_income'],
+        'total_spent': data['total_spent'],
+        'remaining_balance': data['remaining_balance'],
+    })
+
+
+@api_login_required
+@require_http_methods(['GET', 'HEAD'])
+@condition(etag_func=budget_etag, last_modified_func=budget_last_modified)
+def category_summary(request):
+    """Per-category allocation and spending of the active budget"""
+    budget = get_active_budget(request)
+    if budget is None:
+        return no_active_budget()
+    data = get_dashboard_data(request.user, budget)
+    return JsonResponse({
+        'budget_id': budget.budgetId,
+        'categories': [serialize_category_summary(item) for item in data['categories_summary']],
+    })
+
+
+@api_login_required
+@require_http_methods(['GET', 'HEAD', 'POST'])
+@condition(etag_func=transactions_etag, last_modified_func=transactions_last_modified)
+def transactions(request):
+    """Keyset-paginated transactions of the active budget, or ranked ?q= search results (GET), or create one (POST)"""
+    budget = get_active_budget(request)
+    if budget is None:
+        return no_active_budget()
+
+    if request.method == 'POST':
+        return save_transaction(request, budget)
+
+    queryset = Transaction.objects.filter(monthly_budget=budget)
+    filter_type = request.GET.get('type')
+    if filter_type in ['income', 'expense']:
+        queryset = queryset.filter(transaction_type=filter_type)
+    try:
+        category_id = parse_id(request.GET.get('category'))
+    except ValueError:
+        return JsonResponse({'error': 'category must be a category id'}, status=400)
+    if category_id:
+        queryset = queryset.filter(category_id=category_id)
+    try:
+        date_from = parse_date(request.GET.get('date_from'))
+        date_to = parse_date(request.GET.get('date_to'))
+    except ValueError:
+        return JsonResponse({'error': 'Dates must be in YYYY-MM-DD format'}, status=400)
+
+    search_query = request.GET.get('q', '').strip()
+    if search_query:
+        page = search_transactions(
+            request.user, search_query, get_search_page(request.GET.get('page')),
+            get_page_size(request.GET.get('page_size')),
+            transaction_type=filter_type if filter_type in ['income', 'expense'] else None,
+            category_id=category_id, date_from=date_from, date_to=date_to,
+        )
+        return JsonResponse({
+            'results': [dict(serialize_transaction(t), rank=t.search_rank) for t in page],
+            'query': search_query,
+            'next_page': page.next_page,
+            'prev_page': page.prev_page,
+            'page_size': page.page_size,
+        })
+
+    if date_from:
+        queryset = queryset.filter(date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(date__lte=date_to)
+    try:
+        page = paginate_transactions(queryset, request.GET.get('cursor'), get_page_size(request.GET.get('page_size')))
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+
+    return JsonResponse({
+        'results': [serialize_transaction(t) for t in page],
+        'next_cursor': page.next_cursor,
+        'prev_cursor': page.prev_cursor,
+        'page_size': page.page_size,
+    })
+
+
+def transaction_etag(request, transaction_id):
+    updated_at = Transaction.objects.filter(
+        transactionId=transaction_id, monthly_budget__user=request.user
+    ).values_list('updated_at', flat=True).first()
+    if updated_at is None and request.method in ('GET', 'HEAD'):
+        updated_at = ArchivedTransaction.objects.filter(
+            transactionId=transaction_id, monthly_budget__user=request.user
+        ).values_list('updated_at', flat=True).first()
+    return hashlib.md5(f'{transaction_id}:{updated_at}'.encode()).hexdigest() if updated_at else None
+
+
+@api_login_required
+@require_http_methods(['GET', 'HEAD', 'PUT', 'PATCH', 'DELETE'])
+@condition(etag_func=transaction_etag)
+def transaction_detail(request, transaction_id):
+    """Read, update or delete one transaction; archived transactions can only be read"""
+    if request.method in ('GET', 'HEAD'):
+        transaction = Transaction.objects.filter(transactionId=transaction_id, monthly_budget__user=request.user).first()
+        if transaction is None:
+            transaction = get_object_or_404(ArchivedTransaction, transactionId=transaction_id, monthly_budget__user=request.user)
+        return JsonResponse(serialize_transaction(transaction))
+
+    transaction = get_object_or_404(Transaction, transactionId=transaction_id, monthly_budget__user=request.user)
+
+    if request.method in ('PUT', 'PATCH'):
+        return save_transaction(request, transaction.monthly_budget, transaction)
+
+    if request.method == 'DELETE':
+        with atomic():
+            transaction.apply_to_summaries(sign=-1)
+            transaction.delete()
+        return HttpResponse(status=204)
+
+
+@api_login_required
+@require_http_methods(['GET'])
+def simulate(request):
+    """What-if projection of the active budget, e.g. ?cut=food:20&income=500&months=24"""
+    budget = get_active_budget(request)
+    if budget is None:
+        return no_active_budget()
+    try:
+        months = int(request.GET.get('months', DEFAULT_MONTHS))
+        paths = int(request.GET.get('paths', DEFAULT_PATHS))
+    except ValueError:
+        return JsonResponse({'errors': ['months and paths must be integers']}, status=400)
+    try:
+        scenario = Scenario.from_query(request.GET)
+    except InvalidScenario as exc:
+        return JsonResponse({'errors': [str(exc)]}, status=400)
+    result = simulate_budget(budget, scenario, months=months, paths=paths, seed=request.GET.get('seed'))
+
+    for item in result['categories']:
+        category = item.pop('category')
+        item.update({'id': category.categoryId, 'name': category.category_name})
+    for item in result['goals']:
+        goal = item.pop('goal')
+        item.update({'id': goal.goalId, 'title': goal.title, 'target_date': goal.target_date})
+    return JsonResponse(result)
+
+
+@api_login_required
+@require_http_methods(['GET'])
+def trends(request):
+    """History across all budgets, e.g. ?period=week&window=4&years=2"""
+    period = request.GET.get('period', 'month')
+    if period not in PERIODS:
+        return JsonResponse({'errors': [f'period must be one of {", ".join(PERIODS)}']}, status=400)
+    try:
+        window = int(request.GET.get('window', DEFAULT_ROLLING_WINDOW))
+        years = int(request.GET.get('years', 5))
+    except ValueError:
+        return JsonResponse({'errors': ['window and years must be integers']}, status=400)
+    return JsonResponse(get_trends(request.user, period, years=years, window=window, today=timezone.now().date()))
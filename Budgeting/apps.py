@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class BudgetingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Budgeting'
-    verbose_name = 'Budget Management'
\ No newline at end of file
+    verbose_name = 'Budget Management'
+
+    def ready(self):
+        from . import signals  # noqa: F401
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""
+Archival of closed budget periods. Once a budget is inactive, its
+MonthlySummary is finalized and its period ended more than
+BUDGETING_ARCHIVE_AFTER_DAYS ago, its transactions are moved from the hot
+transactions table to ArchivedTransaction, batch_size rows per database
+transaction, so no batch holds its locks for long and the hot table and its
+indexes only carry recent history.
+
+The budget's summaries and category rollups stay as they are: archived_at is
+set before the first row moves and the summary rebuilds skip such budgets.
+Exports, search and goal progress read both tables.
+"""
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from .cache import invalidate_budget
+from .models import MonthlyBudget, Transaction, ArchivedTransaction
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_AFTER_DAYS = getattr(settings, 'BUDGETING_ARCHIVE_AFTER_DAYS', 365)
+DEFAULT_BATCH_SIZE = getattr(settings, 'BUDGETING_ARCHIVE_BATCH_SIZE', 1000)
+
+ARCHIVED_FIELDS = [
+    'transactionId', 'monthly_budget_id', 'category_id', 'goal_id', 'transaction_type',
+    'amount', 'date', 'note', 'created_at', 'updated_at',
+]
+
+
+def archivable_budgets(today=None, older_than_days=ARCHIVE_AFTER_DAYS):
+    """Closed, finalized budgets that ended more than older_than_days ago and still have hot transactions"""
+    today = today or timezone.localdate()
+    return MonthlyBudget.objects.filter(
+        is_active=False,
+        summary__is_finalized=True,
+        end_date__lt=today - timedelta(days=older_than_days),
+    ).filter(Exists(Transaction.objects.filter(monthly_budget=OuterRef('pk'))))
+
+
+def archive_batch(budget_ids, batch_size=DEFAULT_BATCH_SIZE):
+    """Move up to batch_size transactions of the given budgets to the archive in one transaction; returns rows moved"""
+    with transaction.atomic():
+        MonthlyBudget.objects.filter(pk__in=budget_ids, archived_at__isnull=True).update(archived_at=timezone.now())
+        rows = list(
+            Transaction.objects.select_for_update().filter(monthly_budget_id__in=budget_ids)
+            .order_by('pk').values(*ARCHIVED_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0
+        # Delete first: the full-text index is keyed by the transaction id, which the archive keeps
+        Transaction.objects.filter(pk__in=[row['transactionId'] for row in rows]).delete()
+        ArchivedTransaction.objects.bulk_create([ArchivedTransaction(**row) for row in rows])
+    return len(rows)
+
+
+def run_archive(today=None, older_than_days=ARCHIVE_AFTER_DAYS, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """
+    Archive the transactions of every archivable budget. Returns a dict with
+    the number of budgets archived and transactions moved.
+    """
+    stats = {'budgets': 0, 'transactions': 0}
+    budgets = archivable_budgets(today, older_than_days).order_by('pk').values_list('pk', flat=True)
+    if dry_run:
+        stats['budgets'] = budgets.count()
+        stats['transactions'] = Transaction.objects.filter(monthly_budget__in=budgets).count()
+        return stats
+
+    last_pk = 0
+    while True:
+        # A batch of budgets at a time, so each row batch can span several small budgets
+        budget_ids = list(budgets.filter(pk__gt=last_pk)[:batch_size])
+        if not budget_ids:
+            break
+        last_pk = budget_ids[-1]
+        while True:
+            moved = archive_batch(budget_ids, batch_size)
+            stats['transactions'] += moved
+            if moved < batch_size:
+                break
+        stats['budgets'] += len(budget_ids)
+        for pk in budget_ids:
+            invalidate_budget(pk)
+        logger.info('Archived budgets up to %s (%s transactions so far)', last_pk, stats['transactions'])
+    return stats
@@ -0,0 +1,163 @@
+"""
+Async versions of the read-heavy Budgeting views, used instead of the sync
+ones when BUDGETING_ASYNC_VIEWS is on (serving through backend/asgi.py).
+"""
+from functools import wraps
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import redirect, render
+from django.views.decorators.http import condition, require_http_methods
+from . import api
+from .active_budget import aget_active_budget, aget_active_categories
+from .cache import aget_dashboard_data
+from .models import MonthlyBudget, Transaction
+from .pagination import InvalidCursor, apaginate_transactions, get_page_size
+from .search import asearch_transactions, get_date_filters, get_search_page
+from .validation import parse_id
+
+
+async def _resolve_user(request):
+    # request.user is a lazy object whose first access queries synchronously
+    user = await request.auser()
+    request.user = user
+    return user
+
+
+@login_required(login_url='login')
+async def dashboard(request):
+    """Main dashboard with budget overview"""
+    user = await _resolve_user(request)
+
+    # Get active budget or most recent budget
+    active_budget = await aget_active_budget(request, user)
+
+    if not active_budget:
+        # User has old budgets but none active, or is a first time user
+        active_budget = await MonthlyBudget.objects.filter(user=user).afirst()
+        if not active_budget:
+            return redirect('budget_setup')
+
+    context = {
+        'user': user,
+        'active_budget': active_budget,
+    }
+
+    # Totals, category summary, recent transactions and goals are fetched concurrently on a cache miss
+    context.update(await aget_dashboard_data(user, active_budget))
+
+    return render(request, 'Budgeting/dashboard.html', context)
+
+
+@login_required(login_url='login')
+async def transactions_list(request):
+    """View all transactions"""
+    user = await _resolve_user(request)
+    active_budget = await aget_active_budget(request, user)
+
+    if not active_budget:
+        messages.warning(request, 'Please set up your budget first.')
+        return redirect('budget_setup')
+
+    transactions = Transaction.objects.filter(monthly_budget=active_budget)
+
+    # Filter by type if specified
+    filter_type = request.GET.get('type')
+    if filter_type in ['income', 'expense']:
+        transactions = transactions.filter(transaction_type=filter_type)
+
+    # Filter by category if specified; like the date filters, a malformed value is ignored
+    try:
+        category_id = parse_id(request.GET.get('category'))
+    except ValueError:
+        category_id = None
+    if category_id:
+        transactions = transactions.filter(category_id=category_id)
+
+    page_size = get_page_size(request.GET.get('page_size'))
+    search_query = request.GET.get('q', '').strip()
+    date_from, date_to = get_date_filters(request.GET)
+    if search_query:
+        page = await asearch_transactions(
+            user, search_query, get_search_page(request.GET.get('page')), page_size,
+            transaction_type=filter_type if filter_type in ['income', 'expense'] else None,
+            category_id=category_id, date_from=date_from, date_to=date_to,
+        )
+    else:
+        if date_from:
+            transactions = transactions.filter(date__gte=date_from)
+        if date_to:
+            transactions = transactions.filter(date__lte=date_to)
+        try:
+            page = await apaginate_transactions(transactions, request.GET.get('cursor'), page_size)
+        except InvalidCursor:
+            page = await apaginate_transactions(transactions, None, page_size)
+
+    categories = await aget_active_categories(request, user)
+
+    context = {
+        'active_budget': active_budget,
+        'transactions': page.items,
+        'page': page,
+        'next_cursor': getattr(page, 'next_cursor', None),
+        'prev_cursor': getattr(page, 'prev_cursor', None),
+        'page_size': page_size,
+        'categories': categories,
+        'filter_type': filter_type,
+        'filter_category': category_id,
+        'filter_date_from': date_from,
+        'filter_date_to': date_to,
+        'search_query': search_query,
+        'search_page': page if search_query else None,
+    }
+
+    return render(request, 'Budgeting/transactions_list.html', context)
+
+
+def api_budget_condition(view_func):
+    """
+    condition() calls its ETag/Last-Modified callables synchronously, so resolve
+    the budget state with the async ORM first; the callables then only read the
+    memoized values.
+    """
+    conditional_view = condition(etag_func=api.budget_etag, last_modified_func=api.budget_last_modified)(view_func)
+
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        user = await _resolve_user(request)
+        if not user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required'}, status=401)
+        await api.aget_budget_state(request, user)
+        return await conditional_view(request, *args, **kwargs)
+    return wrapper
+
+
+@require_http_methods(['GET', 'HEAD'])
+@api_budget_condition
+async def budget_summary(request):
+    """Totals of the active budget"""
+    budget = await aget_active_budget(request, request.user)
+    if budget is None:
+        return api.no_active_budget()
+    data = await aget_dashboard_data(request.user, budget)
+    return JsonResponse({
+        'budget': api.serialize_budget(budget),
+        'total_budget': data['total_budget'],
+        'total_income': data['total_income'],
+        'total_spent': data['total_spent'],
+        'remaining_balance': data['remaining_balance'],
+    })
+
+
+@require_http_methods(['GET', 'HEAD'])
+@api_budget_condition
+async def category_summary(request):
+    """Per-category allocation and spending of the active budget"""
+    budget = await aget_active_budget(request, request.user)
+    if budget is None:
+        return api.no_active_budget()
+    data = await aget_dashboard_data(request.user, budget)
+    return JsonResponse({
+        'budget_id': budget.budgetId,
+        'categories': [api.serialize_category_summary(item) for item in data['categories_summary']],
+    })
@@ -0,0 +1,271 @@
+import copy
+import json
+import time
+from contextlib import ExitStack
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from UserAuth.models import User
+from .models import MonthlyBudget, Category, Transaction, DailySummary, MonthlySummary, CategorySpend
+
+BENCHMARK_EMAIL = 'benchmark@example.com'
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+# Pages whose templates are not in the tree yet render as empty stubs, so the
+# benchmark still measures their view and ORM work
+STUB_TEMPLATES = [
+    'Budgeting/transactions_list.html',
+    'Budgeting/add_transaction.html',
+    'Budgeting/edit_transaction.html',
+    'Budgeting/delete_transaction.html',
+    'Budgeting/quick_add_transaction.html',
+]
+
+
+def percentile(values, point):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round((len(ordered) - 1) * point / 100)))
+    return ordered[index]
+
+
+def prepare_benchmark_user(transactions=500):
+    """Fixture user with an active budget, categories and transactions"""
+    user = User.objects.filter(email=BENCHMARK_EMAIL).first()
+    if user is None:
+        user = User.objects.create_user(BENCHMARK_EMAIL, 'Benchmark', BENCHMARK_PASSWORD)
+    elif not user.check_password(BENCHMARK_PASSWORD):
+        # check_password() also upgrades a hash kept from an earlier run with another
+        # hasher, so login_post never times that one-off rehash
+        user.set_password(BENCHMARK_PASSWORD)
+    user.is_staff = True
+    user.save()
+
+    budget = MonthlyBudget.objects.filter(user=user, is_active=True).first()
+    if budget is None:
+        budget = MonthlyBudget.objects.create(
+            user=user, start_date=timezone.now().date() - timedelta(days=10), total_budget=Decimal('5000')
+        )
+        categories = Category.objects.bulk_create([
+            Category(
+                monthly_budget=budget, category_name=name, category_type=category_type,
+                allocated_amount=Decimal('500'),
+            )
+            for category_type, name in Category.PREDEFINED_CATEGORIES
+        ])
+        Transaction.objects.bulk_create([
+            Transaction(
+                monthly_budget=budget,
+                category=None if index % 10 == 0 else categories[index % len(categories)],
+                transaction_type='income' if index % 10 == 0 else 'expense',
+                amount=Decimal(index % 200 + 1),
+                date=budget.start_date + timedelta(days=index % 30),
+                note=f'Benchmark {index}',
+            )
+            for index in range(transactions)
+        ])
+        DailySummary.rebuild_for_budget(budget)
+        MonthlySummary.update_or_create_for_budget(budget)
+        CategorySpend.rebuild_for_budget(budget)
+    return user, budget
+
+
+class Case:
+    """One request to benchmark; setup() runs before each iteration and returns extra format values"""
+
+    def __init__(self, name, url_name, method='get', data=None, url_kwargs=None, setup=None,
+                 authenticated=True, content_type=None):
+        self.name = name
+        self.url_name = url_name
+        self.method = method
+        self.data = data
+        self.url_kwargs = url_kwargs or {}
+        self.setup = setup
+        self.authenticated = authenticated
+        self.content_type = content_type
+
+
+def build_cases(user, budget):
+    category = budget.categories.order_by('categoryId').first()
+    today = timezone.now().date().isoformat()
+    counter = iter(range(10 ** 9))
+
+    def new_transaction():
+        return {'transaction_id': Transaction.objects.create(
+            monthly_budget=budget, category=category, transaction_type='expense',
+            amount=Decimal('1'), date=timezone.now().date(),
+        ).transactionId}
+
+    def any_transaction():
+        return {'transaction_id': budget.transactions.order_by('-pk').values_list('pk', flat=True).first()}
+
+    def new_category():
+        return {'category_id': Category.objects.create(
+            monthly_budget=budget, category_name='Benchmark temp', allocated_amount=Decimal('1'), is_custom=True,
+        ).categoryId}
+
+    def new_signup():
+        return {'email': f'benchmark-signup-{next(counter)}-{time.time_ns()}@example.com'}
+
+    expense = {'transaction_type': 'expense', 'amount': '12.34', 'category': category.categoryId, 'date': today}
+    api_expense = json.dumps({'type': 'expense', 'amount': '1.00', 'category_id': category.categoryId, 'date': today})
+    return [
+        # UserAuth
+        Case('signup_get', 'signup', authenticated=False),
+        Case('signup_post', 'signup', 'post', {
+            'name': 'Benchmark', 'email': '{email}', 'password': 'secret1', 'confirm_password': 'secret1',
+        }, setup=new_signup, authenticated=False),
+        Case('login_get', 'login', authenticated=False),
+        Case('login_post', 'login', 'post', {'email': BENCHMARK_EMAIL, 'password': BENCHMARK_PASSWORD},
+             authenticated=False),
+        Case('logout', 'logout'),
+        # Budgeting pages
+        Case('dashboard', 'budgeting_dashboard'),
+        Case('budget_setup_get', 'budget_setup'),
+        Case('category_setup_get', 'category_setup', url_kwargs={'budget_id': budget.budgetId}),
+        Case('category_setup_post', 'category_setup', 'post', {
+            'action': 'add_custom', 'custom_category_name': 'Benchmark custom', 'custom_allocated_amount': '10',
+        }, url_kwargs={'budget_id': budget.budgetId}),
+        Case('delete_category', 'delete_category', url_kwargs={'category_id': '{category_id}'}, setup=new_category),
+        Case('transactions_list', 'transactions_list'),
+        Case('transactions_list_filtered', 'transactions_list', data={'type': 'expense', 'category': category.categoryId}),
+        Case('transactions_search', 'transactions_list', data={'q': 'benchmark', 'type': 'expense'}),
+        Case('add_transaction_get', 'add_transaction'),
+        Case('add_transaction_post', 'add_transaction', 'post', expense),
+        Case('edit_transaction_get', 'edit_transaction', url_kwargs={'transaction_id': '{transaction_id}'},
+             setup=any_transaction),
+        Case('edit_transaction_post', 'edit_transaction', 'post', expense,
+             url_kwargs={'transaction_id': '{transaction_id}'}, setup=any_transaction),
+        Case('delete_transaction_post', 'delete_transaction', 'post',
+             url_kwargs={'transaction_id': '{transaction_id}'}, setup=new_transaction),
+        Case('quick_add_transaction_post', 'quick_add_transaction', 'post', {
+            'transaction_type': 'expense', 'amount': '3.21', 'category': category.categoryId,
+        }),
+        Case('import_transactions_get', 'import_transactions'),
+        Case('export_csv', 'export_data', data={'format': 'csv'}),
+        Case('simulate', 'simulate', data={'paths': 200}),
+        Case('trends', 'trends'),
+        Case('cache_stats', 'budgeting_cache_stats'),
+        # JSON API
+        Case('api_summary', 'api_budget_summary'),
+        Case('api_categories', 'api_category_summary'),
+        Case('api_transactions', 'api_transactions'),
+        Case('api_transactions_search', 'api_transactions', data={'q': 'benchmark'}),
+        Case('api_transactions_post', 'api_transactions', 'post', api_expense, content_type='application/json'),
+        Case('api_transaction_get', 'api_transaction_detail', url_kwargs={'transaction_id': '{transaction_id}'},
+             setup=any_transaction),
+        Case('api_transaction_patch', 'api_transaction_detail', 'patch', json.dumps({'amount': '2.00'}),
+             url_kwargs={'transaction_id': '{transaction_id}'}, setup=any_transaction,
+             content_type='application/json'),
+        Case('api_transaction_delete', 'api_transaction_detail', 'delete',
+             url_kwargs={'transaction_id': '{transaction_id}'}, setup=new_transaction),
+        Case('api_simulate', 'api_simulate', data={'paths': 200}),
+        Case('api_trends', 'api_trends', data={'period': 'week'}),
+    ]
+
+
+def _fill(value, values):
+    if isinstance(value, str):
+        return value.format(**values) if '{' in value and not value.startswith('{"') else value
+    if isinstance(value, dict):
+        return {key: _fill(item, values) for key, item in value.items()}
+    return value
+
+
+def _stub_template_settings():
+    templates = copy.deepcopy(settings.TEMPLATES)
+    engine = templates[0]
+    engine['APP_DIRS'] = False
+    engine.setdefault('OPTIONS', {})['loaders'] = [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+        ('django.template.loaders.locmem.Loader', {name: '' for name in STUB_TEMPLATES}),
+    ]
+    return templates
+
+
+def run_case(case, user, iterations):
+    timings = []
+    queries = []
+    status = None
+    for iteration in range(iterations):
+        # A fresh client per iteration: a session left by login_post/signup_post would turn the
+        # following iterations into redirects and password hashing would never be timed. Each
+        # gets its own address too, or the signup throttle would refuse the later signup_post runs
+        client = Client(REMOTE_ADDR=f'10.{iteration // 65536 % 256}.{iteration // 256 % 256}.{iteration % 256}')
+        if case.authenticated:
+            client.force_login(user)
+        values = case.setup() if case.setup else {}
+        url = reverse(case.url_name, kwargs={key: _fill(value, values) for key, value in case.url_kwargs.items()})
+        data = _fill(case.data, values)
+        kwargs = {'content_type': case.content_type} if case.content_type else {}
+
+        with ExitStack() as stack:
+            # Count queries on every alias, the read replica included. The query log is a bounded
+            # deque; once full, CaptureQueriesContext would see no new entries and count 0
+            for alias in connections:
+                connections[alias].queries_log.clear()
+            captured = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+            started = time.perf_counter()
+            response = getattr(client, case.method)(url, data, **kwargs)
+            if response.streaming:
+                for _chunk in response.streaming_content:
+                    pass
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(sum(len(context) for context in captured))
+        status = response.status_code
+
+    return {
+        'status': status,
+        'queries': max(queries),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+    }
+
+
+def run_benchmarks(iterations=20, transactions=500, only=None):
+    """Run every case and return the machine-readable results"""
+    user, budget = prepare_benchmark_user(transactions)
+    results = {}
+    with override_settings(TEMPLATES=_stub_template_settings(), ALLOWED_HOSTS=['testserver', *settings.ALLOWED_HOSTS]):
+        for case in build_cases(user, budget):
+            if only and case.name not in only:
+                continue
+            try:
+                results[case.name] = run_case(case, user, iterations)
+            except Exception as exc:
+                results[case.name] = {'error': f'{type(exc).__name__}: {exc}'}
+    return {
+        'generated_at': timezone.now().isoformat(),
+        'iterations': iterations,
+        'transactions': transactions,
+        'database': connection.vendor,
+        'cases': results,
+    }
+
+
+def compare_results(results, baseline, latency_tolerance=1.0, latency_floor_ms=10.0):
+    """
+    List regressions against a baseline: any extra query, an error, or a p95
+    more than latency_tolerance (fraction) and latency_floor_ms above baseline.
+    """
+    regressions = []
+    for name, expected in baseline.get('cases', {}).items():
+        actual = results['cases'].get(name)
+        if actual is None or 'error' in expected:
+            continue
+        if 'error' in actual:
+            regressions.append(f"{name}: {actual['error']}")
+            continue
+        if actual['queries'] > expected['queries']:
+            regressions.append(f"{name}: {actual['queries']} queries (baseline {expected['queries']})")
+        if latency_tolerance is not None:
+            limit = max(expected['p95_ms'] * (1 + latency_tolerance), expected['p95_ms'] + latency_floor_ms)
+            if actual['p95_ms'] > limit:
+                regressions.append(f"{name}: p95 {actual['p95_ms']}ms (baseline {expected['p95_ms']}ms)")
+    return regressions
@@ -0,0 +1,166 @@
+import asyncio
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from backend.routers import primary_reads
+from .aggregation import aget_budget_totals, aget_categories_summary, get_budget_overview
+from .models import Goal
+
+CACHE_ALIAS = getattr(settings, 'BUDGETING_CACHE_ALIAS', 'default')
+CACHE_TIMEOUT = getattr(settings, 'BUDGETING_CACHE_TIMEOUT', 300)
+
+HITS_KEY = 'budgeting:stats:hits'
+MISSES_KEY = 'budgeting:stats:misses'
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def _user_version_key(user_id):
+    return f'budgeting:version:user:{user_id}'
+
+
+def _budget_version_key(budget_id):
+    return f'budgeting:version:budget:{budget_id}'
+
+
+def _new_version():
+    # Versions restart from the clock, not from 1, so an evicted version key
+    # can never come back with a number whose cached data is still around
+    return time.time_ns()
+
+
+def _bump(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_version(), None)
+
+
+def _bump_on_commit(key):
+    # Only once the write is visible: bumping inside the transaction would let a concurrent
+    # reader cache the pre-commit totals under the new version for the whole timeout.
+    # Outside a transaction this runs right away.
+    transaction.on_commit(lambda: _bump(key))
+
+
+def invalidate_user(user_id):
+    """Drop every cached dashboard of a user (goals changed), once the current transaction commits"""
+    _bump_on_commit(_user_version_key(user_id))
+
+
+def invalidate_budget(budget_id):
+    """Drop the cached dashboard of a budget (transactions, categories or the budget changed), once the current transaction commits"""
+    _bump_on_commit(_budget_version_key(budget_id))
+
+
+def _dashboard_key(user_id, budget_id):
+    cache = get_cache()
+    keys = [_user_version_key(user_id), _budget_version_key(budget_id)]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), None)
+            versions[key] = cache.get(key)
+    return f'budgeting:dashboard:{user_id}:{budget_id}:{versions[keys[0]]}:{versions[keys[1]]}'
+
+
+async def _adashboard_key(user_id, budget_id):
+    cache = get_cache()
+    keys = [_user_version_key(user_id), _budget_version_key(budget_id)]
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            await cache.aadd(key, _new_version(), None)
+            versions[key] = await cache.aget(key)
+    return f'budgeting:dashboard:{user_id}:{budget_id}:{versions[keys[0]]}:{versions[keys[1]]}'
+
+
+def _count(key):
+    cache = get_cache()
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+def get_dashboard_data(user, budget):
+    """Budget overview, recent transactions and open goals, cached per user and budget"""
+    cache = get_cache()
+    key = _dashboard_key(user.pk, budget.pk)
+    data = cache.get(key)
+    if data is not None:
+        _count(HITS_KEY)
+        return data
+
+    _count(MISSES_KEY)
+    # A lagging replica would cache pre-write data under the version the write just bumped
+    with primary_reads():
+        data = get_budget_overview(budget)
+        data['recent_transactions'] = list(budget.transactions.order_by('-date', '-created_at')[:10])
+        data['goals'] = list(Goal.objects.filter(user=user, is_completed=False)[:5])
+    cache.set(key, data, CACHE_TIMEOUT)
+    return data
+
+
+async def _acount(key):
+    cache = get_cache()
+    await cache.aadd(key, 0, None)
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        pass
+
+
+async def aget_dashboard_data(user, budget):
+    """Async get_dashboard_data; on a miss the independent queries run concurrently"""
+    cache = get_cache()
+    key = await _adashboard_key(user.pk, budget.pk)
+    data = await cache.aget(key)
+    if data is not None:
+        await _acount(HITS_KEY)
+        return data
+
+    await _acount(MISSES_KEY)
+    # The gathered tasks copy the context, primary reads included
+    with primary_reads():
+        totals, categories_summary, recent_transactions, goals = await asyncio.gather(
+            aget_budget_totals(budget),
+            aget_categories_summary(budget),
+            _alist(budget.transactions.order_by('-date', '-created_at')[:10]),
+            _alist(Goal.objects.filter(user=user, is_completed=False)[:5]),
+        )
+    data = totals
+    data.update({
+        'total_budget': budget.total_budget,
+        'categories_summary': categories_summary,
+        'recent_transactions': recent_transactions,
+        'goals': goals,
+    })
+    await cache.aset(key, data, CACHE_TIMEOUT)
+    return data
+
+
+async def _alist(queryset):
+    return [obj async for obj in queryset]
+
+
+def get_cache_stats():
+    """Dashboard cache hit/miss counters"""
+    counters = get_cache().get_many([HITS_KEY, MISSES_KEY])
+    hits = counters.get(HITS_KEY, 0)
+    misses = counters.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else 0,
+    }
+
+
+def reset_cache_stats():
+    get_cache().delete_many([HITS_KEY, MISSES_KEY])
@@ -0,0 +1,101 @@
+import csv
+import json
+from django.conf import settings
+from .models import MonthlyBudget, Transaction, ArchivedTransaction, DailySummary
+
+EXPORT_CHUNK_SIZE = getattr(settings, 'BUDGETING_EXPORT_CHUNK_SIZE', 2000)
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+# kind -> (model, date field used by the range filter, budget lookup, [(column, field)])
+EXPORT_KINDS = {
+    'transactions': (Transaction, 'date', 'monthly_budget_id', [
+        ('transaction_id', 'transactionId'),
+        ('budget_id', 'monthly_budget_id'),
+        ('date', 'date'),
+        ('type', 'transaction_type'),
+        ('amount', 'amount'),
+        ('category', 'category__category_name'),
+        ('note', 'note'),
+        ('created_at', 'created_at'),
+    ]),
+    'budgets': (MonthlyBudget, 'start_date', 'budgetId', [
+        ('budget_id', 'budgetId'),
+        ('start_date', 'start_date'),
+        ('end_date', 'end_date'),
+        ('total_budget', 'total_budget'),
+        ('is_active', 'is_active'),
+        ('total_income', 'summary__total_income'),
+        ('total_expense', 'summary__total_expense'),
+        ('remaining_balance', 'summary__remaining_balance'),
+        ('savings_rate', 'summary__savings_rate'),
+    ]),
+    'daily_summaries': (DailySummary, 'date', 'monthly_budget_id', [
+        ('budget_id', 'monthly_budget_id'),
+        ('date', 'date'),
+        ('total_income', 'total_income'),
+        ('total_expense', 'total_expense'),
+        ('net_amount', 'net_amount'),
+    ]),
+}
+
+# Kinds whose older rows may have moved to an archive table with the same columns
+ARCHIVE_MODELS = {
+    'transactions': ArchivedTransaction,
+}
+
+
+def get_export_rows(user, kind, start=None, end=None, budget_id=None, using=None):
+    """
+    Return (columns, rows) for a user's export. Rows are plain tuples streamed
+    from the database in chunks; no model instances are created. using pins the
+    database alias, since the rows are only read once the response streams.
+    """
+    model, date_field, budget_field, columns = EXPORT_KINDS[kind]
+    fields = [field for column, field in columns]
+
+    def rows_of(model):
+        if model is MonthlyBudget:
+            queryset = model.objects.using(using).filter(user=user)
+        else:
+            queryset = model.objects.using(using).filter(monthly_budget__user=user)
+        if budget_id:
+            queryset = queryset.filter(**{budget_field: budget_id})
+        if start:
+            queryset = queryset.filter(**{f'{date_field}__gte': start})
+        if end:
+            queryset = queryset.filter(**{f'{date_field}__lte': end})
+        return queryset.order_by().values_list(*fields)
+
+    if kind in ARCHIVE_MODELS:
+        # Still one streamed query; each row lives in exactly one of the two tables.
+        # A union can only be ordered by selected columns (fields[0] is the transaction id)
+        queryset = rows_of(model).union(rows_of(ARCHIVE_MODELS[kind]), all=True).order_by(date_field, fields[0])
+    else:
+        queryset = rows_of(model).order_by(date_field, 'pk')
+    rows = queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return [column for column, field in columns], rows
+
+
+class Echo:
+    """File-like object whose write() just hands back the value, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(columns, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_ndjson(columns, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), default=str) + '\n'
+
+
+def stream_export(columns, rows, export_format):
+    if export_format == 'ndjson':
+        return stream_ndjson(columns, rows)
+    return stream_csv(columns, rows)
@@ -0,0 +1,76 @@
+"""
+MoneyField: an amount of money stored as a whole number of cents (BIGINT)
+and exposed as a two-place Decimal, so models, views and templates keep
+working with Decimal. SUM() runs over integers in the database, which is
+exact on every engine (SQLite keeps DECIMAL columns as REAL), and reading a
+row converts one integer instead of parsing a decimal string.
+
+Cents are the storage format of every money column rather than a switchable
+mode: a setting read at runtime could not change the columns already
+migrated, and flipping it would read every stored amount 100 times off.
+"""
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from django import forms
+from django.core import exceptions, validators
+from django.db import models
+from django.db.models import lookups
+from django.utils.functional import cached_property
+
+DECIMAL_PLACES = 2
+# The BIGINT range, in units rather than cents
+MAX_CENTS = 2 ** 63 - 1
+MAX_VALUE = Decimal(MAX_CENTS).scaleb(-DECIMAL_PLACES)
+
+
+class MoneyField(models.BigIntegerField):
+    description = 'Amount of money stored as integer cents'
+    default_error_messages = {
+        'invalid': '“%(value)s” value must be a decimal number.',
+    }
+
+    @cached_property
+    def validators(self):
+        # The integer range validators of BigIntegerField would compare cents limits against the Decimal
+        return [
+            *self._validators,
+            validators.MinValueValidator(-MAX_VALUE),
+            validators.MaxValueValidator(MAX_VALUE),
+            validators.DecimalValidator(None, DECIMAL_PLACES),
+        ]
+
+    def to_python(self, value):
+        if value is None or isinstance(value, Decimal):
+            return value
+        try:
+            # str() first, so floats keep the digits they print with
+            return Decimal(str(value))
+        except InvalidOperation:
+            raise exceptions.ValidationError(self.error_messages['invalid'], code='invalid', params={'value': value})
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        # Integers for columns and SUM(); AVG() over cents may come back as a float
+        return Decimal(value if isinstance(value, (int, Decimal)) else str(value)).scaleb(-DECIMAL_PLACES)
+
+    def get_prep_value(self, value):
+        value = models.Field.get_prep_value(self, value)
+        if value is None:
+            return None
+        value = self.to_python(value)
+        if not value.is_finite() or abs(value) > MAX_VALUE:
+            # Fail here with the amount rather than with the driver's integer overflow
+            raise ValueError(f'{value} is outside the range of a MoneyField (±{MAX_VALUE})')
+        return int(value.scaleb(DECIMAL_PLACES).to_integral_value(ROUND_HALF_UP))
+
+    def formfield(self, **kwargs):
+        return models.Field.formfield(self, **{
+            'form_class': forms.DecimalField,
+            'decimal_places': DECIMAL_PLACES,
+            **kwargs,
+        })
+
+
+# BigIntegerField rounds float bounds up to a whole number before they are turned into cents
+MoneyField.register_lookup(lookups.GreaterThanOrEqual)
+MoneyField.register_lookup(lookups.LessThan)
@@ -0,0 +1,194 @@
+import csv
+import re
+from datetime import datetime
+from django.conf import settings
+from django.db import transaction
+from .cache import invalidate_budget, invalidate_user
+from .models import Category, Transaction, DailySummary, MonthlySummary, CategorySpend, Goal, Job
+from .validation import DATE_FORMAT, clean_transaction_data
+
+DEFAULT_BATCH_SIZE = getattr(settings, 'BUDGETING_IMPORT_BATCH_SIZE', 1000)
+MAX_REPORTED_ERRORS = 100
+
+IMPORT_FORMATS = ('csv', 'ofx')
+
+
+def iter_text_lines(fileobj, encoding='utf-8-sig'):
+    """Yield decoded lines one at a time from a binary or text file"""
+    for line in fileobj:
+        if isinstance(line, bytes):
+            line = line.decode(encoding)
+        yield line
+
+
+def iter_csv_rows(fileobj):
+    """
+    Yield rows of a CSV with a header of date, type, amount, category, note.
+    Only date and amount are required; without a type column, negative
+    amounts are expenses and positive amounts are income.
+    """
+    reader = csv.DictReader(iter_text_lines(fileobj))
+    for row in reader:
+        row = {(key or '').strip().lower(): (value or '').strip() for key, value in row.items()}
+        amount = row.get('amount', '')
+        transaction_type = row.get('type') or row.get('transaction_type', '')
+        if not transaction_type and amount:
+            transaction_type = 'expense' if amount.startswith('-') else 'income'
+        yield {
+            'transaction_type': transaction_type.lower(),
+            'amount': amount.lstrip('-'),
+            'category': row.get('category', ''),
+            'date': row.get('date', ''),
+            'note': row.get('note', ''),
+        }
+
+
+OFX_TAG = re.compile(r'<(/?)([A-Z0-9.]+)>([^<\r\n]*)')
+
+
+def iter_ofx_rows(fileobj):
+    """Yield the STMTTRN entries of an OFX (SGML or XML) bank statement"""
+    entry = None
+    for line in iter_text_lines(fileobj, encoding='latin-1'):
+        for closing, tag, value in OFX_TAG.findall(line):
+            if tag == 'STMTTRN':
+                if not closing:
+                    entry = {}
+                elif entry is not None:
+                    yield _ofx_entry_to_row(entry)
+                    entry = None
+            elif entry is not None and not closing:
+                entry[tag] = value.strip()
+
+
+def _ofx_entry_to_row(entry):
+    amount = entry.get('TRNAMT', '')
+    posted = entry.get('DTPOSTED', '')[:8]
+    try:
+        date = datetime.strptime(posted, '%Y%m%d').strftime(DATE_FORMAT)
+    except ValueError:
+        date = posted
+    return {
+        'transaction_type': 'expense' if amount.startswith('-') else 'income',
+        'amount': amount.lstrip('-+'),
+        'category': '',
+        'date': date,
+        'note': entry.get('MEMO') or entry.get('NAME', ''),
+    }
+
+
+def get_row_reader(import_format):
+    if import_format == 'ofx':
+        return iter_ofx_rows
+    return iter_csv_rows
+
+
+class ImportResult:
+    """Outcome of an import run"""
+
+    def __init__(self):
+        self.created = 0
+        self.failed = 0
+        self.errors = []  # (row number, [messages]); only the first MAX_REPORTED_ERRORS are kept
+        self.error = None  # Problem with the file itself that stopped the import (rows before it are kept)
+
+    def add_error(self, row_number, messages):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((row_number, messages))
+
+
+class TransactionImporter:
+    """
+    Stream parsed rows into a budget with bulk inserts. Only one batch is held
+    in memory at a time, and the summaries are rebuilt once at the end instead
+    of once per row, also when the import stops early.
+    """
+
+    def __init__(self, monthly_budget, batch_size=DEFAULT_BATCH_SIZE, default_category=None):
+        self.monthly_budget = monthly_budget
+        self.batch_size = max(1, batch_size)
+        self.default_category = default_category
+        self.categories = {}
+        for category in Category.objects.filter(monthly_budget=monthly_budget):
+            self.categories.setdefault(category.category_name.lower(), category.categoryId)
+            if category.category_type:
+                self.categories.setdefault(category.category_type, category.categoryId)
+
+    def resolve_category(self, name):
+        return self.categories.get((name or '').strip().lower())
+
+    def run(self, rows):
+        result = ImportResult()
+        affected_dates = set()
+        try:
+            self.import_rows(rows, result, affected_dates)
+        except UnicodeDecodeError:
+            result.error = f'The file is not UTF-8 text; import stopped after {result.created} transactions'
+        except csv.Error as exc:
+            result.error = f'The file is not valid CSV ({exc}); import stopped after {result.created} transactions'
+        finally:
+            # Batches are committed one by one, so summaries must follow whatever made it in
+            self.update_summaries(affected_dates)
+        return result
+
+    def import_rows(self, rows, result, affected_dates):
+        batch = []
+        for row_number, row in enumerate(rows, start=1):
+            category_name = row.get('category') or self.default_category
+            category_id = self.resolve_category(category_name)
+            cleaned, errors = clean_transaction_data(
+                row.get('transaction_type'), row.get('amount'), category_id, row.get('date')
+            )
+            if category_name and not category_id:
+                errors.append(f'Unknown category "{category_name}"')
+            if errors:
+                result.add_error(row_number, errors)
+                continue
+
+            batch.append(Transaction(
+                monthly_budget=self.monthly_budget,
+                transaction_type=cleaned['transaction_type'],
+                amount=cleaned['amount'],
+                category_id=cleaned['category_id'],
+                date=cleaned['date'],
+                note=row.get('note') or '',
+            ))
+            affected_dates.add(cleaned['date'])
+
+            if len(batch) >= self.batch_size:
+                result.created += self.flush(batch)
+                batch = []
+
+        if batch:
+            result.created += self.flush(batch)
+
+    def flush(self, batch):
+        with transaction.atomic():
+            Transaction.objects.bulk_create(batch, batch_size=self.batch_size)
+        return len(batch)
+
+    def update_summaries(self, dates):
+        if getattr(settings, 'BUDGETING_DEFER_SUMMARIES', False):
+            # Left to the run_worker command
+            if dates:
+                Job.enqueue_summary_jobs(self.monthly_budget, dates)
+        else:
+            if dates:
+                with transaction.atomic():
+                    # Set-based: one grouped query whatever the number of dates
+                    DailySummary.rebuild_for_budget(self.monthly_budget)
+                    MonthlySummary.update_or_create_for_budget(self.monthly_budget)
+                    CategorySpend.rebuild_for_budget(self.monthly_budget)
+                    Goal.rebuild_for_user(self.monthly_budget.user_id)
+        # bulk_create sends no post_save signals
+        invalidate_budget(self.monthly_budget.pk)
+        invalidate_user(self.monthly_budget.user_id)
+
+
+def import_transactions(monthly_budget, fileobj, import_format='csv', batch_size=DEFAULT_BATCH_SIZE,
+                        default_category=None):
+    """Import a CSV or OFX file into a budget; rows without a category use default_category"""
+    reader = get_row_reader(import_format)
+    importer = TransactionImporter(monthly_budget, batch_size, default_category)
+    return importer.run(reader(fileobj))
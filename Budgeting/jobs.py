@@ -0,0 +1,141 @@
+"""
+Database-backed job queue, no broker needed. Jobs are rows of the Job model;
+run_worker claims due pending jobs with a compare-and-set UPDATE (so several
+worker threads or processes never run the same job twice), runs the handler
+registered for their kind, deletes them on success and retries failures
+with exponential backoff.
+"""
+import logging
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from .cache import invalidate_budget, invalidate_user
+from .models import DailySummary, MonthlySummary, CategorySpend, Goal, Job
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = getattr(settings, 'BUDGETING_JOB_MAX_ATTEMPTS', 5)
+RETRY_DELAY = getattr(settings, 'BUDGETING_JOB_RETRY_DELAY', 2)
+MAX_RETRY_DELAY = getattr(settings, 'BUDGETING_JOB_MAX_RETRY_DELAY', 600)
+STALE_AFTER = getattr(settings, 'BUDGETING_JOB_STALE_AFTER', 300)
+
+HANDLERS = {}
+
+
+def handler(kind):
+    """Register the function that runs jobs of a kind"""
+    def register(func):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+@handler('daily_summary')
+def recompute_daily_summary(job):
+    DailySummary.update_or_create_for_date(job.monthly_budget, job.date)
+
+
+@handler('monthly_summary')
+def recompute_monthly_summary(job):
+    MonthlySummary.update_or_create_for_budget(job.monthly_budget)
+
+
+@handler('category_spend')
+def recompute_category_spend(job):
+    CategorySpend.rebuild_for_budget(job.monthly_budget)
+    # The cached category summary may have been built from the old rollup
+    invalidate_budget(job.monthly_budget_id)
+
+
+@handler('rebuild_summaries')
+def rebuild_budget_summaries(job):
+    DailySummary.rebuild_for_budgets([job.monthly_budget_id])
+    MonthlySummary.rebuild_for_budgets([job.monthly_budget_id])
+    CategorySpend.rebuild_for_budgets([job.monthly_budget_id])
+    invalidate_budget(job.monthly_budget_id)
+
+
+@handler('goal_progress')
+def recompute_goal_progress(job):
+    Goal.rebuild_for_user(job.monthly_budget.user_id)
+    invalidate_user(job.monthly_budget.user_id)
+
+
+def retry_delay(attempts):
+    """Seconds to wait before the next attempt: RETRY_DELAY doubled per failed attempt"""
+    return min(RETRY_DELAY * 2 ** max(0, attempts - 1), MAX_RETRY_DELAY)
+
+
+def requeue_stale(stale_after=STALE_AFTER):
+    """Put back jobs left running by a worker that died; returns how many"""
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=cutoff)
+    count = 0
+    for job in stale:
+        count += _reschedule(job, 'Worker stopped while running the job', timezone.now())
+    return count
+
+
+def claim(worker_id, limit=50):
+    """Mark up to limit due pending jobs as running for this worker and return them"""
+    now = timezone.now()
+    candidates = Job.objects.filter(status=Job.PENDING, run_after__lte=now).order_by('run_after')
+    claimed = []
+    for pk in candidates.values_list('pk', flat=True)[:limit]:
+        # Compare-and-set: only one worker's UPDATE matches a still-pending row
+        if Job.objects.filter(pk=pk, status=Job.PENDING).update(
+            status=Job.RUNNING, locked_by=worker_id, locked_at=now, attempts=F('attempts') + 1, updated_at=now,
+        ):
+            claimed.append(pk)
+    return list(Job.objects.filter(pk__in=claimed).select_related('monthly_budget').order_by('run_after'))
+
+
+def _reschedule(job, error, now):
+    """Retry a failed job later, or give up after MAX_ATTEMPTS; returns 1 if it was updated"""
+    if job.attempts >= MAX_ATTEMPTS:
+        return Job.objects.filter(pk=job.pk).update(status=Job.FAILED, last_error=error, locked_by='', updated_at=now)
+    try:
+        with transaction.atomic():
+            return Job.objects.filter(pk=job.pk).update(
+                status=Job.PENDING,
+                run_after=now + timedelta(seconds=retry_delay(job.attempts)),
+                last_error=error,
+                locked_by='',
+                updated_at=now,
+            )
+    except IntegrityError:
+        # An identical job was queued meanwhile and will do the same work
+        return Job.objects.filter(pk=job.pk).delete()[0]
+
+
+def run_job(job):
+    """Run one claimed job; returns True on success"""
+    func = HANDLERS.get(job.kind)
+    try:
+        if func is None:
+            raise LookupError(f'No handler for job kind "{job.kind}"')
+        with transaction.atomic():
+            func(job)
+            job.delete()
+        return True
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning('Job %s (%s) failed on attempt %s', job.pk, job.kind, job.attempts, exc_info=True)
+        if func is None:
+            job.attempts = MAX_ATTEMPTS
+        _reschedule(job, error, timezone.now())
+        return False
+
+
+def run_pending(worker_id, limit=50):
+    """Claim and run one batch of jobs; returns (succeeded, failed)"""
+    succeeded = failed = 0
+    for job in claim(worker_id, limit):
+        if run_job(job):
+            succeeded += 1
+        else:
+            failed += 1
+    return succeeded, failed
@@ -0,0 +1,38 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from Budgeting.archive import ARCHIVE_AFTER_DAYS, DEFAULT_BATCH_SIZE, run_archive
+
+
+class Command(BaseCommand):
+    help = ('Move the transactions of closed, finalized budget periods older than --older-than-days '
+            'to the archive table, in short batches. Safe to interrupt and rerun.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=ARCHIVE_AFTER_DAYS,
+                            help='Archive budgets whose period ended more than this many days ago')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Transactions moved per database transaction')
+        parser.add_argument('--date', help='Treat this day (YYYY-MM-DD) as today')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be archived')
+
+    def handle(self, *args, **options):
+        today = None
+        if options['date']:
+            try:
+                today = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('--date must be in YYYY-MM-DD format')
+
+        stats = run_archive(
+            today=today,
+            older_than_days=max(0, options['older_than_days']),
+            batch_size=max(1, options['batch_size']),
+            dry_run=options['dry_run'],
+        )
+
+        if options['dry_run']:
+            self.stdout.write(f'{stats["budgets"]} budget(s) with {stats["transactions"]} transaction(s) would be archived')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {stats["transactions"]} transaction(s) of {stats["budgets"]} budget(s)'
+        ))
@@ -0,0 +1,118 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from Budgeting.models import MonthlyBudget, Category, Transaction, DailySummary, MonthlySummary, CategorySpend
+
+User = get_user_model()
+
+NOTES = ['Groceries', 'Uber ride', 'Coffee', 'Rent', 'Electricity bill', 'Cinema', 'Gym', 'Books', 'Salary', 'Refund']
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic users, budgets, categories and transactions for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--budgets-per-user', type=int, default=3)
+        parser.add_argument('--categories-per-budget', type=int, default=6)
+        parser.add_argument('--transactions-per-budget', type=int, default=300)
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk INSERT')
+        parser.add_argument('--users-per-chunk', type=int, default=100,
+                            help='Users generated per database transaction (bounds memory)')
+        parser.add_argument('--password', default='loadtest', help='Password of every generated user')
+        parser.add_argument('--email-prefix', default='loadtest')
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--skip-summaries', action='store_true',
+                            help='Do not build DailySummary/MonthlySummary/CategorySpend rows')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.options = options
+        # Hash once: every user gets the same password
+        self.password = make_password(options['password'])
+        self.today = timezone.now().date()
+
+        offset = User.objects.filter(email__startswith=f"{options['email_prefix']}-").count()
+        total_users = options['users']
+        created = 0
+        while created < total_users:
+            chunk = min(options['users_per_chunk'], total_users - created)
+            with transaction.atomic():
+                self.generate_chunk(offset + created, chunk)
+            created += chunk
+            self.stdout.write(f'{created}/{total_users} users')
+
+        self.stdout.write(self.style.SUCCESS(f'Generated {created} users'))
+
+    def generate_chunk(self, start, count):
+        options = self.options
+        batch_size = options['batch_size']
+
+        users = User.objects.bulk_create([
+            User(
+                email=f"{options['email_prefix']}-{index}@example.com",
+                name=f'Load Test {index}',
+                password=self.password,
+            )
+            for index in range(start, start + count)
+        ], batch_size=batch_size)
+
+        budgets = []
+        for user in users:
+            for number in range(options['budgets_per_user']):
+                # Newest budget first, each 31 days long; only the newest is active
+                start_date = self.today - timedelta(days=31 * number + self.rng.randint(0, 10))
+                budgets.append(MonthlyBudget(
+                    user=user,
+                    start_date=start_date,
+                    end_date=start_date + timedelta(days=30),
+                    total_budget=Decimal(self.rng.randrange(1000, 10000)),
+                    is_active=number == 0,
+                ))
+        budgets = MonthlyBudget.objects.bulk_create(budgets, batch_size=batch_size)
+
+        predefined = Category.PREDEFINED_CATEGORIES
+        categories = []
+        for budget in budgets:
+            for category_type, category_name in predefined[:options['categories_per_budget']]:
+                categories.append(Category(
+                    monthly_budget=budget,
+                    category_name=category_name,
+                    category_type=category_type,
+                    allocated_amount=(budget.total_budget / options['categories_per_budget']).quantize(Decimal('0.01')),
+                ))
+        categories = Category.objects.bulk_create(categories, batch_size=batch_size)
+
+        categories_by_budget = {}
+        for category in categories:
+            categories_by_budget.setdefault(category.monthly_budget_id, []).append(category)
+
+        batch = []
+        for budget in budgets:
+            budget_categories = categories_by_budget.get(budget.budgetId, [])
+            for _ in range(options['transactions_per_budget']):
+                is_income = self.rng.random() < 0.1 or not budget_categories
+                batch.append(Transaction(
+                    monthly_budget=budget,
+                    category=None if is_income else self.rng.choice(budget_categories),
+                    transaction_type='income' if is_income else 'expense',
+                    amount=Decimal(self.rng.randrange(100, 50000)) / 100,
+                    date=budget.start_date + timedelta(days=self.rng.randint(0, 30)),
+                    note=self.rng.choice(NOTES),
+                ))
+                if len(batch) >= batch_size:
+                    Transaction.objects.bulk_create(batch)
+                    batch = []
+        if batch:
+            Transaction.objects.bulk_create(batch)
+
+        if not options['skip_summaries']:
+            for budget in budgets:
+                DailySummary.rebuild_for_budget(budget)
+                MonthlySummary.update_or_create_for_budget(budget)
+                CategorySpend.rebuild_for_budget(budget)
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from Budgeting.importers import DEFAULT_BATCH_SIZE, IMPORT_FORMATS, import_transactions
+from Budgeting.models import MonthlyBudget
+
+
+class Command(BaseCommand):
+    help = 'Stream a CSV or OFX bank export into a budget using batched inserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or OFX file to import')
+        parser.add_argument('--budget', type=int, required=True, help='Target budget id')
+        parser.add_argument('--format', choices=IMPORT_FORMATS,
+                            help='File format (defaults to the file extension)')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Rows per INSERT batch')
+        parser.add_argument('--default-category',
+                            help='Category name or type for rows without one (e.g. OFX expenses)')
+
+    def handle(self, *args, **options):
+        try:
+            budget = MonthlyBudget.objects.get(budgetId=options['budget'])
+        except MonthlyBudget.DoesNotExist:
+            raise CommandError(f'Budget {options["budget"]} does not exist')
+
+        import_format = options['format'] or options['path'].rsplit('.', 1)[-1].lower()
+        if import_format not in IMPORT_FORMATS:
+            raise CommandError('Unsupported file format (use --format csv or --format ofx)')
+
+        with open(options['path'], 'rb') as fileobj:
+            result = import_transactions(
+                budget, fileobj, import_format, options['batch_size'], options['default_category']
+            )
+
+        for row_number, errors in result.errors:
+            self.stderr.write(f'Row {row_number}: {"; ".join(errors)}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.created} transaction(s), {result.failed} row(s) failed'
+        ))
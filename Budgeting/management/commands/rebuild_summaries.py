@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from Budgeting.models import MonthlyBudget, DailySummary, MonthlySummary, CategorySpend, Goal
+
+
+class Command(BaseCommand):
+    help = ('Recompute DailySummary, MonthlySummary, CategorySpend rows and goal progress from scratch to repair drift. '
+            'Archived budgets keep their finalized summaries.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget', type=int, action='append', dest='budgets',
+                            help='Only rebuild this budget id (can be repeated)')
+        parser.add_argument('--user', help='Only rebuild budgets of the user with this email')
+        parser.add_argument('--active-only', action='store_true', help='Only rebuild active budgets')
+
+    def handle(self, *args, **options):
+        # Their transactions are in the archive table: a rebuild would zero the finalized totals
+        budgets = MonthlyBudget.objects.filter(archived_at__isnull=True).order_by('budgetId')
+        if options['budgets']:
+            budgets = budgets.filter(budgetId__in=options['budgets'])
+        if options['user']:
+            budgets = budgets.filter(user__email=options['user'].strip().lower())
+        if options['active_only']:
+            budgets = budgets.filter(is_active=True)
+
+        count = 0
+        users = set()
+        for budget in budgets.iterator(chunk_size=500):
+            DailySummary.rebuild_for_budget(budget)
+            MonthlySummary.update_or_create_for_budget(budget)
+            CategorySpend.rebuild_for_budget(budget)
+            users.add(budget.user_id)
+            count += 1
+
+        goals = sum(Goal.rebuild_for_user(user_id) for user_id in users)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt summaries for {count} budget(s) and progress of {goals} goal(s)'))
@@ -0,0 +1,34 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from Budgeting.rollover import DEFAULT_BATCH_SIZE, run_rollover
+
+
+class Command(BaseCommand):
+    help = ('Start the next period of every active budget that has ended, copying its categories, '
+            'and finalize the old period. Meant to run daily from cron or another scheduler.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Budgets rolled over per transaction')
+        parser.add_argument('--date', help='Treat this day (YYYY-MM-DD) as today')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the budgets that would roll over')
+
+    def handle(self, *args, **options):
+        today = None
+        if options['date']:
+            try:
+                today = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('--date must be in YYYY-MM-DD format')
+
+        stats = run_rollover(today=today, batch_size=max(1, options['batch_size']), dry_run=options['dry_run'])
+
+        if options['dry_run']:
+            self.stdout.write(f'{stats["closed"]} ended budget(s), {stats["created"]} would get a new period')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Closed {stats["closed"]} budget(s), started {stats["created"]} new period(s) '
+            f'with {stats["categories"]} categories'
+        ))
+        if stats['failed']:
+            self.stderr.write(f'{stats["failed"]} budget(s) failed and will be retried on the next run')
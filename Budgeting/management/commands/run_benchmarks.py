@@ -0,0 +1,66 @@
+import json
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from Budgeting.benchmarks import compare_results, run_benchmarks
+
+DEFAULT_BASELINE = Path(__file__).resolve().parents[2] / 'benchmark_baseline.json'
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Measure latency percentiles and query counts of every Budgeting and UserAuth view'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help='Requests per view')
+        parser.add_argument('--transactions', type=int, default=500,
+                            help='Transactions in the benchmark user\'s budget')
+        parser.add_argument('--case', action='append', dest='cases', help='Only run this case (can be repeated)')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE),
+                            help='Baseline results to compare against')
+        parser.add_argument('--no-compare', action='store_true', help='Do not compare against the baseline')
+        parser.add_argument('--tolerance', type=float, default=1.0,
+                            help='Allowed p95 growth over the baseline as a fraction')
+        parser.add_argument('--queries-only', action='store_true', help='Only fail on query count regressions')
+        parser.add_argument('--keep-data', action='store_true',
+                            help='Commit the fixture data and the writes made by the run')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                results = run_benchmarks(options['iterations'], options['transactions'], options['cases'])
+                if not options['keep_data']:
+                    raise Rollback
+        except Rollback:
+            pass
+
+        for name, result in results['cases'].items():
+            if 'error' in result:
+                self.stdout.write(self.style.ERROR(f'{name:32} {result["error"]}'))
+            else:
+                self.stdout.write(
+                    f'{name:32} {result["status"]:>4} {result["queries"]:>4}q '
+                    f'p50 {result["p50_ms"]:>8.2f}ms  p95 {result["p95_ms"]:>8.2f}ms  p99 {result["p99_ms"]:>8.2f}ms'
+                )
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(results, indent=2) + '\n')
+            self.stdout.write(f'Results written to {options["output"]}')
+
+        if options['no_compare']:
+            return
+        baseline_path = Path(options['baseline'])
+        if not baseline_path.exists():
+            self.stdout.write(self.style.WARNING(f'No baseline at {baseline_path}, skipping comparison'))
+            return
+
+        baseline = json.loads(baseline_path.read_text())
+        tolerance = None if options['queries_only'] else options['tolerance']
+        regressions = compare_results(results, baseline, tolerance)
+        if regressions:
+            raise CommandError('Benchmark regressions:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
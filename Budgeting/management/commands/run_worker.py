@@ -0,0 +1,67 @@
+import os
+import socket
+import threading
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from Budgeting.jobs import STALE_AFTER, requeue_stale, run_pending
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (summary recomputation, ...) from the database job queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=getattr(settings, 'BUDGETING_WORKER_THREADS', 1),
+                            help='Worker threads in this process (start several processes to scale further)')
+        parser.add_argument('--batch-size', type=int, default=50, help='Jobs claimed per poll')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--stale-after', type=int, default=STALE_AFTER,
+                            help='Requeue jobs left running longer than this many seconds')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.stop = threading.Event()
+        self.totals = {'succeeded': 0, 'failed': 0}
+        self.lock = threading.Lock()
+
+        requeued = requeue_stale(options['stale_after'])
+        if requeued:
+            self.stdout.write(f'Requeued {requeued} stale job(s)')
+        connection.close()
+
+        prefix = f'{socket.gethostname()}:{os.getpid()}'
+        threads = [
+            threading.Thread(target=self.work, args=(f'{prefix}:{number}',), daemon=True)
+            for number in range(max(1, options['threads']))
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            self.stop.set()
+            for thread in threads:
+                thread.join()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Ran {self.totals["succeeded"]} job(s), {self.totals["failed"]} failed'
+        ))
+
+    def work(self, worker_id):
+        try:
+            while not self.stop.is_set():
+                close_old_connections()
+                succeeded, failed = run_pending(worker_id, self.options['batch_size'])
+                with self.lock:
+                    self.totals['succeeded'] += succeeded
+                    self.totals['failed'] += failed
+                if not succeeded and not failed:
+                    if self.options['once']:
+                        return
+                    self.stop.wait(self.options['poll_interval'])
+        finally:
+            connection.close()
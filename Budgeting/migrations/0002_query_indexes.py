@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Budgeting', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='goal',
+            index=models.Index(condition=models.Q(('is_completed', False)), fields=['user', '-created_at'], name='goal_user_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='monthlybudget',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['user', '-start_date'], name='budget_user_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['monthly_budget', '-date', '-created_at'], name='txn_budget_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['monthly_budget', 'transaction_type', '-date', '-created_at'], name='txn_budget_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['monthly_budget', 'category', '-date', '-created_at'], name='txn_budget_cat_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['category', 'transaction_type'], name='txn_category_type_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def populate_category_spend(apps, schema_editor):
+    Category = apps.get_model('Budgeting', 'Category')
+    CategorySpend = apps.get_model('Budgeting', 'CategorySpend')
+    expenses = Q(transactions__transaction_type='expense')
+    categories = Category.objects.order_by().annotate(
+        spent=Sum('transactions__amount', filter=expenses),
+        count=Count('transactions', filter=expenses),
+    ).values_list('pk', 'monthly_budget_id', 'spent', 'count')
+    CategorySpend.objects.bulk_create([
+        CategorySpend(category_id=pk, monthly_budget_id=budget_id, total_spent=spent or 0, transaction_count=count)
+        for pk, budget_id, spent, count in categories.iterator(chunk_size=2000)
+    ], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Budgeting', '0002_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategorySpend',
+            fields=[
+                ('spendId', models.AutoField(primary_key=True, serialize=False)),
+                ('total_spent', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('transaction_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='spend', to='Budgeting.category')),
+                ('monthly_budget', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='category_spends', to='Budgeting.monthlybudget')),
+            ],
+            options={
+                'db_table': 'category_spends',
+            },
+        ),
+        migrations.RunPython(populate_category_spend, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Budgeting', '0004_job_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='monthlysummary',
+            name='finalized_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='monthlysummary',
+            name='is_finalized',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:01
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def populate_progress_percentage(apps, schema_editor):
+    Goal = apps.get_model('Budgeting', 'Goal')
+    goals = []
+    for goal in Goal.objects.filter(target_amount__gt=0).iterator(chunk_size=2000):
+        percentage = (goal.current_progress / goal.target_amount * 100).quantize(Decimal('0.01'))
+        goal.progress_percentage = min(percentage, Decimal('99999.99'))
+        goals.append(goal)
+    Goal.objects.bulk_update(goals, ['progress_percentage'], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Budgeting', '0005_monthly_summary_finalized'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='goal',
+            name='category_type',
+            field=models.CharField(blank=True, choices=[('food', 'Food & Dining'), ('transport', 'Transportation'), ('shopping', 'Shopping'), ('utilities', 'Utilities'), ('entertainment', 'Entertainment'), ('health', 'Health & Fitness'), ('education', 'Education'), ('savings', 'Savings'), ('other', 'Other')], max_length=50, null=True),
+        ),
+        migrations.AddField(
+            model_name='goal',
+            name='progress_percentage',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=7),
+        ),
+        migrations.AddField(
+            model_name='goal',
+            name='projected_completion_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='goal',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transactions', to='Budgeting.goal'),
+        ),
+        migrations.RunPython(populate_progress_percentage, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,86 @@
+from django.db import migrations
+
+# Kept in step with Budgeting/search.py
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE transactions_fts USING fts5(note, owner, tokenize = 'unicode61 remove_diacritics 2')",
+    """
+    CREATE TRIGGER transactions_fts_insert AFTER INSERT ON transactions
+    WHEN NEW.note IS NOT NULL AND NEW.note != ''
+    BEGIN
+        INSERT INTO transactions_fts (rowid, note, owner)
+        SELECT NEW."transactionId", NEW.note, 'u' || user_id FROM monthly_budgets WHERE "budgetId" = NEW.monthly_budget_id;
+    END
+    """,
+    """
+    CREATE TRIGGER transactions_fts_delete AFTER DELETE ON transactions
+    BEGIN
+        DELETE FROM transactions_fts WHERE rowid = OLD."transactionId";
+    END
+    """,
+    """
+    CREATE TRIGGER transactions_fts_update AFTER UPDATE OF note, monthly_budget_id ON transactions
+    BEGIN
+        DELETE FROM transactions_fts WHERE rowid = OLD."transactionId";
+        INSERT INTO transactions_fts (rowid, note, owner)
+        SELECT NEW."transactionId", NEW.note, 'u' || user_id FROM monthly_budgets
+        WHERE "budgetId" = NEW.monthly_budget_id AND NEW.note IS NOT NULL AND NEW.note != '';
+    END
+    """,
+    """
+    INSERT INTO transactions_fts (rowid, note, owner)
+    SELECT t."transactionId", t.note, 'u' || b.user_id
+    FROM transactions t JOIN monthly_budgets b ON b."budgetId" = t.monthly_budget_id
+    WHERE t.note IS NOT NULL AND t.note != ''
+    """,
+]
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS transactions_fts_insert',
+    'DROP TRIGGER IF EXISTS transactions_fts_delete',
+    'DROP TRIGGER IF EXISTS transactions_fts_update',
+    'DROP TABLE IF EXISTS transactions_fts',
+]
+
+POSTGRESQL_FORWARD = [
+    "CREATE INDEX txn_note_search_idx ON transactions USING GIN (to_tsvector('simple', coalesce(note, '')))",
+]
+POSTGRESQL_BACKWARD = [
+    'DROP INDEX IF EXISTS txn_note_search_idx',
+]
+
+
+def _sqlite_has_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return any(row[0] == 'ENABLE_FTS5' for row in cursor.fetchall())
+
+
+def _run(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite' and _sqlite_has_fts5(connection):
+        _run(schema_editor, SQLITE_FORWARD)
+    elif connection.vendor == 'postgresql':
+        _run(schema_editor, POSTGRESQL_FORWARD)
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        _run(schema_editor, SQLITE_BACKWARD)
+    elif connection.vendor == 'postgresql':
+        _run(schema_editor, POSTGRESQL_BACKWARD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Budgeting', '0006_goal_progress'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
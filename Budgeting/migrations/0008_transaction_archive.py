@@ -0,0 +1,96 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Archived notes stay searchable: same FTS5 table / GIN expression as migration 0007
+SQLITE_FORWARD = [
+    """
+    CREATE TRIGGER archived_transactions_fts_insert AFTER INSERT ON archived_transactions
+    WHEN NEW.note IS NOT NULL AND NEW.note != ''
+    BEGIN
+        INSERT INTO transactions_fts (rowid, note, owner)
+        SELECT NEW."transactionId", NEW.note, 'u' || user_id FROM monthly_budgets WHERE "budgetId" = NEW.monthly_budget_id;
+    END
+    """,
+    """
+    CREATE TRIGGER archived_transactions_fts_delete AFTER DELETE ON archived_transactions
+    BEGIN
+        DELETE FROM transactions_fts WHERE rowid = OLD."transactionId";
+    END
+    """,
+]
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS archived_transactions_fts_insert',
+    'DROP TRIGGER IF EXISTS archived_transactions_fts_delete',
+]
+
+POSTGRESQL_FORWARD = [
+    "CREATE INDEX archived_txn_note_search_idx ON archived_transactions USING GIN (to_tsvector('simple', coalesce(note, '')))",
+]
+POSTGRESQL_BACKWARD = [
+    'DROP INDEX IF EXISTS archived_txn_note_search_idx',
+]
+
+
+def _has_fts_table(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transactions_fts'")
+        return cursor.fetchone() is not None
+
+
+def _run(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite' and _has_fts_table(connection):
+        _run(schema_editor, SQLITE_FORWARD)
+    elif connection.vendor == 'postgresql':
+        _run(schema_editor, POSTGRESQL_FORWARD)
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        _run(schema_editor, SQLITE_BACKWARD)
+    elif connection.vendor == 'postgresql':
+        _run(schema_editor, POSTGRESQL_BACKWARD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Budgeting', '0007_transaction_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='monthlybudget',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='ArchivedTransaction',
+            fields=[
+                ('transactionId', models.IntegerField(primary_key=True, serialize=False)),
+                ('transaction_type', models.CharField(choices=[('income', 'Income'), ('expense', 'Expense')], max_length=10)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('date', models.DateField()),
+                ('note', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('category', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='archived_transactions', to='Budgeting.category')),
+                ('goal', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='archived_transactions', to='Budgeting.goal')),
+                ('monthly_budget', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_transactions', to='Budgeting.monthlybudget')),
+            ],
+            options={
+                'db_table': 'archived_transactions',
+                'ordering': ['-date', '-created_at'],
+                'indexes': [models.Index(fields=['monthly_budget', 'date'], name='archived_txn_budget_date_idx')],
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,103 @@
+from importlib import import_module
+import Budgeting.fields
+from django.db import migrations, models
+from django.db.models import ExpressionWrapper, F, Value
+from django.db.models.functions import Round
+
+# (model, field, default) of every money column; all of them move from DECIMAL(12, 2) to integer cents
+MONEY_FIELDS = [
+    ('monthlybudget', 'total_budget', None),
+    ('category', 'allocated_amount', None),
+    ('transaction', 'amount', None),
+    ('archivedtransaction', 'amount', None),
+    ('dailysummary', 'total_income', 0),
+    ('dailysummary', 'total_expense', 0),
+    ('dailysummary', 'net_amount', 0),
+    ('monthlysummary', 'total_income', 0),
+    ('monthlysummary', 'total_expense', 0),
+    ('monthlysummary', 'remaining_balance', 0),
+    ('categoryspend', 'total_spent', 0),
+    ('goal', 'target_amount', None),
+    ('goal', 'current_progress', 0),
+]
+
+
+def _alter(field_class, **kwargs):
+    return [
+        migrations.AlterField(
+            model_name=model_name,
+            name=name,
+            field=field_class(**kwargs, **({'default': default} if default is not None else {})),
+        )
+        for model_name, name, default in MONEY_FIELDS
+    ]
+
+
+def _fields_by_model():
+    fields = {}
+    for model_name, name, default in MONEY_FIELDS:
+        fields.setdefault(model_name, []).append(name)
+    return fields
+
+
+def to_cents(apps, schema_editor):
+    # ROUND: SQLite holds the decimals as REAL, and 10.07 * 100 is not a whole number there
+    for model_name, names in _fields_by_model().items():
+        apps.get_model('Budgeting', model_name).objects.update(**{name: Round(F(name) * 100) for name in names})
+
+
+def from_cents(apps, schema_editor):
+    # Divide by a float so SQLite does not do an integer division
+    money = models.DecimalField(max_digits=18, decimal_places=2)
+    for model_name, names in _fields_by_model().items():
+        apps.get_model('Budgeting', model_name).objects.update(**{
+            name: ExpressionWrapper(F(name) / Value(100.0), output_field=money) for name in names
+        })
+
+
+SEARCH_TRIGGER_MIGRATIONS = ('0007_transaction_search', '0008_transaction_archive')
+
+
+def _search_triggers(connection):
+    """CREATE TRIGGER statements of the full-text search triggers, when the database has the FTS table"""
+    if connection.vendor != 'sqlite':
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transactions_fts'")
+        if cursor.fetchone() is None:
+            return []
+    return [
+        statement
+        for name in SEARCH_TRIGGER_MIGRATIONS
+        for statement in import_module(f'Budgeting.migrations.{name}').SQLITE_FORWARD
+        if 'CREATE TRIGGER' in statement
+    ]
+
+
+def drop_search_triggers(apps, schema_editor):
+    # SQLite rebuilds a table to change a column's type: the triggers on it would be lost, and
+    # renaming the rebuilt monthly_budgets fails while triggers refer to it
+    for statement in _search_triggers(schema_editor.connection):
+        name = statement.split('CREATE TRIGGER', 1)[1].split()[0]
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+
+def create_search_triggers(apps, schema_editor):
+    for statement in _search_triggers(schema_editor.connection):
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Budgeting', '0008_transaction_archive'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_search_triggers, create_search_triggers),
+        # Wide enough for the amounts times 100 on engines that enforce the precision
+        *_alter(models.DecimalField, max_digits=18, decimal_places=2),
+        migrations.RunPython(to_cents, from_cents),
+        *_alter(Budgeting.fields.MoneyField),
+        migrations.RunPython(create_search_triggers, drop_search_triggers),
+    ]
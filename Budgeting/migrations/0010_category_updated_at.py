@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:28
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_created_at(apps, schema_editor):
+    # Existing categories were last changed no later than they were created, as far as anyone knows
+    apps.get_model('Budgeting', 'Category').objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Budgeting', '0009_money_cents'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+from decimal import Decimal
+from django.db import migrations
+
+# MAX_SAVINGS_RATE at the time of this migration
+MAX_SAVINGS_RATE = Decimal('999.99')
+
+
+def clamp_savings_rate(apps, schema_editor):
+    # Overspent budgets used to get rates like -1000.00, which the DECIMAL(5, 2) column cannot read back
+    summaries = apps.get_model('Budgeting', 'MonthlySummary').objects
+    summaries.filter(savings_rate__gt=MAX_SAVINGS_RATE).update(savings_rate=MAX_SAVINGS_RATE)
+    summaries.filter(savings_rate__lt=-MAX_SAVINGS_RATE).update(savings_rate=-MAX_SAVINGS_RATE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Budgeting', '0010_category_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(clamp_savings_rate, migrations.RunPython.noop),
+    ]
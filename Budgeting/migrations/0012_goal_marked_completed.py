@@ -0,0 +1,25 @@
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_hand_completed(apps, schema_editor):
+    # A goal completes on its own only by reaching its target: completed ones short of it were marked by hand
+    apps.get_model('Budgeting', 'Goal').objects.filter(
+        is_completed=True, current_progress__lt=F('target_amount'),
+    ).update(marked_completed=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Budgeting', '0011_clamp_savings_rate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='goal',
+            name='marked_completed',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_hand_completed, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,18 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest, Least, TruncDate
 from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
+from decimal import Decimal, ROUND_CEILING
+from .aggregation import CENT, ZERO, budget_totals_annotations, get_budget_totals, get_categories_summary, money_sum, money_value, to_money
+from .fields import MoneyField
+
+# Goal projections further out than this are reported as unknown
+MAX_PROJECTION_DAYS = 365 * 100
+MAX_PERCENTAGE = Decimal('99999.99')
+# Range of MonthlySummary.savings_rate (DECIMAL(5, 2)); overspending a budget 10 times over would not fit
+MAX_SAVINGS_RATE = Decimal('999.99')
 
 class MonthlyBudget(models.Model):
     """Monthly budget with start and end dates"""
@@ -9,15 +20,21 @@ class MonthlyBudget(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='budgets')
     start_date = models.DateField()
     end_date = models.DateField()
-    total_budget = models.DecimalField(max_digits=12, decimal_places=2)
+    total_budget = MoneyField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+    # Set once its transactions start moving to ArchivedTransaction; its summaries are final from then on
+    archived_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
         db_table = 'monthly_budgets'
         ordering = ['-start_date']
         unique_together = ['user', 'start_date']
+        indexes = [
+            # Active budget lookup done on nearly every request: filter(user, is_active=True).first()
+            models.Index(fields=['user', '-start_date'], condition=models.Q(is_active=True), name='budget_user_active_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.name} - {self.start_date} to {self.end_date} - {self.total_budget}"
@@ -30,32 +47,23 @@ class MonthlyBudget(models.Model):
     
     def get_total_spent(self):
         """Calculate total expenses for this budget period"""
-        transactions = self.transactions.filter(transaction_type='expense')
-        return sum(t.amount for t in transactions)
+        return get_budget_totals(self)['total_spent']
     
     def get_total_income(self):
         """Calculate total income for this budget period"""
-        transactions = self.transactions.filter(transaction_type='income')
-        return sum(t.amount for t in transactions)
+        return get_budget_totals(self)['total_income']
     
     def get_remaining_balance(self):
         """Calculate remaining balance"""
-        return self.total_budget - self.get_total_spent()
+        return get_budget_totals(self)['remaining_balance']
+    
+    def get_totals(self):
+        """Income, expense and remaining balance in one query"""
+        return get_budget_totals(self)
     
     def get_categories_summary(self):
         """Get spending summary by category"""
-        categories = self.categories.all()
-        summary = []
-        for category in categories:
-            spent = category.get_spent()
-            summary.append({
-                'category': category,
-                'allocated': category.allocated_amount,
-                'spent': spent,
-                'remaining': category.allocated_amount - spent,
-                'percentage': (spent / category.allocated_amount * 100) if category.allocated_amount > 0 else 0
-            })
-        return summary
+        return get_categories_summary(self)
 
 
 class Category(models.Model):
@@ -76,10 +84,11 @@ class Category(models.Model):
     monthly_budget = models.ForeignKey(MonthlyBudget, on_delete=models.CASCADE, related_name='categories')
     category_name = models.CharField(max_length=100)
     category_type = models.CharField(max_length=50, choices=PREDEFINED_CATEGORIES, blank=True, null=True)
-    allocated_amount = models.DecimalField(max_digits=12, decimal_places=2)
+    allocated_amount = MoneyField()
     is_custom = models.BooleanField(default=False)
     color = models.CharField(max_length=7, default='#3B82F6')  # Hex color code
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'categories'
@@ -89,9 +98,11 @@ class Category(models.Model):
         return f"{self.category_name} - {self.allocated_amount}"
     
     def get_spent(self):
-        """Calculate total spent in this category"""
-        transactions = self.transactions.filter(transaction_type='expense')
-        return sum(t.amount for t in transactions)
+        """Total spent in this category, read from its CategorySpend rollup"""
+        try:
+            return self.spend.total_spent
+        except CategorySpend.DoesNotExist:
+            return ZERO
     
     def get_remaining(self):
         """Calculate remaining amount in this category"""
@@ -108,8 +119,10 @@ class Transaction(models.Model):
     transactionId = models.AutoField(primary_key=True)
     monthly_budget = models.ForeignKey(MonthlyBudget, on_delete=models.CASCADE, related_name='transactions')
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='transactions')
+    # Counts towards this goal only, instead of the goals tracking its category type
+    goal = models.ForeignKey('Goal', on_delete=models.SET_NULL, null=True, blank=True, related_name='transactions')
     transaction_type = models.CharField(max_length=10, choices=TRANSACTION_TYPES)
-    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    amount = MoneyField()
     date = models.DateField(default=timezone.now)
     note = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -118,9 +131,75 @@ class Transaction(models.Model):
     class Meta:
         db_table = 'transactions'
         ordering = ['-date', '-created_at']
+        indexes = [
+            # Transactions list / recent transactions ordering, daily summaries by (budget, date)
+            models.Index(fields=['monthly_budget', '-date', '-created_at'], name='txn_budget_date_idx'),
+            # Transactions list filtered by type
+            models.Index(fields=['monthly_budget', 'transaction_type', '-date', '-created_at'], name='txn_budget_type_date_idx'),
+            # Transactions list filtered by category
+            models.Index(fields=['monthly_budget', 'category', '-date', '-created_at'], name='txn_budget_cat_date_idx'),
+            # Per-category spent
+            models.Index(fields=['category', 'transaction_type'], name='txn_category_type_idx'),
+        ]
     
     def __str__(self):
         return f"{self.transaction_type} - {self.amount} - {self.date}"
+    
+    def apply_to_summaries(self, sign=1):
+        """Add (sign=1) or remove (sign=-1) this transaction's amount from its daily and monthly summaries"""
+        if getattr(settings, 'BUDGETING_DEFER_SUMMARIES', False):
+            # Recomputed by the run_worker command; the jobs commit together with the transaction write
+            Job.enqueue_summary_jobs(
+                self.monthly_budget, [self.date], category_spend=bool(self.category_id),
+                goals=bool(self.goal_id or self.category_id),
+            )
+            return
+        amount = self.amount * sign
+        income = amount if self.transaction_type == 'income' else ZERO
+        expense = amount if self.transaction_type == 'expense' else ZERO
+        with transaction.atomic():
+            DailySummary.apply_delta(self.monthly_budget, self.date, income, expense)
+            MonthlySummary.apply_delta(self.monthly_budget, income, expense)
+            if self.category_id and self.transaction_type == 'expense':
+                CategorySpend.apply_delta(self.category_id, self.monthly_budget, expense, sign)
+            if self.goal_id or self.category_id:
+                Goal.apply_transaction(self, sign)
+
+
+class ArchivedTransaction(models.Model):
+    """
+    Read-only transactions of closed budget periods, moved out of the hot
+    transactions table by the archive_transactions command. Ids are kept.
+    """
+    transactionId = models.IntegerField(primary_key=True)
+    monthly_budget = models.ForeignKey(MonthlyBudget, on_delete=models.CASCADE, db_index=False, related_name='archived_transactions')
+    # No constraints: deleting a category or goal never has to touch the archive
+    category = models.ForeignKey(Category, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False,
+                                 null=True, blank=True, related_name='archived_transactions')
+    goal = models.ForeignKey('Goal', on_delete=models.DO_NOTHING, db_constraint=False,
+                             null=True, blank=True, related_name='archived_transactions')
+    transaction_type = models.CharField(max_length=10, choices=Transaction.TRANSACTION_TYPES)
+    amount = MoneyField()
+    date = models.DateField()
+    note = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'archived_transactions'
+        ordering = ['-date', '-created_at']
+        indexes = [
+            # The only index: history and exports read a budget's archive by date
+            models.Index(fields=['monthly_budget', 'date'], name='archived_txn_budget_date_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.transaction_type} - {self.amount} - {self.date} (archived)"
+
+
+def live_budget_ids(budget_ids):
+    """Subquery of the budgets among budget_ids whose transactions have not been archived"""
+    return MonthlyBudget.objects.filter(pk__in=budget_ids, archived_at__isnull=True).values('pk')
 
 
 class DailySummary(models.Model):
@@ -128,9 +207,9 @@ class DailySummary(models.Model):
     summaryId = models.AutoField(primary_key=True)
     monthly_budget = models.ForeignKey(MonthlyBudget, on_delete=models.CASCADE, related_name='daily_summaries')
     date = models.DateField()
-    total_income = models.DecimalField(max_digits=12, decimal_places=2, default=0)
-    total_expense = models.DecimalField(max_digits=12, decimal_places=2, default=0)
-    net_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)  # income - expense
+    total_income = MoneyField(default=0)
+    total_expense = MoneyField(default=0)
+    net_amount = MoneyField(default=0)  # income - expense
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -144,18 +223,16 @@ class DailySummary(models.Model):
     
     @staticmethod
     def update_or_create_for_date(monthly_budget, date):
-        """Update or create daily summary for a specific date"""
-        transactions = Transaction.objects.filter(
+        """Update or create daily summary for a specific date; archived budgets keep theirs as they are"""
+        if monthly_budget.archived_at:
+            return DailySummary.objects.filter(monthly_budget=monthly_budget, date=date).first()
+        totals = Transaction.objects.filter(
             monthly_budget=monthly_budget,
             date=date
-        )
+        ).aggregate(**budget_totals_annotations(prefix=''))
         
-        total_income = sum(
-            t.amount for t in transactions.filter(transaction_type='income')
-        )
-        total_expense = sum(
-            t.amount for t in transactions.filter(transaction_type='expense')
-        )
+        total_income = to_money(totals['total_income'])
+        total_expense = to_money(totals['total_spent'])
         net_amount = total_income - total_expense
         
         summary, created = DailySummary.objects.update_or_create(
@@ -168,16 +245,55 @@ class DailySummary(models.Model):
             }
         )
         return summary
+    
+    @staticmethod
+    def apply_delta(monthly_budget, date, income=ZERO, expense=ZERO):
+        """Atomically add income/expense deltas to the summary row of a date"""
+        summary, created = DailySummary.objects.get_or_create(monthly_budget=monthly_budget, date=date)
+        DailySummary.objects.filter(pk=summary.pk).update(
+            total_income=F('total_income') + money_value(income),
+            total_expense=F('total_expense') + money_value(expense),
+            net_amount=F('net_amount') + money_value(income - expense),
+            updated_at=timezone.now(),
+        )
+    
+    @staticmethod
+    def rebuild_for_budget(monthly_budget):
+        """Recompute every daily summary of a budget from its transactions"""
+        DailySummary.rebuild_for_budgets([monthly_budget.pk])
+    
+    @staticmethod
+    def rebuild_for_budgets(budget_ids):
+        """Recompute the daily summaries of many budgets with one grouped query; archived budgets are skipped"""
+        budget_ids = live_budget_ids(budget_ids)
+        days = Transaction.objects.filter(monthly_budget_id__in=budget_ids).order_by().values(
+            'monthly_budget_id', 'date'
+        ).annotate(**budget_totals_annotations(prefix=''))
+        with transaction.atomic():
+            DailySummary.objects.filter(monthly_budget_id__in=budget_ids).delete()
+            DailySummary.objects.bulk_create([
+                DailySummary(
+                    monthly_budget_id=day['monthly_budget_id'],
+                    date=day['date'],
+                    total_income=to_money(day['total_income']),
+                    total_expense=to_money(day['total_spent']),
+                    net_amount=to_money(day['total_income']) - to_money(day['total_spent']),
+                )
+                for day in days
+            ], batch_size=1000)
 
 
 class MonthlySummary(models.Model):
     """Summary of entire budget period"""
     summaryId = models.AutoField(primary_key=True)
     monthly_budget = models.OneToOneField(MonthlyBudget, on_delete=models.CASCADE, related_name='summary')
-    total_income = models.DecimalField(max_digits=12, decimal_places=2, default=0)
-    total_expense = models.DecimalField(max_digits=12, decimal_places=2, default=0)
-    remaining_balance = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_income = MoneyField(default=0)
+    total_expense = MoneyField(default=0)
+    remaining_balance = MoneyField(default=0)
     savings_rate = models.DecimalField(max_digits=5, decimal_places=2, default=0)  # Percentage
+    # Set by the rollover once the budget period has ended and its totals were recomputed
+    is_finalized = models.BooleanField(default=False)
+    finalized_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -187,18 +303,37 @@ class MonthlySummary(models.Model):
     def __str__(self):
         return f"Summary for {self.monthly_budget}"
     
+    @staticmethod
+    def get_savings_rate(total_budget, total_expense):
+        """
+        Share of the budget left unspent, as a percentage clamped to the
+        column's range; total_expense may be a database expression (in cents)
+        """
+        if total_budget <= 0:
+            return 0
+        if hasattr(total_expense, 'resolve_expression'):
+            # A ratio of cents; the float factor keeps the division from being an integer one
+            budget = money_value(total_budget)
+            rate = (budget - total_expense) * models.Value(100.0) / budget
+            output_field = MonthlySummary._meta.get_field('savings_rate')
+            # Float bounds: SQLite would compare a Decimal parameter as text
+            return Greatest(
+                Least(rate, models.Value(float(MAX_SAVINGS_RATE)), output_field=output_field),
+                models.Value(float(-MAX_SAVINGS_RATE)),
+                output_field=output_field,
+            )
+        rate = ((total_budget - total_expense) / total_budget) * 100
+        return max(-MAX_SAVINGS_RATE, min(rate, MAX_SAVINGS_RATE)).quantize(CENT)
+    
     @staticmethod
     def update_or_create_for_budget(monthly_budget):
-        """Update or create monthly summary for a budget"""
-        total_income = monthly_budget.get_total_income()
-        total_expense = monthly_budget.get_total_spent()
-        remaining_balance = monthly_budget.get_remaining_balance()
-        
-        # Calculate savings rate
-        if monthly_budget.total_budget > 0:
-            savings_rate = ((monthly_budget.total_budget - total_expense) / monthly_budget.total_budget) * 100
-        else:
-            savings_rate = 0
+        """Update or create monthly summary for a budget; archived budgets keep theirs as they are"""
+        if monthly_budget.archived_at:
+            return MonthlySummary.objects.filter(monthly_budget=monthly_budget).first()
+        totals = monthly_budget.get_totals()
+        total_income = totals['total_income']
+        total_expense = totals['total_spent']
+        remaining_balance = totals['remaining_balance']
         
         summary, created = MonthlySummary.objects.update_or_create(
             monthly_budget=monthly_budget,
@@ -206,10 +341,117 @@ class MonthlySummary(models.Model):
                 'total_income': total_income,
                 'total_expense': total_expense,
                 'remaining_balance': remaining_balance,
-                'savings_rate': savings_rate,
+                'savings_rate': MonthlySummary.get_savings_rate(monthly_budget.total_budget, total_expense),
             }
         )
         return summary
+    
+    @staticmethod
+    def rebuild_for_budgets(budget_ids, finalize=False):
+        """
+        Recompute the monthly summaries of many budgets from their transactions
+        with one grouped query; finalize=True also marks them final. Archived
+        budgets are skipped.
+        """
+        now = timezone.now()
+        totals = MonthlyBudget.objects.filter(pk__in=budget_ids, archived_at__isnull=True).annotate(**budget_totals_annotations()).values(
+            'pk', 'total_budget', 'total_income', 'total_spent'
+        )
+        existing = {summary.monthly_budget_id: summary for summary in MonthlySummary.objects.filter(monthly_budget_id__in=budget_ids)}
+        fields = ['total_income', 'total_expense', 'remaining_balance', 'savings_rate', 'updated_at']
+        if finalize:
+            fields += ['is_finalized', 'finalized_at']
+        created, updated = [], []
+        for row in totals:
+            total_expense = to_money(row['total_spent'])
+            summary = existing.get(row['pk']) or MonthlySummary(monthly_budget_id=row['pk'])
+            summary.total_income = to_money(row['total_income'])
+            summary.total_expense = total_expense
+            summary.remaining_balance = row['total_budget'] - total_expense
+            summary.savings_rate = MonthlySummary.get_savings_rate(row['total_budget'], total_expense)
+            summary.updated_at = now
+            if finalize:
+                summary.is_finalized = True
+                summary.finalized_at = now
+            (updated if summary.pk else created).append(summary)
+        MonthlySummary.objects.bulk_create(created, batch_size=1000)
+        MonthlySummary.objects.bulk_update(updated, fields, batch_size=1000)
+    
+    @staticmethod
+    def apply_delta(monthly_budget, income=ZERO, expense=ZERO):
+        """Atomically add income/expense deltas to the summary of a budget"""
+        total_budget = monthly_budget.total_budget
+        summary, created = MonthlySummary.objects.get_or_create(
+            monthly_budget=monthly_budget,
+            defaults={
+                'remaining_balance': total_budget,
+                'savings_rate': 100 if total_budget > 0 else 0,
+            }
+        )
+        updates = {
+            'total_income': F('total_income') + money_value(income),
+            'total_expense': F('total_expense') + money_value(expense),
+            'remaining_balance': F('remaining_balance') - money_value(expense),
+            'updated_at': timezone.now(),
+        }
+        if total_budget > 0:
+            updates['savings_rate'] = MonthlySummary.get_savings_rate(total_budget, F('total_expense') + money_value(expense))
+        MonthlySummary.objects.filter(pk=summary.pk).update(**updates)
+
+
+class CategorySpend(models.Model):
+    """Running expense total of a category, kept in step with transaction writes"""
+    spendId = models.AutoField(primary_key=True)
+    category = models.OneToOneField(Category, on_delete=models.CASCADE, related_name='spend')
+    monthly_budget = models.ForeignKey(MonthlyBudget, on_delete=models.CASCADE, related_name='category_spends')
+    total_spent = MoneyField(default=0)
+    transaction_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'category_spends'
+    
+    def __str__(self):
+        return f"{self.category_id} - Spent: {self.total_spent}"
+    
+    @staticmethod
+    def apply_delta(category_id, monthly_budget, amount=ZERO, count=0):
+        """Atomically add an expense amount and transaction count delta to a category's rollup"""
+        rollup = CategorySpend.objects.filter(category_id=category_id)
+        updates = {
+            'total_spent': F('total_spent') + money_value(amount),
+            'transaction_count': F('transaction_count') + count,
+            'updated_at': timezone.now(),
+        }
+        # The row exists for every category that has had an expense, so this is usually one UPDATE
+        if not rollup.update(**updates):
+            CategorySpend.objects.get_or_create(category_id=category_id, defaults={'monthly_budget': monthly_budget})
+            rollup.update(**updates)
+    
+    @staticmethod
+    def rebuild_for_budget(monthly_budget):
+        """Recompute the rollup of every category of a budget from its transactions"""
+        CategorySpend.rebuild_for_budgets([monthly_budget.pk])
+    
+    @staticmethod
+    def rebuild_for_budgets(budget_ids):
+        """Recompute the category rollups of many budgets with one grouped query; archived budgets are skipped"""
+        budget_ids = live_budget_ids(budget_ids)
+        categories = Category.objects.filter(monthly_budget_id__in=budget_ids).order_by().annotate(
+            spent=money_sum('transactions__amount', transactions__transaction_type='expense'),
+            count=models.Count('transactions', filter=models.Q(transactions__transaction_type='expense')),
+        ).values_list('pk', 'monthly_budget_id', 'spent', 'count')
+        with transaction.atomic():
+            CategorySpend.objects.filter(monthly_budget_id__in=budget_ids).delete()
+            CategorySpend.objects.bulk_create([
+                CategorySpend(
+                    category_id=category_id,
+                    monthly_budget_id=budget_id,
+                    total_spent=to_money(spent),
+                    transaction_count=count,
+                )
+                for category_id, budget_id, spent, count in categories
+            ], batch_size=1000)
 
 
 class Goal(models.Model):
@@ -217,25 +459,39 @@ class Goal(models.Model):
     goalId = models.AutoField(primary_key=True)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='goals')
     title = models.CharField(max_length=200)
-    target_amount = models.DecimalField(max_digits=12, decimal_places=2)
-    current_progress = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    target_amount = MoneyField()
+    current_progress = MoneyField(default=0)
     target_date = models.DateField()
+    # Expenses in categories of this type (e.g. savings) dated from the goal's creation on count as progress
+    category_type = models.CharField(max_length=50, choices=Category.PREDEFINED_CATEGORIES, blank=True, null=True)
+    # Kept in step with current_progress so pages read them instead of computing them per goal
+    progress_percentage = models.DecimalField(max_digits=7, decimal_places=2, default=0)
+    projected_completion_date = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_completed = models.BooleanField(default=False)
+    # Marked done by the user; keeps is_completed set whatever the progress, unlike reaching the target
+    marked_completed = models.BooleanField(default=False)
     
     class Meta:
         db_table = 'goals'
         ordering = ['-created_at']
+        indexes = [
+            # Open goals shown on the dashboard
+            models.Index(fields=['user', '-created_at'], condition=models.Q(is_completed=False), name='goal_user_open_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.current_progress}/{self.target_amount}"
     
+    def save(self, *args, **kwargs):
+        # Progress may have been edited by hand (or the target changed)
+        self.set_derived_fields(self.current_progress)
+        super().save(*args, **kwargs)
+    
     def get_progress_percentage(self):
-        """Calculate progress percentage"""
-        if self.target_amount > 0:
-            return (self.current_progress / self.target_amount) * 100
-        return 0
+        """Progress percentage, precomputed whenever the progress changes"""
+        return self.progress_percentage
     
     def get_remaining_amount(self):
         """Calculate remaining amount to reach goal"""
@@ -246,4 +502,177 @@ class Goal(models.Model):
         today = timezone.now().date()
         if self.target_date > today:
             return (self.target_date - today).days
-        return 0
\ No newline at end of file
+        return 0
+    
+    def get_derived_fields(self, progress, today=None):
+        """Percentage, completion and projected completion date for a progress amount"""
+        today = today or timezone.localdate()
+        # Amounts assigned in code may still be ints or strings until the goal is reloaded
+        progress = Decimal(str(progress))
+        target_amount = Decimal(str(self.target_amount))
+        percentage = (progress / target_amount * 100).quantize(CENT) if target_amount > 0 else ZERO
+        completed = progress >= target_amount
+        projected = None
+        if completed:
+            projected = today
+        elif progress > 0:
+            # Extrapolate the average daily progress since the goal was created
+            started = timezone.localdate(self.created_at) if self.created_at else today
+            per_day = progress / max(1, (today - started).days)
+            days = ((target_amount - progress) / per_day).to_integral_value(ROUND_CEILING)
+            if days <= MAX_PROJECTION_DAYS:
+                projected = today + timedelta(days=int(days))
+        return {
+            'progress_percentage': min(percentage, MAX_PERCENTAGE),
+            # A goal that completed by reaching its target reopens when its progress drops below it
+            'is_completed': completed or self.marked_completed,
+            'projected_completion_date': projected,
+        }
+    
+    def set_derived_fields(self, progress, today=None):
+        for field, value in self.get_derived_fields(progress, today).items():
+            setattr(self, field, value)
+    
+    @staticmethod
+    def for_transaction(txn):
+        """Goals a transaction counts towards: the goal it is tagged with, else the goals tracking its category type"""
+        if txn.goal_id:
+            return Goal.objects.filter(pk=txn.goal_id)
+        if txn.category_id and txn.transaction_type == 'expense':
+            return Goal.objects.filter(
+                user_id=txn.monthly_budget.user_id,
+                category_type=Category.objects.filter(pk=txn.category_id).values('category_type')[:1],
+                created_at__date__lte=txn.date,
+            )
+        return Goal.objects.none()
+    
+    @staticmethod
+    def apply_transaction(txn, sign=1):
+        """Add (sign=1) or remove (sign=-1) a transaction's amount from the progress of the goals it counts towards"""
+        from .cache import invalidate_user  # cache imports the models
+        amount = txn.amount * sign
+        today = timezone.localdate()
+        goals = list(Goal.for_transaction(txn))
+        for goal in goals:
+            derived = goal.get_derived_fields(goal.current_progress + amount, today)
+            Goal.objects.filter(pk=goal.pk).update(
+                current_progress=F('current_progress') + money_value(amount),
+                updated_at=timezone.now(),
+                **derived,
+            )
+        if goals:
+            # update() skips the post_save signal that drops the user's cached dashboards
+            invalidate_user(txn.monthly_budget.user_id)
+    
+    @staticmethod
+    def rebuild_for_user(user_id):
+        """
+        Recompute the progress of a user's goals from their linked transactions
+        (category type or tagged), archived transactions included. Goals that
+        track neither keep the progress entered by hand.
+        """
+        totals = {}
+        has_tagged = models.Q()
+        for prefix, model in (('', Transaction), ('archived_', ArchivedTransaction)):
+            tagged = model.objects.filter(goal=models.OuterRef('pk'))
+            tracked = model.objects.filter(
+                goal__isnull=True,
+                transaction_type='expense',
+                monthly_budget__user=models.OuterRef('user'),
+                category__category_type=models.OuterRef('category_type'),
+                date__gte=models.OuterRef('started'),
+            )
+            totals.update({
+                f'{prefix}has_tagged': models.Exists(tagged),
+                f'{prefix}tagged_total': models.Subquery(tagged.order_by().values('goal').annotate(total=models.Sum('amount')).values('total')),
+                f'{prefix}tracked_total': models.Subquery(tracked.order_by().values('monthly_budget__user').annotate(total=models.Sum('amount')).values('total')),
+            })
+            has_tagged |= models.Q(**{f'{prefix}has_tagged': True})
+        goals = Goal.objects.filter(user_id=user_id).annotate(
+            started=TruncDate('created_at'),
+        ).annotate(**totals).filter(models.Q(category_type__isnull=False) | has_tagged)
+        
+        today = timezone.localdate()
+        now = timezone.now()
+        updated = []
+        for goal in goals:
+            goal.current_progress = sum(
+                to_money(getattr(goal, f'{prefix}{total}'))
+                for prefix in ('', 'archived_') for total in ('tagged_total', 'tracked_total')
+            )
+            goal.set_derived_fields(goal.current_progress, today)
+            goal.updated_at = now
+            updated.append(goal)
+        Goal.objects.bulk_update(updated, [
+            'current_progress', 'progress_percentage', 'is_completed', 'projected_completion_date', 'updated_at',
+        ])
+        return len(updated)
+
+
+class Job(models.Model):
+    """Deferred work (summary recomputation, imports, ...) picked up by the run_worker command"""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (FAILED, 'Failed'),
+    ]
+    
+    jobId = models.AutoField(primary_key=True)
+    kind = models.CharField(max_length=50)
+    monthly_budget = models.ForeignKey(MonthlyBudget, on_delete=models.CASCADE, null=True, blank=True, related_name='jobs')
+    date = models.DateField(null=True, blank=True)
+    payload = models.JSONField(default=dict, blank=True)
+    # Only one pending job per key, e.g. one daily summary recomputation per (budget, date)
+    dedupe_key = models.CharField(max_length=200, blank=True, default='')
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    attempts = models.IntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'jobs'
+        ordering = ['run_after']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedupe_key'],
+                condition=models.Q(status='pending') & ~models.Q(dedupe_key=''),
+                name='job_pending_dedupe',
+            ),
+        ]
+        indexes = [
+            # Workers poll for due pending jobs
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} - {self.status} - {self.dedupe_key}"
+    
+    @staticmethod
+    def build(kind, monthly_budget=None, date=None, payload=None, dedupe=True):
+        key = ''
+        if dedupe:
+            key = f"{kind}:{monthly_budget.pk if monthly_budget else ''}:{date.isoformat() if date else ''}"
+        return Job(kind=kind, monthly_budget=monthly_budget, date=date, payload=payload or {}, dedupe_key=key)
+    
+    @staticmethod
+    def enqueue(jobs):
+        """Insert jobs in one query; jobs whose dedupe_key is already pending are dropped by the database"""
+        Job.objects.bulk_create(jobs, ignore_conflicts=True)
+    
+    @staticmethod
+    def enqueue_summary_jobs(monthly_budget, dates, category_spend=True, goals=True):
+        """Queue the recomputation of the daily summaries of dates plus the budget's monthly summary"""
+        jobs = [Job.build('daily_summary', monthly_budget, date) for date in set(dates)]
+        jobs.append(Job.build('monthly_summary', monthly_budget))
+        if category_spend:
+            jobs.append(Job.build('category_spend', monthly_budget))
+        if goals:
+            jobs.append(Job.build('goal_progress', monthly_budget))
+        Job.enqueue(jobs)
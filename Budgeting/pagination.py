@@ -0,0 +1,110 @@
+import base64
+import json
+from datetime import date, datetime
+from django.conf import settings
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = getattr(settings, 'BUDGETING_PAGE_SIZE', 50)
+MAX_PAGE_SIZE = getattr(settings, 'BUDGETING_MAX_PAGE_SIZE', 200)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(transaction, direction):
+    """Opaque token pointing just past (direction='next') or before ('prev') a transaction"""
+    payload = [direction, transaction.date.isoformat(), transaction.created_at.isoformat(), transaction.pk]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Turn a token back into (direction, date, created_at, pk)"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        direction, day, created_at, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if direction not in ('next', 'prev'):
+            raise ValueError(direction)
+        return direction, date.fromisoformat(day), datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, TypeError, json.JSONDecodeError) as exc:
+        raise InvalidCursor(token) from exc
+
+
+def get_page_size(value):
+    """Parse a requested page size, falling back to the default and capping at the maximum"""
+    try:
+        page_size = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(page_size, MAX_PAGE_SIZE))
+
+
+class KeysetPage:
+    """One page of transactions ordered by (-date, -created_at, -pk)"""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None, page_size=DEFAULT_PAGE_SIZE):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.page_size = page_size
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _seek(queryset, cursor):
+    """Apply the cursor and the ordering; returns (direction, queryset)"""
+    direction = 'next'
+    if cursor:
+        direction, day, created_at, pk = decode_cursor(cursor)
+        if direction == 'next':
+            queryset = queryset.filter(
+                Q(date__lt=day)
+                | Q(date=day, created_at__lt=created_at)
+                | Q(date=day, created_at=created_at, pk__lt=pk)
+            )
+        else:
+            queryset = queryset.filter(
+                Q(date__gt=day)
+                | Q(date=day, created_at__gt=created_at)
+                | Q(date=day, created_at=created_at, pk__gt=pk)
+            )
+
+    if direction == 'next':
+        return direction, queryset.order_by('-date', '-created_at', '-pk')
+    return direction, queryset.order_by('date', 'created_at', 'pk')
+
+
+def _build_page(rows, direction, cursor, page_size):
+    has_more = len(rows) > page_size
+    if direction == 'next':
+        items = rows[:page_size]
+        has_next, has_prev = has_more, cursor is not None
+    else:
+        items = rows[:page_size][::-1]
+        has_next, has_prev = True, has_more
+
+    return KeysetPage(
+        items,
+        next_cursor=encode_cursor(items[-1], 'next') if items and has_next else None,
+        prev_cursor=encode_cursor(items[0], 'prev') if items and has_prev else None,
+        page_size=page_size,
+    )
+
+
+def paginate_transactions(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Seek-based pagination: every page is an indexed range scan of page_size + 1 rows,
+    no matter how deep into the history it is.
+    """
+    direction, queryset = _seek(queryset, cursor)
+    return _build_page(list(queryset[:page_size + 1]), direction, cursor, page_size)
+
+
+async def apaginate_transactions(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    direction, queryset = _seek(queryset, cursor)
+    rows = [row async for row in queryset[:page_size + 1]]
+    return _build_page(rows, direction, cursor, page_size)
@@ -0,0 +1,132 @@
+"""
+Budget period rollover. For every active budget whose end_date has passed,
+the next period of the same length is created with a copy of its categories
+and allocations, the old budget is deactivated and its MonthlySummary is
+recomputed and finalized. Budgets are handled in batches of a fixed number
+of queries each (bulk_create / bulk_update), so the cost of a run grows with
+the number of batches rather than with one round trip per user or category.
+A batch that hits a conflict is retried one budget per savepoint, so only the
+conflicting users wait for the next run.
+"""
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from .cache import invalidate_budget
+from .models import MonthlyBudget, Category, MonthlySummary
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = getattr(settings, 'BUDGETING_ROLLOVER_BATCH_SIZE', 1000)
+
+CATEGORY_FIELDS = ('category_name', 'category_type', 'allocated_amount', 'is_custom', 'color')
+
+
+def next_period(start_date, end_date, today):
+    """
+    Dates of the period that follows start_date..end_date and has the same
+    length; periods that have already passed as well are skipped so the new
+    one contains today.
+    """
+    length = (end_date - start_date).days + 1
+    start = end_date + timedelta(days=1)
+    if start + timedelta(days=length - 1) < today:
+        start += timedelta(days=(today - start).days // length * length)
+    return start, start + timedelta(days=length - 1)
+
+
+def ended_budgets(today):
+    """Active budgets whose period is over, with has_newer set when the user already started another budget"""
+    newer = MonthlyBudget.objects.filter(user=OuterRef('user'), start_date__gt=OuterRef('start_date'))
+    return MonthlyBudget.objects.filter(is_active=True, end_date__lt=today).annotate(has_newer=Exists(newer))
+
+
+def roll_over_batch(budgets, today):
+    """
+    Roll over a list of ended budgets (rows from ended_budgets().values());
+    returns (budgets created, categories copied). Budgets of users who already
+    started a newer one are only closed.
+    """
+    old_ids = [budget['pk'] for budget in budgets]
+    to_roll = [budget for budget in budgets if not budget['has_newer']]
+
+    MonthlyBudget.objects.filter(pk__in=old_ids).update(is_active=False, updated_at=timezone.now())
+
+    new_budgets = []
+    for budget in to_roll:
+        start_date, end_date = next_period(budget['start_date'], budget['end_date'], today)
+        new_budgets.append(MonthlyBudget(
+            user_id=budget['user_id'], start_date=start_date, end_date=end_date,
+            total_budget=budget['total_budget'], is_active=True,
+        ))
+    MonthlyBudget.objects.bulk_create(new_budgets)
+
+    # Read the new ids back instead of relying on bulk_create setting them (not every backend does)
+    new_ids = {
+        (user_id, start_date): pk
+        for user_id, start_date, pk in MonthlyBudget.objects.filter(
+            user_id__in=[budget.user_id for budget in new_budgets],
+            start_date__in={budget.start_date for budget in new_budgets},
+        ).values_list('user_id', 'start_date', 'pk')
+    }
+    successor = {
+        old['pk']: new_ids[(new.user_id, new.start_date)]
+        for old, new in zip(to_roll, new_budgets)
+    }
+
+    categories = [
+        Category(monthly_budget_id=successor[row['monthly_budget_id']], **{field: row[field] for field in CATEGORY_FIELDS})
+        for row in Category.objects.filter(monthly_budget_id__in=successor).order_by().values('monthly_budget_id', *CATEGORY_FIELDS)
+    ]
+    Category.objects.bulk_create(categories, batch_size=DEFAULT_BATCH_SIZE)
+
+    MonthlySummary.rebuild_for_budgets(old_ids, finalize=True)
+    return len(new_budgets), len(categories)
+
+
+def run_rollover(today=None, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """
+    Roll over every ended active budget, batch_size budgets per transaction.
+    Returns a dict with the number of budgets closed, created, categories
+    copied and budgets that failed.
+    """
+    today = today or timezone.localdate()
+    stats = {'closed': 0, 'created': 0, 'categories': 0, 'failed': 0}
+    budgets = ended_budgets(today).order_by('pk').values('pk', 'user_id', 'start_date', 'end_date', 'total_budget', 'has_newer')
+    if dry_run:
+        stats['closed'] = budgets.count()
+        stats['created'] = budgets.filter(has_newer=False).count()
+        return stats
+
+    last_pk = 0
+    while True:
+        # Keyset pagination: a failed batch stays active without being picked up again in this run
+        batch = list(budgets.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        last_pk = batch[-1]['pk']
+        try:
+            with transaction.atomic():
+                rolled = [(batch, *roll_over_batch(batch, today))]
+        except IntegrityError:
+            # Another run (or the user) created one of the next periods meanwhile: retry budget by budget,
+            # each in its own savepoint, so the other users of the batch still roll over
+            rolled = []
+            for budget in batch:
+                try:
+                    with transaction.atomic():
+                        rolled.append(([budget], *roll_over_batch([budget], today)))
+                except IntegrityError:
+                    # Stays active; the next run retries it
+                    logger.warning('Budget rollover of budget %s failed', budget['pk'], exc_info=True)
+                    stats['failed'] += 1
+        for closed, created, categories in rolled:
+            stats['closed'] += len(closed)
+            stats['created'] += created
+            stats['categories'] += categories
+            # The bulk updates bypass the post_save signals that normally drop cached dashboards
+            for budget in closed:
+                invalidate_budget(budget['pk'])
+    return stats
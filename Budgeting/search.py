@@ -0,0 +1,205 @@
+"""
+Full-text search over transaction notes, across every budget of a user.
+
+SQLite: an FTS5 table (transactions_fts) holding each note plus an owner
+token (u<user_id>), kept in step with the transactions table by triggers,
+so bulk inserts and deletes are indexed too. Matching the owner token in
+the same MATCH expression lets FTS5 intersect the posting lists instead of
+filtering every user's matches afterwards. Results are ranked with bm25().
+
+PostgreSQL: a GIN index on to_tsvector('simple', note), ranked with
+ts_rank(). Higher ranks are better matches on both; other databases fall
+back to note__icontains, newest first.
+
+Both indexes are created by migration 0007 and cover archived transactions
+too (migration 0008). Search terms are reduced to words and matched as
+prefixes, so user input never reaches the query syntax.
+"""
+import re
+from datetime import datetime
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections, router
+from .models import MonthlyBudget, Transaction, ArchivedTransaction
+from .validation import DATE_FORMAT
+
+FTS_TABLE = 'transactions_fts'
+SEARCH_CONFIG = 'simple'
+MAX_TERMS = 8
+MAX_SEARCH_PAGE = getattr(settings, 'BUDGETING_SEARCH_MAX_PAGE', 20)
+
+_fts_tables = {}
+
+
+def search_terms(query):
+    """Lower-cased words of a search query; empty when there is nothing to search for"""
+    return re.findall(r'\w+', (query or '').lower())[:MAX_TERMS]
+
+
+def get_search_page(value):
+    try:
+        page = int(value)
+    except (TypeError, ValueError):
+        return 1
+    return max(1, min(page, MAX_SEARCH_PAGE))
+
+
+def parse_date(value):
+    """Date of a YYYY-MM-DD filter value, None when empty; raises ValueError otherwise"""
+    return datetime.strptime(value, DATE_FORMAT).date() if value else None
+
+
+def get_date_filters(params):
+    """date_from/date_to of a query dict as dates; malformed values are ignored"""
+    dates = []
+    for name in ('date_from', 'date_to'):
+        try:
+            dates.append(parse_date(params.get(name)))
+        except ValueError:
+            dates.append(None)
+    return dates
+
+
+class SearchPage:
+    """One page of ranked search results; transactions carry a search_rank attribute"""
+
+    def __init__(self, items, query, page, page_size, has_next):
+        self.items = items
+        self.query = query
+        self.page = page
+        self.page_size = page_size
+        self.next_page = page + 1 if has_next and page < MAX_SEARCH_PAGE else None
+        self.prev_page = page - 1 if page > 1 else None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _has_fts_table(connection):
+    if connection.alias not in _fts_tables:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            _fts_tables[connection.alias] = cursor.fetchone() is not None
+    return _fts_tables[connection.alias]
+
+
+def _filter_sql(column, transaction_type=None, category_id=None, date_from=None, date_to=None):
+    clauses, params = [], []
+    if transaction_type:
+        clauses.append(f'{column("transaction_type")} = %s')
+        params.append(transaction_type)
+    if category_id:
+        clauses.append(f'{column("category_id")} = %s')
+        params.append(category_id)
+    if date_from:
+        clauses.append(f'{column("date")} >= %s')
+        params.append(date_from.isoformat())
+    if date_to:
+        clauses.append(f'{column("date")} <= %s')
+        params.append(date_to.isoformat())
+    return ''.join(f' AND {clause}' for clause in clauses), params
+
+
+def _ranked_ids(connection, user_id, terms, filters, limit, offset):
+    """(transaction id, rank) pairs best match first, or None when the database has no full-text index"""
+    qn = connection.ops.quote_name
+    pk = qn(Transaction._meta.pk.column)
+    hot, archived = qn(Transaction._meta.db_table), qn(ArchivedTransaction._meta.db_table)
+
+    if connection.vendor == 'sqlite' and _has_fts_table(connection):
+        # A row id is in exactly one of the two tables; both joins are primary key lookups
+        filter_sql, filter_params = _filter_sql(lambda name: f'coalesce(t.{name}, a.{name})', **filters)
+        match = f'owner:"u{int(user_id)}" AND note:(' + ' '.join(f'"{term}"*' for term in terms) + ')'
+        sql = (
+            # bm25() is lower-is-better; negate it so both engines rank higher-is-better
+            f'SELECT {FTS_TABLE}.rowid, -bm25({FTS_TABLE}, 1.0, 0.0) AS rank'
+            f' FROM {FTS_TABLE} LEFT JOIN {hot} t ON t.{pk} = {FTS_TABLE}.rowid'
+            f' LEFT JOIN {archived} a ON a.{pk} = {FTS_TABLE}.rowid'
+            f' WHERE {FTS_TABLE} MATCH %s{filter_sql}'
+            f' ORDER BY rank DESC, coalesce(t.date, a.date) DESC LIMIT %s OFFSET %s'
+        )
+        params = [match, *filter_params, limit, offset]
+    elif connection.vendor == 'postgresql':
+        # Same expression as the txn_note_search_idx / archived_txn_note_search_idx GIN indexes;
+        # the conditions are pushed down into both halves of the UNION ALL
+        filter_sql, filter_params = _filter_sql(lambda name: f't.{name}', **filters)
+        vector = f"to_tsvector('{SEARCH_CONFIG}', coalesce(t.note, ''))"
+        columns = f'{pk}, monthly_budget_id, category_id, transaction_type, date, note'
+        budgets = MonthlyBudget._meta
+        sql = (
+            f'SELECT t.{pk}, ts_rank({vector}, query) AS rank'
+            f' FROM (SELECT {columns} FROM {hot} UNION ALL SELECT {columns} FROM {archived}) t'
+            f' JOIN {qn(budgets.db_table)} b ON b.{qn(budgets.pk.column)} = t.monthly_budget_id,'
+            f" to_tsquery('{SEARCH_CONFIG}', %s) query"
+            f' WHERE {vector} @@ query AND b.user_id = %s{filter_sql}'
+            f' ORDER BY rank DESC, t.date DESC LIMIT %s OFFSET %s'
+        )
+        params = [' & '.join(f'{term}:*' for term in terms), user_id, *filter_params, limit, offset]
+    else:
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def search_transactions(user, query, page=1, page_size=50, transaction_type=None, category_id=None,
+                        date_from=None, date_to=None):
+    """
+    Ranked page of a user's transactions, archived ones included, whose note
+    matches query; dates are date objects
+    """
+    terms = search_terms(query)
+    try:
+        category_id = int(category_id) if category_id else None
+    except (TypeError, ValueError):
+        terms = []
+    if not terms:
+        return SearchPage([], query, page, page_size, False)
+    filters = {
+        'transaction_type': transaction_type,
+        'category_id': category_id,
+        'date_from': date_from,
+        'date_to': date_to,
+    }
+    offset = (page - 1) * page_size
+    using = router.db_for_read(Transaction)
+    rows = _ranked_ids(connections[using], user.pk, terms, filters, page_size + 1, offset)
+
+    if rows is None:
+        items = []
+        for model in (Transaction, ArchivedTransaction):
+            transactions = model.objects.using(using).filter(monthly_budget__user=user)
+            for term in terms:
+                transactions = transactions.filter(note__icontains=term)
+            if transaction_type:
+                transactions = transactions.filter(transaction_type=transaction_type)
+            if category_id:
+                transactions = transactions.filter(category_id=category_id)
+            if date_from:
+                transactions = transactions.filter(date__gte=date_from)
+            if date_to:
+                transactions = transactions.filter(date__lte=date_to)
+            items += transactions.order_by('-date', '-created_at', '-pk')[:offset + page_size + 1]
+        items.sort(key=lambda transaction: (transaction.date, transaction.created_at, transaction.pk), reverse=True)
+        items = items[offset:]
+        for transaction in items:
+            transaction.search_rank = None
+    else:
+        ids = [pk for pk, rank in rows]
+        by_id = Transaction.objects.using(using).in_bulk(ids)
+        if len(by_id) < len(ids):
+            by_id.update(ArchivedTransaction.objects.using(using).in_bulk([pk for pk in ids if pk not in by_id]))
+        items = []
+        for pk, rank in rows:
+            if pk in by_id:
+                by_id[pk].search_rank = rank
+                items.append(by_id[pk])
+
+    return SearchPage(items[:page_size], query, page, page_size, len(items) > page_size)
+
+
+asearch_transactions = sync_to_async(search_transactions)
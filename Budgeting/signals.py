@@ -0,0 +1,22 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .cache import invalidate_budget, invalidate_user
+from .models import MonthlyBudget, Category, Transaction, Goal
+
+
+@receiver([post_save, post_delete], sender=Transaction)
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_budget_dashboard(sender, instance, **kwargs):
+    """Transactions and categories feed the totals and category summary of their budget (dropped on commit)"""
+    invalidate_budget(instance.monthly_budget_id)
+
+
+@receiver([post_save, post_delete], sender=MonthlyBudget)
+def invalidate_budget_dashboard_for_budget(sender, instance, **kwargs):
+    invalidate_budget(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Goal)
+def invalidate_user_dashboard(sender, instance, **kwargs):
+    """Goals are shown on every dashboard of their user"""
+    invalidate_user(instance.user_id)
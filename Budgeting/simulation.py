@@ -0,0 +1,227 @@
+import math
+import random
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from .aggregation import get_categories_summary, get_budget_totals
+from .models import DailySummary, Goal
+
+DAYS_PER_MONTH = 30
+LOOKBACK_DAYS = getattr(settings, 'BUDGETING_SIMULATION_LOOKBACK_DAYS', 90)
+DEFAULT_PATHS = 1000
+MAX_PATHS = getattr(settings, 'BUDGETING_SIMULATION_MAX_PATHS', 5000)
+DEFAULT_MONTHS = 12
+MAX_MONTHS = 60
+# Bound on scenario amounts and percentages, so no projected value can overflow to inf
+MAX_SCENARIO_VALUE = 10 ** 12
+
+
+class InvalidScenario(ValueError):
+    """A malformed or out-of-range scenario parameter; the message is fit to show to the user"""
+
+
+def _finite(value, name):
+    """float(value), rejecting inf, nan and huge values: float() accepts them but JSON cannot carry the results"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        number = math.nan
+    if not math.isfinite(number) or abs(number) > MAX_SCENARIO_VALUE:
+        raise InvalidScenario(f'{name} must be a number between -{MAX_SCENARIO_VALUE} and {MAX_SCENARIO_VALUE}')
+    return number
+
+
+class Scenario:
+    """
+    What-if adjustments applied on top of the historical rates:
+    category_multipliers maps a category type or name to a spend factor
+    (0.8 = cut 20%), monthly_income/monthly_expense are flat monthly additions.
+    """
+
+    def __init__(self, category_multipliers=None, monthly_income=0, monthly_expense=0):
+        self.category_multipliers = {key.lower(): value for key, value in (category_multipliers or {}).items()}
+        self.monthly_income = _finite(monthly_income, 'income')
+        self.monthly_expense = _finite(monthly_expense, 'expense')
+
+    @classmethod
+    def from_query(cls, params):
+        """
+        Build a scenario from request parameters: ?cut=food:20 (repeatable),
+        ?raise=transport:10, ?income=500, ?expense=100
+        """
+        multipliers = {}
+        for key, sign in (('cut', -1), ('raise', 1)):
+            for value in params.getlist(key):
+                name, _, percent = value.rpartition(':')
+                if not name:
+                    raise InvalidScenario(f'Expected {key}=<category>:<percent>')
+                multipliers[name] = max(0.0, 1 + sign * _finite(percent, key) / 100)
+        return cls(multipliers, params.get('income') or 0, params.get('expense') or 0)
+
+    def multiplier_for(self, category):
+        for key in (category.category_type, category.category_name):
+            if key and key.lower() in self.category_multipliers:
+                return self.category_multipliers[key.lower()]
+        return 1.0
+
+
+def _daily_stats(values):
+    """Mean and standard deviation of a daily series"""
+    if not values:
+        return 0.0, 0.0
+    mean = sum(values) / len(values)
+    variance = sum((value - mean) ** 2 for value in values) / len(values)
+    return mean, math.sqrt(variance)
+
+
+def _percentiles(values, points=(10, 50, 90)):
+    ordered = sorted(values)
+    last = len(ordered) - 1
+    return {f'p{point}': round(ordered[round(last * point / 100)], 2) for point in points}
+
+
+def load_history(user, today, lookback_days=LOOKBACK_DAYS):
+    """Daily income and expense over the lookback window; days without a summary count as 0"""
+    start = today - timedelta(days=lookback_days - 1)
+    rows = DailySummary.objects.filter(
+        monthly_budget__user=user, date__gte=start, date__lte=today
+    ).values_list('date', 'total_income', 'total_expense')
+
+    income = {}
+    expense = {}
+    for day, day_income, day_expense in rows:
+        income[day] = income.get(day, 0.0) + float(day_income)
+        expense[day] = expense.get(day, 0.0) + float(day_expense)
+
+    days = [start + timedelta(days=offset) for offset in range(lookback_days)]
+    return [income.get(day, 0.0) for day in days], [expense.get(day, 0.0) for day in days]
+
+
+def simulate_budget(budget, scenario=None, months=DEFAULT_MONTHS, paths=DEFAULT_PATHS, seed=None, today=None):
+    """
+    Monte Carlo projection of a budget under a scenario.
+
+    Daily income and expense are modelled as independent normals fitted to the
+    user's recent DailySummary series; a month is the sum of 30 such days, so
+    each path draws one normal per month instead of one per day. Category spend
+    follows the category's run rate in the current period, scaled by the
+    scenario multiplier and by the path's expense shock.
+    """
+    scenario = scenario or Scenario()
+    months = max(1, min(int(months), MAX_MONTHS))
+    paths = max(1, min(int(paths), MAX_PATHS))
+    today = today or timezone.now().date()
+    rng = random.Random(seed)
+
+    income_history, expense_history = load_history(budget.user, today)
+    income_mean, income_std = _daily_stats(income_history)
+    expense_mean, expense_std = _daily_stats(expense_history)
+
+    # Category run rates in the current period
+    elapsed_days = max(1, min((today - budget.start_date).days + 1, (budget.end_date - budget.start_date).days + 1))
+    remaining_days = max(0, (budget.end_date - today).days)
+    categories = get_categories_summary(budget)
+    categorized_rate = 0.0
+    adjusted_rate = 0.0
+    category_rates = []
+    for item in categories:
+        rate = float(item['spent']) / elapsed_days
+        multiplier = scenario.multiplier_for(item['category'])
+        categorized_rate += rate
+        adjusted_rate += rate * multiplier
+        category_rates.append((item, rate * multiplier))
+
+    # Apply the category cuts to the historical expense rate
+    expense_factor = adjusted_rate / categorized_rate if categorized_rate else 1.0
+    month_income_mean = income_mean * DAYS_PER_MONTH + scenario.monthly_income
+    month_income_std = income_std * math.sqrt(DAYS_PER_MONTH)
+    month_expense_mean = expense_mean * expense_factor * DAYS_PER_MONTH + scenario.monthly_expense
+    month_expense_std = expense_std * expense_factor * math.sqrt(DAYS_PER_MONTH)
+
+    # Current period: remaining balance at end_date per path
+    totals = get_budget_totals(budget)
+    period_spent = float(totals['total_spent'])
+    period_shocks = []
+    period_remaining = []
+    period_mean = adjusted_rate * remaining_days
+    period_std = expense_std * expense_factor * math.sqrt(remaining_days)
+    for _ in range(paths):
+        future_spend = max(0.0, rng.gauss(period_mean, period_std)) if remaining_days else 0.0
+        period_shocks.append(future_spend / period_mean if period_mean else 1.0)
+        period_remaining.append(float(budget.total_budget) - period_spent - future_spend)
+
+    category_results = []
+    for item, rate in category_rates:
+        allocated = float(item['allocated'])
+        spent = float(item['spent'])
+        projected = spent + rate * remaining_days
+        overruns = sum(1 for shock in period_shocks if spent + rate * remaining_days * shock > allocated)
+        category_results.append({
+            'category': item['category'],
+            'allocated': item['allocated'],
+            'spent': item['spent'],
+            'projected_spent': round(projected, 2),
+            'projected_overrun': round(max(0.0, projected - allocated), 2),
+            'overrun_probability': round(overruns / paths, 4),
+        })
+
+    # Multi-month savings paths
+    goals = list(Goal.objects.filter(user=budget.user, is_completed=False))
+    goal_targets = [float(goal.get_remaining_amount()) for goal in goals]
+    goal_months = [[] for _ in goals]
+    balances_by_month = [[] for _ in range(months)]
+    gauss = rng.gauss
+    lowest_target = min(goal_targets, default=math.inf)
+    for _ in range(paths):
+        balance = 0.0
+        reached = [None] * len(goals)
+        for month, month_balances in enumerate(balances_by_month):
+            income = gauss(month_income_mean, month_income_std)
+            expense = gauss(month_expense_mean, month_expense_std)
+            balance += (income if income > 0 else 0.0) - (expense if expense > 0 else 0.0)
+            month_balances.append(balance)
+            if balance >= lowest_target:
+                for index, target in enumerate(goal_targets):
+                    if reached[index] is None and balance >= target:
+                        reached[index] = month + 1
+        for index, month in enumerate(reached):
+            goal_months[index].append(month)
+
+    goal_results = []
+    for goal, target, reached in zip(goals, goal_targets, goal_months):
+        completed = sorted(month for month in reached if month is not None)
+        # Median over all paths, counting paths that never reach the goal as 'later than the horizon'
+        median_month = completed[paths // 2] if len(completed) > paths // 2 else None
+        by_target = sum(
+            1 for month in completed if today + timedelta(days=month * DAYS_PER_MONTH) <= goal.target_date
+        )
+        goal_results.append({
+            'goal': goal,
+            'remaining': round(target, 2),
+            'projected_completion_date': (
+                today + timedelta(days=median_month * DAYS_PER_MONTH) if median_month else None
+            ),
+            'completion_probability': round(len(completed) / paths, 4),
+            'probability_by_target_date': round(by_target / paths, 4),
+        })
+
+    return {
+        'months': months,
+        'paths': paths,
+        'period': {
+            'end_date': budget.end_date,
+            'days_remaining': remaining_days,
+            'projected_spent': round(period_spent + period_mean, 2),
+            'projected_remaining': _percentiles(period_remaining),
+            'overspend_probability': round(sum(1 for value in period_remaining if value < 0) / paths, 4),
+        },
+        'categories': category_results,
+        'monthly_balance': [
+            dict(month=month + 1, **_percentiles(values)) for month, values in enumerate(balances_by_month)
+        ],
+        'goals': goal_results,
+        'assumptions': {
+            'monthly_income_mean': round(month_income_mean, 2),
+            'monthly_expense_mean': round(month_expense_mean, 2),
+        },
+    }
@@ -1,3 +1,1367 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from importlib import import_module
+from unittest import mock, skipUnless
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection, transaction as db_transaction
+from django.db.models import Value
+from django.http import HttpResponse, QueryDict
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from backend import routers
+from UserAuth.models import User
+from . import admin as budget_admin, api, async_views, jobs, rollover, search
+from .aggregation import aget_budget_totals, get_budget_overview, get_budget_totals, get_categories_summary
+from .archive import archive_batch, run_archive
+from .benchmarks import _stub_template_settings, compare_results, run_benchmarks
+from .cache import (
+    _budget_version_key, _dashboard_key, aget_dashboard_data, get_cache, get_cache_stats, get_dashboard_data,
+    invalidate_budget, invalidate_user,
+)
+from .fields import MAX_VALUE
+from .management.commands.run_benchmarks import DEFAULT_BASELINE
+from .importers import import_transactions
+from .models import MAX_SAVINGS_RATE, MonthlyBudget, Category, Transaction, DailySummary, MonthlySummary, CategorySpend, Goal, Job, ArchivedTransaction
+from .pagination import MAX_PAGE_SIZE, InvalidCursor, get_page_size, paginate_transactions
+from .simulation import MAX_MONTHS, MAX_SCENARIO_VALUE, InvalidScenario, Scenario, simulate_budget
 
-# Create your tests here.
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+class QueryIndexTests(TestCase):
+    """The hot Budgeting queries should be served by the indexes declared in Meta.indexes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('index@example.com', 'Index', 'password')
+        cls.budget = MonthlyBudget.objects.create(
+            user=cls.user, start_date=date(2025, 1, 1), total_budget=Decimal('1000')
+        )
+        cls.category = Category.objects.create(
+            monthly_budget=cls.budget, category_name='Food', category_type='food', allocated_amount=Decimal('300')
+        )
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+
+    def test_active_budget_lookup(self):
+        # .first() on the default -start_date ordering
+        plan = MonthlyBudget.objects.filter(user=self.user, is_active=True)[:1].explain()
+        self.assertIn('budget_user_active_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_daily_totals(self):
+        self.assertUsesIndex(
+            Transaction.objects.filter(monthly_budget=self.budget, date=date(2025, 1, 2)).order_by(),
+            'txn_budget_date_idx',
+        )
+
+    def test_transactions_list_ordering(self):
+        plan = Transaction.objects.filter(monthly_budget=self.budget).order_by('-date', '-created_at')[:10].explain()
+        self.assertIn('txn_budget_date_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_transactions_list_type_filter(self):
+        plan = Transaction.objects.filter(
+            monthly_budget=self.budget, transaction_type='expense'
+        ).order_by('-date', '-created_at')[:10].explain()
+        self.assertIn('txn_budget_type_date_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_transactions_list_category_filter(self):
+        plan = Transaction.objects.filter(
+            monthly_budget=self.budget, category=self.category
+        ).order_by('-date', '-created_at')[:10].explain()
+        self.assertIn('txn_budget_cat_date_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_category_spent(self):
+        self.assertUsesIndex(
+            Transaction.objects.filter(category=self.category, transaction_type='expense').order_by(),
+            'txn_category_type_idx',
+        )
+
+    def test_open_goals(self):
+        self.assertUsesIndex(Goal.objects.filter(user=self.user, is_completed=False)[:5], 'goal_user_open_idx')
+
+
+# The transaction form templates are not in the tree yet; stubs still capture the context
+@override_settings(TEMPLATES=_stub_template_settings())
+class BudgetTestCase(TestCase):
+    """A logged-in user with an active budget starting today and two expense categories"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(f'{cls.__name__.lower()}@example.com', 'Tester', 'password')
+        cls.budget = MonthlyBudget.objects.create(
+            user=cls.user, start_date=timezone.localdate(), total_budget=Decimal('1000')
+        )
+        cls.food = Category.objects.create(
+            monthly_budget=cls.budget, category_name='Food', category_type='food', allocated_amount=Decimal('300')
+        )
+        cls.rent = Category.objects.create(
+            monthly_budget=cls.budget, category_name='Rent', category_type='utilities', allocated_amount=Decimal('500')
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def add_transaction(self, transaction_type, amount, day=0, category=None, **extra):
+        self.client.post(reverse('add_transaction'), {
+            'transaction_type': transaction_type,
+            'amount': amount,
+            'category': category.pk if category else '',
+            'date': (self.budget.start_date + timedelta(days=day)).isoformat(),
+            **extra,
+        })
+        return Transaction.objects.filter(monthly_budget=self.budget).latest('pk')
+
+    def edit_transaction(self, txn, **changes):
+        data = {
+            'transaction_type': txn.transaction_type,
+            'amount': str(txn.amount),
+            'category': txn.category_id or '',
+            'date': txn.date.isoformat(),
+            **changes,
+        }
+        self.client.post(reverse('edit_transaction', args=[txn.pk]), data)
+
+    def delete_transaction(self, txn):
+        self.client.post(reverse('delete_transaction', args=[txn.pk]))
+
+
+class AggregationTests(BudgetTestCase):
+    """Budget totals and the category breakdown take a fixed number of grouped queries, however many rows there are"""
+
+    def test_totals(self):
+        for amount in ('0.10', '0.10', '0.10', '19.99'):
+            self.add_transaction('expense', amount, category=self.food)
+        self.add_transaction('income', '250.05')
+        with self.assertNumQueries(1):
+            totals = get_budget_totals(self.budget)
+        self.assertEqual(totals, {
+            'total_income': Decimal('250.05'), 'total_spent': Decimal('20.29'), 'remaining_balance': Decimal('979.71'),
+        })
+        self.assertEqual(self.budget.get_remaining_balance(), Decimal('979.71'))
+
+    def test_empty_budget(self):
+        totals = get_budget_totals(self.budget)
+        self.assertEqual((totals['total_income'], totals['total_spent']), (Decimal('0.00'), Decimal('0.00')))
+        self.assertEqual([item['spent'] for item in get_categories_summary(self.budget)], [Decimal('0.00')] * 2)
+
+    def test_categories_summary(self):
+        self.add_transaction('expense', '75', category=self.food)
+        self.add_transaction('expense', '600', category=self.rent)
+        Category.objects.create(monthly_budget=self.budget, category_name='Gifts', category_type='other', allocated_amount=0)
+        with self.assertNumQueries(1):
+            summary = get_categories_summary(self.budget)
+        self.assertEqual(
+            [(item['category'].category_name, item['spent'], item['remaining'], item['percentage']) for item in summary],
+            [('Food', Decimal('75.00'), Decimal('225.00'), Decimal('25')),
+             ('Gifts', Decimal('0.00'), Decimal('0.00'), 0),
+             ('Rent', Decimal('600.00'), Decimal('-100.00'), Decimal('120'))],
+        )
+
+    def test_overview_query_count_does_not_grow_with_categories(self):
+        def overview_queries():
+            with CaptureQueriesContext(connection) as queries:
+                get_budget_overview(self.budget)
+            return len(queries)
+
+        self.add_transaction('expense', '10', category=self.food)
+        before = overview_queries()
+        for number in range(10):
+            category = Category.objects.create(
+                monthly_budget=self.budget, category_name=f'Extra {number}', category_type='other', allocated_amount=10,
+            )
+            self.add_transaction('expense', '1', category=category)
+        self.assertEqual(overview_queries(), before)
+        self.assertEqual(before, 2)
+
+
+class SummaryMaintenanceTests(BudgetTestCase):
+    """The atomic deltas applied on every write must leave the summaries a full rebuild would produce"""
+
+    def summary_state(self):
+        daily = {
+            row[0]: row[1:]
+            for row in DailySummary.objects.filter(monthly_budget=self.budget).values_list(
+                'date', 'total_income', 'total_expense', 'net_amount'
+            )
+            # Deltas leave emptied days at zero where a rebuild drops them
+            if any(row[1:])
+        }
+        monthly = MonthlySummary.objects.filter(monthly_budget=self.budget).values_list(
+            'total_income', 'total_expense', 'remaining_balance', 'savings_rate'
+        ).first()
+        return daily, monthly
+
+    def assertMatchesRebuild(self):
+        incremental = self.summary_state()
+        DailySummary.rebuild_for_budget(self.budget)
+        MonthlySummary.update_or_create_for_budget(self.budget)
+        self.assertEqual(incremental, self.summary_state())
+
+    def test_add(self):
+        self.add_transaction('income', '1500.10')
+        self.add_transaction('expense', '12.34', category=self.food)
+        self.add_transaction('expense', '0.66', day=1, category=self.rent)
+        daily, monthly = self.summary_state()
+        self.assertEqual(monthly[:3], (Decimal('1500.10'), Decimal('13.00'), Decimal('987.00')))
+        self.assertEqual(len(daily), 2)
+        self.assertMatchesRebuild()
+
+    def test_edit_amount_and_type(self):
+        txn = self.add_transaction('expense', '40', category=self.food)
+        self.edit_transaction(txn, amount='55.55')
+        self.edit_transaction(Transaction.objects.get(pk=txn.pk), transaction_type='income')
+        self.assertEqual(self.summary_state()[1][:2], (Decimal('55.55'), Decimal('0.00')))
+        self.assertMatchesRebuild()
+
+    def test_edit_date_moves_the_amount_between_days(self):
+        txn = self.add_transaction('expense', '25', category=self.food)
+        self.add_transaction('expense', '5', day=3, category=self.food)
+        self.edit_transaction(txn, date=(txn.date + timedelta(days=3)).isoformat())
+        daily, _ = self.summary_state()
+        self.assertEqual(list(daily), [txn.date + timedelta(days=3)])
+        self.assertMatchesRebuild()
+
+    def test_edit_category(self):
+        txn = self.add_transaction('expense', '70', category=self.food)
+        self.edit_transaction(txn, category=self.rent.pk)
+        self.assertMatchesRebuild()
+
+    def test_delete(self):
+        keep = self.add_transaction('income', '200')
+        gone = self.add_transaction('expense', '80', day=2, category=self.food)
+        self.delete_transaction(gone)
+        daily, monthly = self.summary_state()
+        self.assertEqual(list(daily), [keep.date])
+        self.assertEqual(monthly[:3], (Decimal('200.00'), Decimal('0.00'), Decimal('1000.00')))
+        self.assertMatchesRebuild()
+
+    def test_savings_rate_of_an_overspent_budget_stays_in_range(self):
+        self.add_transaction('expense', '11000', category=self.rent)
+        self.assertEqual(self.summary_state()[1][3], -MAX_SAVINGS_RATE)
+        self.assertMatchesRebuild()
+        self.delete_transaction(Transaction.objects.get(monthly_budget=self.budget))
+        self.assertEqual(self.summary_state()[1][3], Decimal('100.00'))
+
+
+class MoneyFieldTests(BudgetTestCase):
+    """Money is stored as integer cents: exact sums, two decimal places, and the BIGINT range"""
+    field = Transaction._meta.get_field('amount')
+
+    def test_stored_as_cents(self):
+        txn = self.add_transaction('expense', '10.07', category=self.food)
+        with connection.cursor() as cursor:
+            qn = connection.ops.quote_name
+            cursor.execute(f'SELECT amount FROM {qn(Transaction._meta.db_table)} WHERE {qn("transactionId")} = %s', [txn.pk])
+            self.assertEqual(cursor.fetchone()[0], 1007)
+        self.assertEqual(Transaction.objects.get(pk=txn.pk).amount, Decimal('10.07'))
+
+    def test_sums_are_exact(self):
+        Transaction.objects.bulk_create([
+            Transaction(monthly_budget=self.budget, category=self.food, transaction_type='expense',
+                        amount=Decimal('0.10'), date=self.budget.start_date)
+            for _ in range(1000)
+        ])
+        self.assertEqual(get_budget_totals(self.budget)['total_spent'], Decimal('100.00'))
+
+    def test_prep_value(self):
+        self.assertEqual(self.field.get_prep_value(0.1), 10)
+        self.assertEqual(self.field.get_prep_value(Decimal('2.345')), 235)
+        self.assertEqual(self.field.get_prep_value(MAX_VALUE), 2 ** 63 - 1)
+        for value in (MAX_VALUE + 1, Decimal('NaN'), Decimal('Infinity')):
+            with self.assertRaises(ValueError):
+                self.field.get_prep_value(value)
+
+    def test_validators(self):
+        self.assertEqual(self.field.clean('12.50', None), Decimal('12.50'))
+        for value in ('1.001', str(MAX_VALUE + 1), 'abc'):
+            with self.assertRaises(ValidationError):
+                self.field.clean(value, None)
+
+    def test_float_bounds_are_not_rounded_to_whole_units(self):
+        txn = self.add_transaction('expense', '10.50', category=self.food)
+        self.assertTrue(Transaction.objects.filter(pk=txn.pk, amount__gte=10.5).exists())
+        self.assertFalse(Transaction.objects.filter(pk=txn.pk, amount__lt=10.5).exists())
+
+    def test_amounts_above_the_limit_are_rejected(self):
+        response = self.client.post(reverse('api_transactions'), json.dumps({
+            'type': 'expense', 'amount': '99999999999', 'category_id': self.food.pk,
+            'date': self.budget.start_date.isoformat(),
+        }), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Amount is too large', json.dumps(response.json()))
+        self.assertFalse(Transaction.objects.filter(monthly_budget=self.budget).exists())
+
+
+class CategorySpendTests(BudgetTestCase):
+    """The per-category rollups kept by deltas must match a rebuild from the transactions"""
+
+    def spend_state(self):
+        return {
+            category_id: (spent, count)
+            for category_id, spent, count in CategorySpend.objects.filter(monthly_budget=self.budget).values_list(
+                'category_id', 'total_spent', 'transaction_count'
+            )
+            # A rebuild also writes rows for categories that never had an expense
+            if spent or count
+        }
+
+    def assertMatchesRebuild(self):
+        incremental = self.spend_state()
+        CategorySpend.rebuild_for_budget(self.budget)
+        self.assertEqual(incremental, self.spend_state())
+
+    def test_add_ignores_income(self):
+        self.add_transaction('expense', '12.34', category=self.food)
+        self.add_transaction('expense', '7.66', day=1, category=self.food)
+        self.add_transaction('income', '99', category=self.rent)
+        self.assertEqual(self.spend_state(), {self.food.pk: (Decimal('20.00'), 2)})
+        self.assertMatchesRebuild()
+
+    def test_edit_moves_the_amount_between_categories(self):
+        txn = self.add_transaction('expense', '40', category=self.food)
+        self.edit_transaction(txn, category=self.rent.pk, amount='45.50')
+        self.assertEqual(self.spend_state(), {self.rent.pk: (Decimal('45.50'), 1)})
+        self.assertMatchesRebuild()
+
+    def test_edit_type(self):
+        txn = self.add_transaction('expense', '40', category=self.food)
+        self.edit_transaction(txn, transaction_type='income')
+        self.assertEqual(self.spend_state(), {})
+        self.assertMatchesRebuild()
+
+    def test_delete(self):
+        self.add_transaction('expense', '10', category=self.food)
+        gone = self.add_transaction('expense', '30', category=self.food)
+        self.delete_transaction(gone)
+        self.assertEqual(self.spend_state(), {self.food.pk: (Decimal('10.00'), 1)})
+        self.assertMatchesRebuild()
+
+
+    def test_category_of_another_budget_is_rejected(self):
+        other = MonthlyBudget.objects.create(
+            user=User.objects.create_user('spend-other@example.com', 'Other', 'password'),
+            start_date=self.budget.start_date, total_budget=Decimal('10'),
+        )
+        foreign = Category.objects.create(
+            monthly_budget=other, category_name='Food', category_type='food', allocated_amount=Decimal('5')
+        )
+        data = {'transaction_type': 'expense', 'amount': '10', 'category': foreign.pk, 'date': self.budget.start_date.isoformat()}
+        response = self.client.post(reverse('add_transaction'), data)
+        self.assertIn('Please select a valid category', response.context['errors'])
+        response = self.client.post(reverse('quick_add_transaction'), data)
+        self.assertIn('Please select a valid category', response.context['errors'])
+        self.assertFalse(Transaction.objects.exists())
+        txn = self.add_transaction('expense', '10', category=self.food)
+        response = self.client.post(reverse('edit_transaction', args=[txn.pk]), data)
+        self.assertIn('Please select a valid category', response.context['errors'])
+        self.assertEqual(Transaction.objects.get(pk=txn.pk).category_id, self.food.pk)
+        self.assertFalse(CategorySpend.objects.filter(category=foreign).exists())
+        self.assertMatchesRebuild()
+
+
+class KeysetPaginationTests(BudgetTestCase):
+    """Cursor pages must cover every transaction exactly once, in list order, ties included"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Transaction.objects.bulk_create([
+            Transaction(monthly_budget=cls.budget, transaction_type='income', amount=Decimal(index + 1),
+                        date=cls.budget.start_date + timedelta(days=index % 3))
+            for index in range(23)
+        ])
+        # Same date and created_at for a run of rows, so only the pk breaks the tie
+        Transaction.objects.filter(monthly_budget=cls.budget, date=cls.budget.start_date).update(
+            created_at=timezone.now()
+        )
+        cls.expected = list(
+            Transaction.objects.filter(monthly_budget=cls.budget).order_by('-date', '-created_at', '-pk')
+            .values_list('pk', flat=True)
+        )
+
+    def queryset(self):
+        return Transaction.objects.filter(monthly_budget=self.budget)
+
+    def test_forward_walk_covers_everything_once(self):
+        seen, cursor, pages = [], None, 0
+        while True:
+            page = paginate_transactions(self.queryset(), cursor, page_size=5)
+            seen += [txn.pk for txn in page]
+            pages += 1
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(pages, 5)
+
+    def test_prev_cursor_returns_the_previous_page(self):
+        first = paginate_transactions(self.queryset(), None, page_size=5)
+        self.assertIsNone(first.prev_cursor)
+        second = paginate_transactions(self.queryset(), first.next_cursor, page_size=5)
+        back = paginate_transactions(self.queryset(), second.prev_cursor, page_size=5)
+        self.assertEqual([txn.pk for txn in back], [txn.pk for txn in first])
+        self.assertEqual([txn.pk for txn in second], self.expected[5:10])
+
+    def test_invalid_cursor(self):
+        for token in ('garbage', 'WyJzaWRld2F5cyJd'):
+            with self.assertRaises(InvalidCursor):
+                paginate_transactions(self.queryset(), token)
+
+    def test_page_size_bounds(self):
+        self.assertEqual(get_page_size('0'), 1)
+        self.assertEqual(get_page_size(str(MAX_PAGE_SIZE + 1)), MAX_PAGE_SIZE)
+        self.assertEqual(get_page_size('abc'), get_page_size(None))
+
+
+class TransactionImportTests(BudgetTestCase):
+    """Imports insert in batches, report bad rows, and leave the summaries as a rebuild would"""
+
+    def day(self, offset=0):
+        return (self.budget.start_date + timedelta(days=offset)).isoformat()
+
+    def import_csv(self, content, **kwargs):
+        return import_transactions(self.budget, io.BytesIO(content), 'csv', **kwargs)
+
+    def test_csv_import_and_summaries(self):
+        result = self.import_csv((
+            'date,type,amount,category,note\n'
+            f'{self.day()},income,1000,,salary\n'
+            f'{self.day()},expense,12.50,Food,lunch\n'
+            f'{self.day(1)},,-30,rent,signless type from the amount\n'
+            f'{self.day(1)},expense,abc,Food,bad amount\n'
+            f'{self.day(2)},expense,5,Travel,unknown category\n'
+        ).encode(), batch_size=2)
+
+        self.assertEqual((result.created, result.failed, result.error), (3, 2, None))
+        self.assertEqual([row for row, _messages in result.errors], [4, 5])
+        summary = MonthlySummary.objects.get(monthly_budget=self.budget)
+        self.assertEqual((summary.total_income, summary.total_expense), (Decimal('1000.00'), Decimal('42.50')))
+        self.assertEqual(CategorySpend.objects.get(category=self.rent).total_spent, Decimal('30.00'))
+        daily = list(DailySummary.objects.filter(monthly_budget=self.budget).order_by('date').values_list('net_amount', flat=True))
+        self.assertEqual(daily, [Decimal('987.50'), Decimal('-30.00')])
+
+    def test_default_category(self):
+        result = self.import_csv(f'date,type,amount\n{self.day()},expense,9\n'.encode(), default_category='food')
+        self.assertEqual(result.created, 1)
+        self.assertEqual(Transaction.objects.get(monthly_budget=self.budget).category, self.food)
+
+    def test_undecodable_file_keeps_committed_batches_summarized(self):
+        content = f'date,type,amount\n{self.day()},income,10\n{self.day()},income,5\n'.encode() + b'\xff\xfe,income,1\n'
+        result = self.import_csv(content, batch_size=1)
+
+        self.assertEqual(result.created, 2)
+        self.assertIn('UTF-8', result.error)
+        self.assertEqual(MonthlySummary.objects.get(monthly_budget=self.budget).total_income, Decimal('15.00'))
+
+    def test_ofx_import(self):
+        ofx = (
+            '<OFX><BANKTRANLIST>\n'
+            f'<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>{self.day().replace("-", "")}120000<TRNAMT>-20.00<NAME>Grocer</STMTTRN>\n'
+            f'<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>{self.day().replace("-", "")}<TRNAMT>250.00<MEMO>Refund</STMTTRN>\n'
+            '</BANKTRANLIST></OFX>\n'
+        ).encode('latin-1')
+        result = import_transactions(self.budget, io.BytesIO(ofx), 'ofx', default_category='Food')
+
+        self.assertEqual((result.created, result.failed), (2, 0))
+        self.assertEqual(
+            sorted(Transaction.objects.filter(monthly_budget=self.budget).values_list('transaction_type', 'amount', 'note')),
+            [('expense', Decimal('20.00'), 'Grocer'), ('income', Decimal('250.00'), 'Refund')],
+        )
+
+
+class ExportTests(BudgetTestCase):
+    """Exports stream only the user's rows, filtered and ordered, as CSV or NDJSON"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        start = cls.budget.start_date
+        for offset, amount in ((2, '30.00'), (0, '12.50'), (5, '7.25')):
+            Transaction.objects.create(monthly_budget=cls.budget, category=cls.food, transaction_type='expense',
+                                       amount=Decimal(amount), date=start + timedelta(days=offset), note=f'day {offset}')
+        other = User.objects.create_user('export-other@example.com', 'Other', 'password')
+        other_budget = MonthlyBudget.objects.create(user=other, start_date=start, total_budget=Decimal('10'))
+        Transaction.objects.create(monthly_budget=other_budget, transaction_type='income', amount=Decimal('1'), date=start)
+
+    def export(self, **params):
+        response = self.client.get(reverse('export_data'), params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv(self):
+        rows = list(csv.reader(io.StringIO(self.export(format='csv', kind='transactions'))))
+        self.assertEqual(rows[0][:5], ['transaction_id', 'budget_id', 'date', 'type', 'amount'])
+        self.assertEqual([row[4] for row in rows[1:]], ['12.50', '30.00', '7.25'])
+        self.assertEqual({row[5] for row in rows[1:]}, {'Food'})
+
+    def test_ndjson_with_date_range(self):
+        start = self.budget.start_date
+        lines = self.export(
+            format='ndjson', kind='transactions',
+            start=(start + timedelta(days=1)).isoformat(), end=(start + timedelta(days=4)).isoformat(),
+        ).splitlines()
+        self.assertEqual([json.loads(line)['note'] for line in lines], ['day 2'])
+
+    def test_budgets_include_summary_totals(self):
+        MonthlySummary.update_or_create_for_budget(self.budget)
+        rows = list(csv.DictReader(io.StringIO(self.export(kind='budgets'))))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual((rows[0]['total_expense'], rows[0]['remaining_balance']), ('49.75', '950.25'))
+
+    def test_budgets_of_an_overspent_month(self):
+        self.add_transaction('expense', '11000', category=self.rent)
+        [row] = csv.DictReader(io.StringIO(self.export(kind='budgets')))
+        self.assertEqual((row['total_expense'], row['savings_rate']), ('11000.00', str(-MAX_SAVINGS_RATE)))
+        [line] = self.export(format='ndjson', kind='budgets').splitlines()
+        self.assertEqual(Decimal(json.loads(line)['savings_rate']), -MAX_SAVINGS_RATE)
+
+    def test_rejects_unknown_format_and_kind(self):
+        self.assertEqual(self.client.get(reverse('export_data'), {'format': 'xml'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('export_data'), {'kind': 'users'}).status_code, 400)
+
+
+class DashboardCacheTests(BudgetTestCase):
+    """Dashboard data is served from the cache until a committed write bumps its user or budget version"""
+
+    def setUp(self):
+        super().setUp()
+        get_cache().clear()
+
+    def test_second_read_is_a_hit(self):
+        get_dashboard_data(self.user, self.budget)
+        with self.assertNumQueries(0):
+            get_dashboard_data(self.user, self.budget)
+        self.assertEqual((get_cache_stats()['hits'], get_cache_stats()['misses']), (1, 1))
+
+    def test_transaction_write_invalidates_after_commit(self):
+        self.assertEqual(get_dashboard_data(self.user, self.budget)['total_spent'], Decimal('0.00'))
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.add_transaction('expense', '25', category=self.food)
+        # Until the write commits, readers keep the old version
+        self.assertEqual(get_dashboard_data(self.user, self.budget)['total_spent'], Decimal('0.00'))
+        for callback in callbacks:
+            callback()
+        self.assertEqual(get_dashboard_data(self.user, self.budget)['total_spent'], Decimal('25.00'))
+
+    def test_goal_change_invalidates_every_dashboard_of_the_user(self):
+        self.assertEqual(get_dashboard_data(self.user, self.budget)['goals'], [])
+        with self.captureOnCommitCallbacks(execute=True):
+            goal = Goal.objects.create(user=self.user, title='Bike', target_amount=Decimal('400'), target_date=date(2030, 1, 1))
+        self.assertEqual(get_dashboard_data(self.user, self.budget)['goals'], [goal])
+
+    def test_version_bump_waits_for_the_commit(self):
+        other = MonthlyBudget.objects.create(
+            user=self.user, start_date=self.budget.start_date - timedelta(days=60), total_budget=Decimal('500'), is_active=False,
+        )
+        key, other_key = _dashboard_key(self.user.pk, self.budget.pk), _dashboard_key(self.user.pk, other.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            invalidate_budget(self.budget.pk)
+            self.assertEqual(_dashboard_key(self.user.pk, self.budget.pk), key)
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertNotEqual(_dashboard_key(self.user.pk, self.budget.pk), key)
+        self.assertEqual(_dashboard_key(self.user.pk, other.pk), other_key)
+
+        # A user bump reaches every budget of the user
+        key, other_key = _dashboard_key(self.user.pk, self.budget.pk), _dashboard_key(self.user.pk, other.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_user(self.user.pk)
+        self.assertNotEqual(_dashboard_key(self.user.pk, self.budget.pk), key)
+        self.assertNotEqual(_dashboard_key(self.user.pk, other.pk), other_key)
+
+    def test_rolled_back_write_keeps_the_version(self):
+        key = _dashboard_key(self.user.pk, self.budget.pk)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(ValueError), db_transaction.atomic():
+                self.food.save()
+                raise ValueError
+        self.assertEqual(callbacks, [])
+        self.assertEqual(_dashboard_key(self.user.pk, self.budget.pk), key)
+
+    def test_goal_progress_update_invalidates(self):
+        goal = Goal.objects.create(user=self.user, title='Bike', target_amount=Decimal('400'), target_date=date(2030, 1, 1))
+        get_dashboard_data(self.user, self.budget)
+        # Outside captureOnCommitCallbacks the budget bump of post_save never runs
+        txn = Transaction.objects.create(
+            monthly_budget=self.budget, transaction_type='income', amount=Decimal('50'), date=self.budget.start_date, goal=goal,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            Goal.apply_transaction(txn)
+        [cached] = get_dashboard_data(self.user, self.budget)['goals']
+        self.assertEqual(cached.current_progress, Decimal('50.00'))
+
+    @override_settings(DATABASE_ROUTERS=['backend.routers.ReadReplicaRouter'])
+    @mock.patch.object(routers, 'replica_enabled', return_value=True)
+    def test_miss_is_filled_from_the_primary(self, replica_enabled):
+        # No replica is configured here, so a query routed to it would fail
+        self.add_transaction('expense', '25', category=self.food)
+        router = routers.ReadReplicaRouter()
+
+        @routers.read_only_view
+        def view(request):
+            self.assertEqual(router.db_for_read(Transaction), routers.REPLICA_ALIAS)
+            data = get_dashboard_data(self.user, self.budget)
+            self.assertEqual(router.db_for_read(Transaction), routers.REPLICA_ALIAS)
+            return data
+
+        @routers.read_only_view
+        async def async_view(request):
+            return await aget_dashboard_data(self.user, self.budget)
+
+        self.assertEqual(view(RequestFactory().get('/'))['total_spent'], Decimal('25.00'))
+        get_cache().clear()
+        self.assertEqual(async_to_sync(async_view)(RequestFactory().get('/'))['total_spent'], Decimal('25.00'))
+
+    def test_evicted_version_starts_a_new_key(self):
+        key = _dashboard_key(self.user.pk, self.budget.pk)
+        get_cache().delete(_budget_version_key(self.budget.pk))
+        self.assertNotEqual(_dashboard_key(self.user.pk, self.budget.pk), key)
+
+
+class TransactionApiTests(BudgetTestCase):
+    """JSON API: validation answers 400, writes keep the summaries, and conditional GETs follow every change"""
+
+    def post(self, url, data, method='post'):
+        return getattr(self.client, method)(url, json.dumps(data), content_type='application/json')
+
+    def expense(self, **changes):
+        return {'type': 'expense', 'amount': '12.34', 'category_id': self.food.pk,
+                'date': self.budget.start_date.isoformat(), **changes}
+
+    def test_create_update_delete(self):
+        response = self.post(reverse('api_transactions'), self.expense())
+        self.assertEqual(response.status_code, 201)
+        url = reverse('api_transaction_detail', args=[response.json()['id']])
+
+        response = self.post(url, {'amount': '20', 'category_id': self.rent.pk}, method='patch')
+        self.assertEqual((response.status_code, Decimal(response.json()['amount'])), (200, Decimal('20')))
+        self.assertEqual(CategorySpend.objects.get(category=self.rent).total_spent, Decimal('20.00'))
+        self.assertEqual(CategorySpend.objects.get(category=self.food).total_spent, Decimal('0.00'))
+
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(MonthlySummary.objects.get(monthly_budget=self.budget).total_expense, Decimal('0.00'))
+
+    def test_malformed_fields_are_rejected(self):
+        for changes in (
+            {'category_id': 'abc'}, {'category_id': True}, {'goal_id': 'x'}, {'date': 20250101},
+            {'date': '01/02/2025'}, {'amount': 'Infinity'}, {'amount': '1e20'}, {'note': 5},
+            {'category_id': self.food.pk + 1000},
+        ):
+            with self.subTest(changes=changes):
+                self.assertEqual(self.post(reverse('api_transactions'), self.expense(**changes)).status_code, 400)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_malformed_category_filter(self):
+        self.assertEqual(self.client.get(reverse('api_transactions'), {'category': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('api_transactions'), {'category': self.food.pk}).status_code, 200)
+
+    def test_conditional_get_follows_transaction_and_category_changes(self):
+        url = reverse('api_category_summary')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.post(reverse('api_transactions'), self.expense())
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response['ETag']
+        self.food.category_name = 'Groceries'
+        self.food.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ConditionalGetTests(BudgetTestCase):
+    """The read API answers ETag and Last-Modified validators with 304 until the budget changes"""
+
+    def test_summary_validators(self):
+        url = reverse('api_budget_summary')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        for headers in ({'HTTP_IF_NONE_MATCH': etag}, {'HTTP_IF_MODIFIED_SINCE': last_modified}):
+            with self.subTest(headers=headers):
+                response = self.client.get(url, **headers)
+                self.assertEqual((response.status_code, response.content), (304, b''))
+                self.assertEqual(response['ETag'], etag)
+        self.assertEqual(self.client.head(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.budget.total_budget = Decimal('1200')
+            self.budget.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Decimal(response.json()['total_budget']), Decimal('1200'))
+
+    def test_validators_depend_on_the_query_string(self):
+        url = reverse('api_transactions')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(url, {'type': 'income'}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        # Search results span every budget of the user, so they carry no validators
+        response = self.client.get(url, {'q': 'rent'})
+        self.assertNotIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
+
+    def test_transaction_detail(self):
+        txn = self.add_transaction('expense', '12', category=self.food)
+        url = reverse('api_transaction_detail', args=[txn.pk])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        response = self.client.patch(url, json.dumps({'amount': '15'}), content_type='application/json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        # A write based on the old representation is refused
+        response = self.client.patch(url, json.dumps({'amount': '18'}), content_type='application/json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(Transaction.objects.get(pk=txn.pk).amount, Decimal('15.00'))
+
+    def test_validators_of_another_users_transaction(self):
+        txn = self.add_transaction('expense', '12', category=self.food)
+        etag = self.client.get(reverse('api_transaction_detail', args=[txn.pk]))['ETag']
+        other = User.objects.create_user('other@example.com', 'Other', 'password')
+        self.client.force_login(other)
+        response = self.client.get(reverse('api_transaction_detail', args=[txn.pk]), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 404)
+
+
+class AsyncViewTests(BudgetTestCase):
+    """The async read views answer like the sync ones, and only with the requesting user's data"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other = User.objects.create_user('async-other@example.com', 'Other', 'password')
+        other_budget = MonthlyBudget.objects.create(
+            user=cls.other, start_date=cls.budget.start_date, total_budget=Decimal('5000')
+        )
+        travel = Category.objects.create(
+            monthly_budget=other_budget, category_name='Travel', category_type='travel', allocated_amount=Decimal('900')
+        )
+        Transaction.objects.create(
+            monthly_budget=other_budget, category=travel, transaction_type='expense',
+            amount=Decimal('700'), date=other_budget.start_date, note='Flight',
+        )
+
+    def setUp(self):
+        super().setUp()
+        get_cache().clear()
+
+    def call(self, view, user=None, path='/', **headers):
+        request = AsyncRequestFactory().get(path, headers=headers)
+        request.user = user or self.user
+
+        async def auser():
+            return request.user
+        request.auser = auser
+        return async_to_sync(view)(request)
+
+    def rendered_context(self, view, user=None):
+        with mock.patch.object(async_views, 'render', return_value=HttpResponse()) as render:
+            self.call(view, user)
+        return render.call_args.args[2]
+
+    def test_summaries_match_the_sync_api(self):
+        self.add_transaction('expense', '40', category=self.food)
+        self.add_transaction('income', '100')
+        for async_view, sync_view in (
+            (async_views.budget_summary, api.budget_summary), (async_views.category_summary, api.category_summary),
+        ):
+            with self.subTest(view=async_view.__name__):
+                response = self.call(async_view)
+                self.assertEqual(response.status_code, 200)
+                request = RequestFactory().get('/')
+                request.user = self.user
+                self.assertEqual(json.loads(response.content), json.loads(sync_view(request).content))
+
+    def test_summaries_are_scoped_to_the_user(self):
+        self.add_transaction('expense', '40', category=self.food)
+        other = json.loads(self.call(async_views.budget_summary, self.other).content)
+        self.assertEqual(Decimal(other['total_budget']), Decimal('5000'))
+        self.assertNotEqual(other['budget']['id'], self.budget.pk)
+        mine = json.loads(self.call(async_views.category_summary).content)
+        self.assertEqual([item['name'] for item in mine['categories']], ['Food', 'Rent'])
+        self.assertEqual(Decimal(mine['categories'][0]['spent']), Decimal('40'))
+
+    def test_conditional_get(self):
+        etag = self.call(async_views.budget_summary)['ETag']
+        self.assertEqual(self.call(async_views.budget_summary, if_none_match=etag).status_code, 304)
+        # Another user's budget has its own validators
+        self.assertEqual(self.call(async_views.budget_summary, self.other, if_none_match=etag).status_code, 200)
+
+    def test_anonymous_and_budgetless_users(self):
+        self.assertEqual(self.call(async_views.budget_summary, AnonymousUser()).status_code, 401)
+        self.assertEqual(self.call(async_views.dashboard, AnonymousUser()).status_code, 302)
+        newcomer = User.objects.create_user('async-new@example.com', 'New', 'password')
+        self.assertEqual(self.call(async_views.category_summary, newcomer).status_code, 404)
+        self.assertEqual(self.call(async_views.dashboard, newcomer)['Location'], reverse('budget_setup'))
+
+    def test_dashboard_and_transactions_list(self):
+        txn = self.add_transaction('expense', '40', category=self.food, note='Groceries')
+        context = self.rendered_context(async_views.dashboard)
+        self.assertEqual(context['active_budget'], self.budget)
+        self.assertEqual(context['total_spent'], Decimal('40.00'))
+        self.assertEqual(list(context['recent_transactions']), [txn])
+
+        context = self.rendered_context(async_views.transactions_list)
+        self.assertEqual(list(context['transactions']), [txn])
+        self.assertEqual(list(context['categories']), [self.food, self.rent])
+        other = self.rendered_context(async_views.transactions_list, self.other)
+        self.assertEqual([t.note for t in other['transactions']], ['Flight'])
+
+
+class TrendsTests(BudgetTestCase):
+    """Budget history reads the summaries, including those of overspent budgets"""
+
+    def test_overspent_budget(self):
+        # 11 times the budget: the savings rate is clamped to what its column can hold
+        self.add_transaction('expense', '11000', category=self.rent)
+        response = self.client.get(reverse('api_trends'))
+        self.assertEqual(response.status_code, 200)
+        [budget] = response.json()['budgets']
+        self.assertEqual(Decimal(budget['savings_rate']), -MAX_SAVINGS_RATE)
+        self.assertEqual(Decimal(budget['total_expense']), Decimal('11000'))
+        self.assertEqual(self.client.get(reverse('trends')).status_code, 200)
+
+    def test_years_and_window_are_clamped(self):
+        response = self.client.get(reverse('api_trends'), {'years': 10 ** 9, 'window': -5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(reverse('api_trends'), {'period': 'decade'}).status_code, 400)
+
+
+class SimulationTests(BudgetTestCase):
+    """What-if projections are reproducible for a seed, and scenario input is bounded before it is simulated"""
+
+    def history(self, days=60):
+        # A noisy daily series, so the paths actually spread out
+        for offset in range(1, days + 1):
+            DailySummary.objects.create(
+                monthly_budget=self.budget, date=self.budget.start_date - timedelta(days=offset),
+                total_income=Decimal(40 + offset % 7 * 5), total_expense=Decimal(20 + offset % 5 * 8),
+            )
+
+    def test_without_history_every_path_follows_the_scenario(self):
+        goal = Goal.objects.create(user=self.user, title='Bike', target_amount=Decimal('1200'), target_date=date(2099, 1, 1))
+        result = simulate_budget(self.budget, Scenario(monthly_income=500, monthly_expense=100), months=3, paths=50, seed=1)
+        self.assertEqual(
+            [(month['p10'], month['p50'], month['p90']) for month in result['monthly_balance']],
+            [(400.0, 400.0, 400.0), (800.0, 800.0, 800.0), (1200.0, 1200.0, 1200.0)],
+        )
+        self.assertEqual(result['period']['projected_remaining'], {'p10': 1000.0, 'p50': 1000.0, 'p90': 1000.0})
+        [projection] = result['goals']
+        self.assertEqual(projection['goal'], goal)
+        self.assertEqual(projection['completion_probability'], 1.0)
+        self.assertEqual(projection['projected_completion_date'], timezone.localdate() + timedelta(days=90))
+
+    def test_seeded_runs_are_reproducible(self):
+        self.history()
+        self.add_transaction('expense', '120', category=self.food)
+        run = lambda seed: simulate_budget(self.budget, months=6, paths=200, seed=seed, today=self.budget.start_date)
+        first = run('abc')
+        self.assertEqual(run('abc'), first)
+        self.assertNotEqual(run('xyz')['monthly_balance'], first['monthly_balance'])
+        for percentiles in [first['period']['projected_remaining'], *first['monthly_balance']]:
+            self.assertLessEqual(percentiles['p10'], percentiles['p50'])
+            self.assertLessEqual(percentiles['p50'], percentiles['p90'])
+        self.assertLess(first['monthly_balance'][-1]['p10'], first['monthly_balance'][-1]['p90'])
+
+    def test_months_and_paths_are_clamped(self):
+        result = simulate_budget(self.budget, months=10 ** 6, paths=-3, seed=1)
+        self.assertEqual((result['months'], result['paths']), (MAX_MONTHS, 1))
+        self.assertEqual(len(result['monthly_balance']), MAX_MONTHS)
+
+    def test_scenario_bounds(self):
+        for query in ('income=inf', 'expense=nan', f'income={MAX_SCENARIO_VALUE * 10}', 'income=abc', 'cut=food',
+                      'cut=food:1e400', 'raise=:10'):
+            with self.subTest(query=query):
+                with self.assertRaises(InvalidScenario):
+                    Scenario.from_query(QueryDict(query))
+        self.assertEqual(Scenario.from_query(QueryDict('cut=Food:150')).multiplier_for(self.food), 0.0)
+
+    def test_api(self):
+        response = self.client.get(reverse('api_simulate'), {'seed': 7, 'months': 2, 'paths': 10, 'cut': 'food:50'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), self.client.get(
+            reverse('api_simulate'), {'seed': 7, 'months': 2, 'paths': 10, 'cut': 'food:50'}
+        ).json())
+        self.assertEqual([item['name'] for item in response.json()['categories']], ['Food', 'Rent'])
+
+        response = self.client.get(reverse('api_simulate'), {'months': 'abc'})
+        self.assertEqual((response.status_code, response.json()), (400, {'errors': ['months and paths must be integers']}))
+        response = self.client.get(reverse('api_simulate'), {'income': 'inf'})
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn('inf', response.json()['errors'][0])
+
+
+class SearchTests(BudgetTestCase):
+    """Note search spans every budget of the user, archived rows included, and only that user's rows"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        old = MonthlyBudget.objects.create(
+            user=cls.user, start_date=cls.budget.start_date - timedelta(days=60), total_budget=Decimal('500'), is_active=False,
+        )
+        today = cls.budget.start_date
+        cls.hot = Transaction.objects.create(
+            monthly_budget=cls.budget, category=cls.food, transaction_type='expense',
+            amount=Decimal('30'), date=today, note='Weekly groceries',
+        )
+        cls.salary = Transaction.objects.create(
+            monthly_budget=cls.budget, transaction_type='income', amount=Decimal('900'), date=today, note='Salary',
+        )
+        cls.archived = Transaction.objects.create(
+            monthly_budget=old, transaction_type='expense', amount=Decimal('12'), date=old.start_date, note='Groceries and snacks',
+        )
+        archive_batch([old.pk])
+        other = User.objects.create_user('searcher@example.com', 'Other', 'password')
+        other_budget = MonthlyBudget.objects.create(user=other, start_date=today, total_budget=Decimal('10'))
+        Transaction.objects.create(
+            monthly_budget=other_budget, transaction_type='expense', amount=Decimal('5'), date=today, note='groceries',
+        )
+
+    def result_ids(self, query, **filters):
+        return {t.pk for t in search.search_transactions(self.user, query, **filters)}
+
+    def test_prefix_search_includes_archived_rows(self):
+        self.assertEqual(self.result_ids('GROC'), {self.hot.pk, self.archived.pk})
+        self.assertEqual(self.result_ids('groceries snacks'), {self.archived.pk})
+        self.assertEqual(self.result_ids('rent'), set())
+
+    def test_filters(self):
+        self.assertEqual(self.result_ids('groceries', category_id=self.food.pk), {self.hot.pk})
+        self.assertEqual(self.result_ids('groceries', date_to=self.budget.start_date - timedelta(days=1)), {self.archived.pk})
+        self.assertEqual(self.result_ids('salary', transaction_type='expense'), set())
+
+    def test_query_syntax_is_not_passed_through(self):
+        self.assertEqual(self.result_ids('note:" OR * ('), set())
+        # OR is just another word every note has to contain
+        self.assertEqual(self.result_ids('groceries" OR "salary'), set())
+
+    def test_paging(self):
+        first = search.search_transactions(self.user, 'groceries', page_size=1)
+        self.assertEqual((len(first), first.next_page), (1, 2))
+        second = search.search_transactions(self.user, 'groceries', page=2, page_size=1)
+        self.assertEqual((second.next_page, second.prev_page), (None, 1))
+        self.assertNotEqual(first.items[0].pk, second.items[0].pk)
+        self.assertEqual(search.get_search_page('1000'), search.MAX_SEARCH_PAGE)
+
+    def test_fallback_without_full_text_index(self):
+        with mock.patch.object(search, '_ranked_ids', return_value=None):
+            self.assertEqual(self.result_ids('groc'), {self.hot.pk, self.archived.pk})
+
+    def test_api_search_has_no_validators(self):
+        url = reverse('api_transactions')
+        response = self.client.get(url, {'q': 'groceries'})
+        self.assertEqual(len(response.json()['results']), 2)
+        self.assertFalse(response.has_header('ETag'))
+        self.assertTrue(self.client.get(url).has_header('ETag'))
+
+
+class JobQueueTests(BudgetTestCase):
+    """Summary jobs are deduplicated, claimed once, and retried with backoff until they give up"""
+
+    def test_pending_jobs_are_deduplicated(self):
+        day = self.budget.start_date
+        Job.enqueue_summary_jobs(self.budget, [day, day])
+        Job.enqueue_summary_jobs(self.budget, [day])
+        self.assertEqual(
+            sorted(Job.objects.values_list('kind', flat=True)),
+            ['category_spend', 'daily_summary', 'goal_progress', 'monthly_summary'],
+        )
+
+    def test_claimed_jobs_are_not_claimed_again(self):
+        Job.enqueue_summary_jobs(self.budget, [self.budget.start_date])
+        self.assertEqual(len(jobs.claim('worker-1')), 4)
+        self.assertEqual(jobs.claim('worker-2'), [])
+        self.assertEqual(set(Job.objects.values_list('status', 'locked_by', 'attempts')), {(Job.RUNNING, 'worker-1', 1)})
+
+    def test_jobs_rebuild_summaries(self):
+        Transaction.objects.create(
+            monthly_budget=self.budget, category=self.food, transaction_type='expense',
+            amount=Decimal('42.50'), date=self.budget.start_date,
+        )
+        Job.enqueue_summary_jobs(self.budget, [self.budget.start_date])
+        self.assertEqual(jobs.run_pending('worker'), (4, 0))
+        self.assertFalse(Job.objects.exists())
+        self.assertEqual(MonthlySummary.objects.get(monthly_budget=self.budget).total_expense, Decimal('42.50'))
+        self.assertEqual(self.food.spend.total_spent, Decimal('42.50'))
+
+    def test_failures_back_off_then_give_up(self):
+        def fail(job):
+            raise RuntimeError('boom')
+
+        Job.enqueue([Job.build('flaky', self.budget)])
+        with mock.patch.dict(jobs.HANDLERS, {'flaky': fail}), mock.patch.object(jobs, 'MAX_ATTEMPTS', 2), \
+                self.assertLogs(jobs.logger, 'WARNING'):
+            self.assertEqual(jobs.run_pending('worker'), (0, 1))
+            job = Job.objects.get()
+            self.assertEqual(job.status, Job.PENDING)
+            self.assertIn('RuntimeError: boom', job.last_error)
+            self.assertGreaterEqual(job.run_after, timezone.now() + timedelta(seconds=jobs.retry_delay(1) - 1))
+            # Not due yet
+            self.assertEqual(jobs.run_pending('worker'), (0, 0))
+            Job.objects.update(run_after=timezone.now())
+            self.assertEqual(jobs.run_pending('worker'), (0, 1))
+        self.assertEqual(Job.objects.get().status, Job.FAILED)
+
+    def test_unknown_kind_fails_at_once(self):
+        Job.enqueue([Job.build('nonexistent', self.budget)])
+        with self.assertLogs(jobs.logger, 'WARNING'):
+            self.assertEqual(jobs.run_pending('worker'), (0, 1))
+        self.assertEqual(Job.objects.get().status, Job.FAILED)
+
+    def test_stale_running_jobs_are_requeued(self):
+        Job.enqueue([Job.build('monthly_summary', self.budget)])
+        jobs.claim('dead-worker')
+        Job.objects.update(locked_at=timezone.now() - timedelta(seconds=jobs.STALE_AFTER + 1))
+        self.assertEqual(jobs.requeue_stale(), 1)
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.locked_by), (Job.PENDING, ''))
+
+    def test_retry_delay_is_capped(self):
+        self.assertEqual(jobs.retry_delay(1), jobs.RETRY_DELAY)
+        self.assertEqual(jobs.retry_delay(3), jobs.RETRY_DELAY * 4)
+        self.assertEqual(jobs.retry_delay(100), jobs.MAX_RETRY_DELAY)
+
+
+class AdminTests(BudgetTestCase):
+    """Big changelists page by primary key, search by exact owner email and never count the whole table"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admin = User.objects.create_superuser('admin@example.com', 'Admin', 'password')
+        cls.transactions = Transaction.objects.bulk_create([
+            Transaction(monthly_budget=cls.budget, transaction_type='expense', amount=Decimal(i + 1), date=cls.budget.start_date)
+            for i in range(5)
+        ])
+        other = User.objects.create_user('other@example.com', 'Other', 'password')
+        other_budget = MonthlyBudget.objects.create(user=other, start_date=cls.budget.start_date, total_budget=Decimal('10'))
+        Transaction.objects.create(monthly_budget=other_budget, transaction_type='income', amount=Decimal('7'), date=cls.budget.start_date)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def changelist(self, **params):
+        url = reverse('admin:Budgeting_transaction_changelist')
+        with mock.patch.object(budget_admin.TransactionAdmin, 'list_per_page', 2):
+            return self.client.get(url, params)
+
+    def test_keyset_pages(self):
+        pks = sorted(Transaction.objects.values_list('pk', flat=True), reverse=True)
+        first = self.changelist()
+        self.assertEqual([row.pk for row in first.context['cl'].result_list], pks[:2])
+        second = self.changelist(before=pks[1])
+        self.assertEqual([row.pk for row in second.context['cl'].result_list], pks[2:4])
+        self.assertIsNotNone(second.context['cl'].newest_url)
+        last = self.changelist(before=pks[3])
+        self.assertEqual([row.pk for row in last.context['cl'].result_list], pks[4:])
+        self.assertIsNone(last.context['cl'].older_url)
+
+    def test_invalid_cursor(self):
+        self.assertRedirects(self.changelist(before='x'), reverse('admin:Budgeting_transaction_changelist') + '?e=1')
+
+    def test_search_by_exact_owner_email(self):
+        response = self.changelist(q=' Other@Example.com ')
+        self.assertEqual([row.amount for row in response.context['cl'].result_list], [Decimal('7.00')])
+
+    def test_paginator_count(self):
+        queryset = Transaction.objects.all()
+        with mock.patch.object(budget_admin, 'estimate_row_count', return_value=budget_admin.ESTIMATE_THRESHOLD):
+            self.assertEqual(budget_admin.EstimatedCountPaginator(queryset, 10).count, budget_admin.ESTIMATE_THRESHOLD)
+            # Filtered lists count, up to COUNT_LIMIT rows
+            filtered = queryset.filter(transaction_type='expense')
+            self.assertEqual(budget_admin.EstimatedCountPaginator(filtered, 10).count, 5)
+            with mock.patch.object(budget_admin, 'COUNT_LIMIT', 3):
+                self.assertEqual(budget_admin.EstimatedCountPaginator(filtered, 10).count, 3)
+        # Small tables are counted exactly
+        self.assertEqual(budget_admin.EstimatedCountPaginator(queryset, 10).count, 6)
+
+    def test_rebuild_summaries_action(self):
+        url = reverse('admin:Budgeting_monthlybudget_changelist')
+        data = {'action': 'rebuild_summaries', '_selected_action': [self.budget.pk]}
+        self.client.post(url, data)
+        self.assertEqual(MonthlySummary.objects.get(monthly_budget=self.budget).total_expense, Decimal('15.00'))
+        with mock.patch.object(budget_admin, 'INLINE_REBUILD_LIMIT', 0):
+            self.client.post(url, data)
+        self.assertEqual(list(Job.objects.values_list('kind', 'monthly_budget')), [('rebuild_summaries', self.budget.pk)])
+
+
+class RolloverTests(TestCase):
+    """Ended budgets roll into the next period with their categories; a conflicting user does not block the others"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.localdate()
+        cls.start = cls.today - timedelta(days=31)
+        cls.budgets = []
+        for name in ('alice', 'bob'):
+            user = User.objects.create_user(f'{name}@rollover.example.com', name, 'password')
+            budget = MonthlyBudget.objects.create(user=user, start_date=cls.start, total_budget=Decimal('800'))
+            Category.objects.create(
+                monthly_budget=budget, category_name='Food', category_type='food', allocated_amount=Decimal('250')
+            )
+            Transaction.objects.create(
+                monthly_budget=budget, transaction_type='expense', amount=Decimal('60'), date=cls.start,
+            )
+            cls.budgets.append(budget)
+
+    def successor(self, budget):
+        return MonthlyBudget.objects.filter(user_id=budget.user_id, start_date__gt=budget.start_date).first()
+
+    def test_rollover(self):
+        self.assertEqual(rollover.run_rollover(self.today), {'closed': 2, 'created': 2, 'categories': 2, 'failed': 0})
+        for budget in self.budgets:
+            new = self.successor(budget)
+            self.assertEqual((new.start_date, new.end_date), (self.today, self.today + timedelta(days=30)))
+            self.assertTrue(new.is_active)
+            self.assertEqual(new.total_budget, Decimal('800.00'))
+            self.assertEqual(
+                list(new.categories.values_list('category_name', 'allocated_amount')), [('Food', Decimal('250.00'))]
+            )
+            self.assertFalse(MonthlyBudget.objects.get(pk=budget.pk).is_active)
+            summary = MonthlySummary.objects.get(monthly_budget=budget)
+            self.assertTrue(summary.is_finalized)
+            self.assertEqual(summary.total_expense, Decimal('60.00'))
+        # Nothing is left to roll over
+        self.assertEqual(rollover.run_rollover(self.today)['closed'], 0)
+
+    def test_dry_run_changes_nothing(self):
+        self.assertEqual(rollover.run_rollover(self.today, dry_run=True)['created'], 2)
+        self.assertEqual(MonthlyBudget.objects.filter(is_active=True).count(), 2)
+
+    def test_user_with_a_newer_budget_is_only_closed(self):
+        alice, bob = self.budgets
+        MonthlyBudget.objects.create(user_id=bob.user_id, start_date=self.today, total_budget=Decimal('100'))
+        stats = rollover.run_rollover(self.today)
+        self.assertEqual((stats['closed'], stats['created']), (2, 1))
+        self.assertFalse(MonthlyBudget.objects.get(pk=bob.pk).is_active)
+        self.assertEqual(self.successor(bob).total_budget, Decimal('100.00'))
+
+    def test_conflict_only_holds_back_that_user(self):
+        alice, bob = self.budgets
+        # Bob's next period appears after the run has read the ended budgets
+        MonthlyBudget.objects.create(user_id=bob.user_id, start_date=self.today, total_budget=Decimal('100'), is_active=False)
+        stale = MonthlyBudget.objects.filter(is_active=True, end_date__lt=self.today).annotate(has_newer=Value(False))
+        with mock.patch.object(rollover, 'ended_budgets', return_value=stale), self.assertLogs(rollover.logger, 'WARNING'):
+            stats = rollover.run_rollover(self.today, batch_size=10)
+        self.assertEqual(stats, {'closed': 1, 'created': 1, 'categories': 1, 'failed': 1})
+        self.assertTrue(self.successor(alice).is_active)
+        self.assertTrue(MonthlyBudget.objects.get(pk=bob.pk).is_active)
+
+    def test_missed_periods_are_skipped(self):
+        start, end = rollover.next_period(date(2024, 1, 1), date(2024, 1, 10), date(2024, 2, 5))
+        self.assertEqual((start, end), (date(2024, 1, 31), date(2024, 2, 9)))
+
+
+class GoalProgressTests(BudgetTestCase):
+    """Goal progress follows linked transactions; hand-entered progress and completion are left alone"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.savings = Category.objects.create(
+            monthly_budget=cls.budget, category_name='Savings', category_type='savings', allocated_amount=Decimal('100')
+        )
+
+    def goal(self, **fields):
+        return Goal.objects.create(
+            user=self.user, title='Trip', target_amount=Decimal('100'), target_date=date(2030, 1, 1), **fields
+        )
+
+    def assertGoal(self, goal, progress, completed):
+        goal.refresh_from_db()
+        self.assertEqual((goal.current_progress, goal.is_completed), (Decimal(progress), completed))
+
+    def test_tagged_transaction_completes_and_reopens(self):
+        goal = self.goal()
+        txn = self.add_transaction('income', '100', goal=goal.pk)
+        self.assertGoal(goal, '100.00', True)
+        self.delete_transaction(txn)
+        self.assertGoal(goal, '0.00', False)
+        Goal.rebuild_for_user(self.user.pk)
+        self.assertGoal(goal, '0.00', False)
+
+    def test_category_type_progress(self):
+        goal = self.goal(category_type='savings')
+        self.add_transaction('expense', '60', category=self.savings)
+        self.add_transaction('expense', '25', category=self.food)
+        self.assertGoal(goal, '60.00', False)
+        Goal.objects.filter(pk=goal.pk).update(current_progress=0)
+        self.assertEqual(Goal.rebuild_for_user(self.user.pk), 1)
+        self.assertGoal(goal, '60.00', False)
+
+    def test_rebuild_keeps_hand_entered_progress(self):
+        goal = self.goal(current_progress=Decimal('40'))
+        self.assertEqual(Goal.rebuild_for_user(self.user.pk), 0)
+        self.assertGoal(goal, '40.00', False)
+
+    def test_malformed_goal_is_a_form_error(self):
+        data = {'transaction_type': 'income', 'amount': '10', 'date': self.budget.start_date.isoformat(), 'goal': 'abc'}
+        response = self.client.post(reverse('add_transaction'), data)
+        self.assertIn('Please select a valid goal', response.context['errors'])
+        self.assertFalse(Transaction.objects.exists())
+        txn = self.add_transaction('income', '10')
+        response = self.client.post(reverse('edit_transaction', args=[txn.pk]), dict(data, goal='1.5'))
+        self.assertIn('Please select a valid goal', response.context['errors'])
+        self.assertIsNone(Transaction.objects.get(pk=txn.pk).goal_id)
+
+    def test_hand_completed_goal_stays_completed(self):
+        goal = self.goal(category_type='savings', marked_completed=True)
+        self.assertGoal(goal, '0.00', True)
+        txn = self.add_transaction('expense', '30', category=self.savings)
+        self.delete_transaction(txn)
+        Goal.rebuild_for_user(self.user.pk)
+        self.assertGoal(goal, '0.00', True)
+
+
+class ArchiveTests(TestCase):
+    """Archiving moves the transactions of old closed budgets and leaves their finalized summaries untouched"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('archive@example.com', 'Archiver', 'password')
+        today = timezone.localdate()
+        cls.old, cls.recent, cls.unfinalized = [
+            MonthlyBudget.objects.create(user=cls.user, start_date=start, total_budget=Decimal('500'), is_active=False)
+            for start in (today - timedelta(days=500), today - timedelta(days=60), today - timedelta(days=450))
+        ]
+        food = Category.objects.create(
+            monthly_budget=cls.old, category_name='Food', category_type='food', allocated_amount=Decimal('200')
+        )
+        for budget in (cls.old, cls.recent, cls.unfinalized):
+            Transaction.objects.bulk_create([
+                Transaction(monthly_budget=budget, category=food if budget == cls.old else None, transaction_type='expense',
+                            amount=Decimal('40.25'), date=budget.start_date + timedelta(days=i))
+                for i in range(3)
+            ] + [Transaction(monthly_budget=budget, transaction_type='income', amount=Decimal('300'), date=budget.start_date)])
+        budget_ids = [cls.old.pk, cls.recent.pk, cls.unfinalized.pk]
+        DailySummary.rebuild_for_budgets(budget_ids)
+        CategorySpend.rebuild_for_budgets(budget_ids)
+        MonthlySummary.rebuild_for_budgets([cls.old.pk, cls.recent.pk], finalize=True)
+        MonthlySummary.rebuild_for_budgets([cls.unfinalized.pk])
+
+    def summaries(self, budget):
+        return (
+            list(DailySummary.objects.filter(monthly_budget=budget).order_by('date').values_list('date', 'total_expense')),
+            MonthlySummary.objects.filter(monthly_budget=budget).values_list('total_income', 'total_expense').get(),
+            list(CategorySpend.objects.filter(monthly_budget=budget).values_list('total_spent', 'transaction_count')),
+        )
+
+    def test_only_old_finalized_budgets_are_archived(self):
+        self.assertEqual(run_archive(dry_run=True), {'budgets': 1, 'transactions': 4})
+        before = self.summaries(self.old)
+        self.assertEqual(run_archive(batch_size=3), {'budgets': 1, 'transactions': 4})
+        self.assertFalse(Transaction.objects.filter(monthly_budget=self.old).exists())
+        self.assertEqual(ArchivedTransaction.objects.filter(monthly_budget=self.old).count(), 4)
+        self.assertEqual(Transaction.objects.count(), 8)
+        self.assertEqual(self.summaries(self.old), before)
+        self.assertEqual(run_archive(), {'budgets': 0, 'transactions': 0})
+
+    def test_rebuilds_skip_archived_budgets(self):
+        before = self.summaries(self.old)
+        run_archive()
+        old = MonthlyBudget.objects.get(pk=self.old.pk)
+        call_command('rebuild_summaries', stdout=io.StringIO())
+        MonthlySummary.update_or_create_for_budget(old)
+        DailySummary.update_or_create_for_date(old, old.start_date)
+        self.assertEqual(self.summaries(old), before)
+
+    def test_totals_of_an_archived_budget_come_from_its_summary(self):
+        run_archive()
+        old = MonthlyBudget.objects.get(pk=self.old.pk)
+        expected = {'total_income': Decimal('300.00'), 'total_spent': Decimal('120.75'), 'remaining_balance': Decimal('379.25')}
+        with self.assertNumQueries(1):
+            totals = get_budget_totals(old)
+        self.assertEqual({key: totals[key] for key in expected}, expected)
+        totals = async_to_sync(aget_budget_totals)(old)
+        self.assertEqual({key: totals[key] for key in expected}, expected)
+
+
+@mock.patch.object(routers, 'replica_enabled', return_value=True)
+class ReadReplicaRoutingTests(SimpleTestCase):
+    """Only Budgeting reads of read-only GET views go to the replica, and a write pins the browser to the primary"""
+    router = routers.ReadReplicaRouter()
+
+    def read_databases(self, request):
+        """The databases the router picks for a Budgeting and a UserAuth read while a read-only view runs"""
+        @routers.read_only_view
+        def view(request):
+            return HttpResponse(f'{self.router.db_for_read(Transaction)},{self.router.db_for_read(User)}')
+        return view(request).content.decode().split(',')
+
+    def test_get_reads_budgeting_models_from_the_replica(self, replica_enabled):
+        self.assertEqual(self.read_databases(RequestFactory().get('/')), [routers.REPLICA_ALIAS, 'None'])
+        # Outside the view everything reads the primary again
+        self.assertIsNone(self.router.db_for_read(Transaction))
+
+    def test_async_view(self, replica_enabled):
+        @routers.read_only_view
+        async def view(request):
+            return HttpResponse(self.router.db_for_read(Transaction))
+        self.assertEqual(async_to_sync(view)(RequestFactory().get('/')).content, routers.REPLICA_ALIAS.encode())
+
+    def test_primary_for_writes_and_pinned_browsers(self, replica_enabled):
+        self.assertEqual(self.read_databases(RequestFactory().post('/')), ['None', 'None'])
+        pinned = RequestFactory().get('/')
+        pinned.COOKIES[routers.PIN_COOKIE] = '1'
+        self.assertEqual(self.read_databases(pinned), ['None', 'None'])
+        self.assertEqual(self.router.db_for_write(Transaction), 'default')
+        self.assertFalse(self.router.allow_migrate(routers.REPLICA_ALIAS, 'Budgeting'))
+
+    def test_successful_write_sets_the_pin_cookie(self, replica_enabled):
+        def respond(status):
+            return routers.ReplicaPinMiddleware(lambda request: HttpResponse(status=status))
+
+        self.assertIn(routers.PIN_COOKIE, respond(302)(RequestFactory().post('/')).cookies)
+        self.assertNotIn(routers.PIN_COOKIE, respond(400)(RequestFactory().post('/')).cookies)
+        self.assertNotIn(routers.PIN_COOKIE, respond(200)(RequestFactory().get('/')).cookies)
+
+
+class SessionRefreshTests(BudgetTestCase):
+    """Polling pages must not write the session each time; it is re-saved once per SESSION_REFRESH_INTERVAL"""
+
+    def dashboard_saves(self, requests=3, now=None):
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        with mock.patch.object(store, 'save', autospec=True, side_effect=store.save) as save, \
+                mock.patch('UserAuth.middleware.time.time', return_value=now or time.time()):
+            for _ in range(requests):
+                self.assertEqual(self.client.get(reverse('budgeting_dashboard')).status_code, 200)
+        return save.call_count
+
+    def test_unchanged_session_is_saved_once_per_interval(self):
+        now = time.time()
+        # The first request stamps the session; the following ones leave it alone
+        self.assertEqual(self.dashboard_saves(now=now), 1)
+        self.assertEqual(self.dashboard_saves(now=now + settings.SESSION_REFRESH_INTERVAL - 1), 0)
+        self.assertEqual(self.dashboard_saves(now=now + settings.SESSION_REFRESH_INTERVAL), 1)
+
+
+class BenchmarkQueryCountTests(TestCase):
+    """Every benchmarked view must stay within the query counts recorded in benchmark_baseline.json"""
+
+    databases = '__all__'
+
+    def test_query_counts_within_baseline(self):
+        results = run_benchmarks(iterations=2, transactions=100)
+        baseline = json.loads(DEFAULT_BASELINE.read_text())
+
+        self.assertEqual(set(results['cases']), set(baseline['cases']))
+        self.assertEqual(compare_results(results, baseline, latency_tolerance=None), [])
@@ -0,0 +1,166 @@
+"""
+Cross-budget history computed from the DailySummary, MonthlySummary and
+CategorySpend rollups. Periods, previous-period values and rolling averages
+are all produced by one grouped query with window functions, so the cost
+depends on the number of periods and never on the number of transactions.
+"""
+from datetime import timedelta
+from django.db.models import F, Func, RowRange, Sum, Window
+from django.db.models.functions import Coalesce, Lag, TruncMonth, TruncWeek
+from .aggregation import to_money
+from .fields import MoneyField
+from .models import MonthlyBudget, DailySummary, MonthlySummary, CategorySpend
+
+PERIODS = {
+    'month': TruncMonth,
+    'week': TruncWeek,
+}
+DEFAULT_ROLLING_WINDOW = 3
+MAX_ROLLING_WINDOW = 24
+# years comes from the query string; a larger value would push the start date past date.min
+MAX_YEARS = 100
+
+MONEY = MoneyField()
+
+
+class WindowAvg(Func):
+    """AVG() over an aggregate, e.g. AVG(SUM(total_expense)) OVER (...)"""
+    function = 'AVG'
+    window_compatible = True
+
+
+def _change(current, previous):
+    """Percentage change from previous to current, None when there is nothing to compare"""
+    if previous is None or previous == 0:
+        return None
+    return round((current - previous) / previous * 100, 2)
+
+
+def get_period_trends(user, period='month', start=None, end=None, window=DEFAULT_ROLLING_WINDOW):
+    """
+    Income, expense and net per calendar month (or week) across all of a user's
+    budgets, with the previous period's values and a rolling average over the
+    last `window` periods.
+    """
+    trunc = PERIODS[period]
+    window = max(1, min(int(window), MAX_ROLLING_WINDOW))
+    summaries = DailySummary.objects.filter(monthly_budget__user=user)
+    if start:
+        summaries = summaries.filter(date__gte=start)
+    if end:
+        summaries = summaries.filter(date__lte=end)
+
+    income = Sum('total_income', output_field=MONEY)
+    expense = Sum('total_expense', output_field=MONEY)
+    ordering = F('period').asc()
+    frame = RowRange(start=-(window - 1), end=0)
+    rows = summaries.order_by().annotate(period=trunc('date')).values('period').annotate(
+        income=income,
+        expense=expense,
+    ).annotate(
+        previous_income=Window(Lag(income), order_by=ordering),
+        previous_expense=Window(Lag(expense), order_by=ordering),
+        rolling_income=Window(WindowAvg(income, output_field=MONEY), order_by=ordering, frame=frame),
+        rolling_expense=Window(WindowAvg(expense, output_field=MONEY), order_by=ordering, frame=frame),
+    ).order_by('period')
+
+    trends = []
+    for row in rows:
+        income_total = to_money(row['income'])
+        expense_total = to_money(row['expense'])
+        previous_income = to_money(row['previous_income']) if row['previous_income'] is not None else None
+        previous_expense = to_money(row['previous_expense']) if row['previous_expense'] is not None else None
+        trends.append({
+            'period': row['period'],
+            'income': income_total,
+            'expense': expense_total,
+            'net': income_total - expense_total,
+            'income_change': _change(income_total, previous_income),
+            'expense_change': _change(expense_total, previous_expense),
+            'rolling_income': to_money(row['rolling_income']),
+            'rolling_expense': to_money(row['rolling_expense']),
+        })
+    return trends
+
+
+def get_budget_history(user, limit=None):
+    """Every budget of a user with its MonthlySummary totals and the change from the previous budget"""
+    ordering = F('monthly_budget__start_date').asc()
+    rows = MonthlySummary.objects.filter(monthly_budget__user=user).annotate(
+        previous_expense=Window(Lag('total_expense'), order_by=ordering),
+        previous_income=Window(Lag('total_income'), order_by=ordering),
+    ).values(
+        'monthly_budget_id', 'monthly_budget__start_date', 'monthly_budget__end_date',
+        'monthly_budget__total_budget', 'total_income', 'total_expense', 'savings_rate',
+        'previous_income', 'previous_expense',
+    ).order_by('-monthly_budget__start_date')
+    if limit:
+        rows = rows[:limit]
+
+    return [{
+        'budget_id': row['monthly_budget_id'],
+        'start_date': row['monthly_budget__start_date'],
+        'end_date': row['monthly_budget__end_date'],
+        'total_budget': row['monthly_budget__total_budget'],
+        'total_income': row['total_income'],
+        'total_expense': row['total_expense'],
+        'savings_rate': row['savings_rate'],
+        'income_change': _change(row['total_income'], row['previous_income']),
+        'expense_change': _change(row['total_expense'], row['previous_expense']),
+    } for row in rows]
+
+
+def get_category_drift(user, budgets=6):
+    """
+    Spending per category across the user's last `budgets` budgets. Categories
+    are matched between budgets by type (custom ones by name); each entry has
+    the spend of every budget and its change from the previous one.
+    """
+    category_key = Coalesce('category__category_type', 'category__category_name')
+    oldest = MonthlyBudget.objects.filter(user=user).order_by('-start_date').values_list(
+        'start_date', flat=True
+    )[budgets - 1:budgets].first()
+    rows = CategorySpend.objects.filter(monthly_budget__user=user).annotate(
+        key=category_key,
+        previous_spent=Window(
+            Lag('total_spent'), partition_by=category_key, order_by=F('monthly_budget__start_date').asc()
+        ),
+    ).values(
+        'key', 'category__category_name', 'category__allocated_amount', 'monthly_budget_id',
+        'monthly_budget__start_date', 'total_spent', 'previous_spent',
+    ).order_by('key', 'monthly_budget__start_date')
+
+    drift = {}
+    for row in rows:
+        # The window runs over the full history so the oldest kept budget still has its previous value
+        if oldest and row['monthly_budget__start_date'] < oldest:
+            continue
+        entry = drift.setdefault(row['key'], {'category': row['category__category_name'], 'budgets': []})
+        allocated = row['category__allocated_amount']
+        entry['budgets'].append({
+            'budget_id': row['monthly_budget_id'],
+            'start_date': row['monthly_budget__start_date'],
+            'allocated': allocated,
+            'spent': row['total_spent'],
+            'percentage': round(row['total_spent'] / allocated * 100, 2) if allocated > 0 else 0,
+            'change': _change(row['total_spent'], row['previous_spent']),
+        })
+    return list(drift.values())
+
+
+def get_trends(user, period='month', years=5, window=DEFAULT_ROLLING_WINDOW, today=None):
+    """
+    Everything the trends page shows: period series, budget history and category
+    drift. The series covers the last `years` years (0 for the whole history).
+    """
+    years = max(0, min(int(years), MAX_YEARS))
+    window = max(1, min(int(window), MAX_ROLLING_WINDOW))
+    start = (today - timedelta(days=365 * years)) if today and years else None
+    return {
+        'period': period,
+        'window': window,
+        'years': years,
+        'series': get_period_trends(user, period, start=start, end=today, window=window),
+        'budgets': get_budget_history(user),
+        'categories': get_category_drift(user),
+    }
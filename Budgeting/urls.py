@@ -1,9 +1,16 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from backend.routers import read_only_view
+from . import api, async_views, views
+
+# Read-heavy views served by the async ORM when running under ASGI;
+# read_only_view sends their queries to the read replica when one is configured
+read_views = async_views if getattr(settings, 'BUDGETING_ASYNC_VIEWS', False) else views
+read_api = async_views if getattr(settings, 'BUDGETING_ASYNC_VIEWS', False) else api
 
 urlpatterns = [
     # Dashboard
-    path('dashboard/', views.dashboard, name='budgeting_dashboard'),
+    path('dashboard/', read_only_view(read_views.dashboard), name='budgeting_dashboard'),
     
     # Budget Setup
     path('budget/setup/', views.budget_setup, name='budget_setup'),
@@ -11,9 +18,30 @@ urlpatterns = [
     path('category/<int:category_id>/delete/', views.delete_category, name='delete_category'),
     
     # Transactions
-    path('transactions/', views.transactions_list, name='transactions_list'),
+    path('transactions/', read_only_view(read_views.transactions_list), name='transactions_list'),
     path('transactions/add/', views.add_transaction, name='add_transaction'),
     path('transactions/<int:transaction_id>/edit/', views.edit_transaction, name='edit_transaction'),
     path('transactions/<int:transaction_id>/delete/', views.delete_transaction, name='delete_transaction'),
     path('transactions/quick-add/', views.quick_add_transaction, name='quick_add_transaction'),
+    path('transactions/import/', views.import_transactions, name='import_transactions'),
+    
+    # Simulation
+    path('simulate/', read_only_view(views.simulate), name='simulate'),
+    
+    # Trends
+    path('trends/', read_only_view(views.trends), name='trends'),
+    
+    # Export
+    path('export/', read_only_view(views.export_data), name='export_data'),
+    
+    # JSON API
+    path('api/summary/', read_only_view(read_api.budget_summary), name='api_budget_summary'),
+    path('api/categories/', read_only_view(read_api.category_summary), name='api_category_summary'),
+    path('api/transactions/', api.transactions, name='api_transactions'),
+    path('api/transactions/<int:transaction_id>/', api.transaction_detail, name='api_transaction_detail'),
+    path('api/simulate/', read_only_view(api.simulate), name='api_simulate'),
+    path('api/trends/', read_only_view(api.trends), name='api_trends'),
+    
+    # Monitoring
+    path('cache-stats/', views.cache_stats, name='budgeting_cache_stats'),
 ]
\ No newline at end of file
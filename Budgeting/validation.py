@@ -0,0 +1,71 @@
+from datetime import date as date_type, datetime
+from decimal import Decimal, InvalidOperation
+
+TRANSACTION_TYPES = ('income', 'expense')
+DATE_FORMAT = '%Y-%m-%d'
+# Largest amount of the former DECIMAL(12, 2) columns; far enough below the MoneyField range
+# that summing many such transactions cannot overflow the summary columns
+MAX_AMOUNT = Decimal('9999999999.99')
+
+
+def parse_id(value):
+    """Primary key from a form, query or JSON value, None when empty; raises ValueError otherwise"""
+    if value is None or value == '':
+        return None
+    # bool is an int subclass, and int() would also take floats and ' 1'
+    if isinstance(value, bool) or not isinstance(value, (int, str)) or not str(value).isdigit():
+        raise ValueError(f'Invalid id "{value}"')
+    return int(value)
+
+
+def clean_transaction_data(transaction_type, amount, category_id, date=None, require_date=True):
+    """
+    Validate raw transaction fields with the rules of the transaction forms.
+    Returns (cleaned, errors) where cleaned holds the parsed amount and date.
+    """
+    errors = []
+    cleaned = {
+        'transaction_type': transaction_type,
+        'amount': amount,
+        'category_id': None,
+        'date': date,
+    }
+
+    try:
+        cleaned['category_id'] = parse_id(category_id)
+    except ValueError:
+        errors.append('Invalid category')
+
+    if not transaction_type or transaction_type not in TRANSACTION_TYPES:
+        errors.append('Please select transaction type')
+
+    if not amount:
+        errors.append('Amount is required')
+    else:
+        try:
+            cleaned['amount'] = Decimal(amount)
+            if not cleaned['amount'].is_finite():
+                errors.append('Invalid amount')
+            elif cleaned['amount'] <= 0:
+                errors.append('Amount must be greater than 0')
+            elif cleaned['amount'] > MAX_AMOUNT:
+                errors.append('Amount is too large')
+        except (InvalidOperation, TypeError, ValueError):
+            errors.append('Invalid amount')
+
+    if transaction_type == 'expense' and not category_id:
+        errors.append('Category is required for expenses')
+
+    if require_date:
+        if not date:
+            errors.append('Date is required')
+        elif isinstance(date, str):
+            try:
+                cleaned['date'] = datetime.strptime(date, DATE_FORMAT).date()
+            except ValueError:
+                errors.append('Invalid date format')
+        elif not isinstance(date, date_type) or isinstance(date, datetime):
+            # e.g. a number or a list from a JSON body
+            errors.append('Invalid date format')
+
+    return cleaned, errors
@@ -1,11 +1,24 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import get_user_model
 from django.contrib import messages
+from django.db import router
+from django.db.transaction import atomic
 from django.utils import timezone
 from datetime import datetime, timedelta
 from decimal import Decimal
 from .models import MonthlyBudget, Category, Transaction, DailySummary, MonthlySummary, Goal
+from .active_budget import get_active_budget, get_active_categories
+from .cache import get_cache_stats, get_dashboard_data
+from .trends import DEFAULT_ROLLING_WINDOW, PERIODS, get_trends
+from .simulation import DEFAULT_MONTHS, DEFAULT_PATHS, Scenario, simulate_budget
+from .pagination import InvalidCursor, get_page_size, paginate_transactions
+from .validation import clean_transaction_data, parse_id
+from .search import get_date_filters, get_search_page, search_transactions
+from .importers import IMPORT_FORMATS, import_transactions as run_import
+from .exports import EXPORT_FORMATS, EXPORT_KINDS, get_export_rows, stream_export
 
 User = get_user_model()
 
@@ -15,42 +28,22 @@ def dashboard(request):
     user = request.user
     
     # Get active budget or most recent budget
-    active_budget = MonthlyBudget.objects.filter(user=user, is_active=True).first()
+    active_budget = get_active_budget(request)
     
     if not active_budget:
-        # Check if user has any budgets at all
-        has_budgets = MonthlyBudget.objects.filter(user=user).exists()
-        if not has_budgets:
+        # User has old budgets but none active, or is a first time user
+        active_budget = MonthlyBudget.objects.filter(user=user).first()
+        if not active_budget:
             # First time user - redirect to budget setup
             return redirect('budget_setup')
-        else:
-            # User has old budgets but none active
-            active_budget = MonthlyBudget.objects.filter(user=user).first()
-    
-    # Get recent transactions
-    recent_transactions = Transaction.objects.filter(
-        monthly_budget=active_budget
-    ).order_by('-date', '-created_at')[:10] if active_budget else []
     
-    # Get goals
-    goals = Goal.objects.filter(user=user, is_completed=False)[:5]
-    
-    # Calculate statistics
     context = {
         'user': user,
         'active_budget': active_budget,
-        'recent_transactions': recent_transactions,
-        'goals': goals,
     }
     
-    if active_budget:
-        context.update({
-            'total_budget': active_budget.total_budget,
-            'total_spent': active_budget.get_total_spent(),
-            'total_income': active_budget.get_total_income(),
-            'remaining_balance': active_budget.get_remaining_balance(),
-            'categories_summary': active_budget.get_categories_summary(),
-        })
+    # Statistics, recent transactions and goals (cached until any of them change)
+    context.update(get_dashboard_data(user, active_budget))
     
     return render(request, 'Budgeting/dashboard.html', context)
 
@@ -61,7 +54,7 @@ def budget_setup(request):
     user = request.user
     
     # Check if user already has an active budget
-    active_budget = MonthlyBudget.objects.filter(user=user, is_active=True).first()
+    active_budget = get_active_budget(request)
     
     if request.method == 'POST':
         # Get form data
@@ -239,34 +232,64 @@ def delete_category(request, category_id):
 @login_required(login_url='login')
 def transactions_list(request):
     """View all transactions"""
-    user = request.user
-    active_budget = MonthlyBudget.objects.filter(user=user, is_active=True).first()
+    active_budget = get_active_budget(request)
     
     if not active_budget:
         messages.warning(request, 'Please set up your budget first.')
         return redirect('budget_setup')
     
-    # Get all transactions for active budget
-    transactions = Transaction.objects.filter(monthly_budget=active_budget).order_by('-date', '-created_at')
+    # Get transactions for active budget (ordered and paged by the keyset paginator)
+    transactions = Transaction.objects.filter(monthly_budget=active_budget)
     
     # Filter by type if specified
     filter_type = request.GET.get('type')
     if filter_type in ['income', 'expense']:
         transactions = transactions.filter(transaction_type=filter_type)
     
-    # Filter by category if specified
-    category_id = request.GET.get('category')
+    # Filter by category if specified; like the date filters, a malformed value is ignored
+    try:
+        category_id = parse_id(request.GET.get('category'))
+    except ValueError:
+        category_id = None
     if category_id:
         transactions = transactions.filter(category_id=category_id)
     
-    categories = Category.objects.filter(monthly_budget=active_budget)
+    page_size = get_page_size(request.GET.get('page_size'))
+    search_query = request.GET.get('q', '').strip()
+    date_from, date_to = get_date_filters(request.GET)
+    if search_query:
+        # Notes of every budget of the user, best match first
+        page = search_transactions(
+            request.user, search_query, get_search_page(request.GET.get('page')), page_size,
+            transaction_type=filter_type if filter_type in ['income', 'expense'] else None,
+            category_id=category_id, date_from=date_from, date_to=date_to,
+        )
+    else:
+        if date_from:
+            transactions = transactions.filter(date__gte=date_from)
+        if date_to:
+            transactions = transactions.filter(date__lte=date_to)
+        try:
+            page = paginate_transactions(transactions, request.GET.get('cursor'), page_size)
+        except InvalidCursor:
+            page = paginate_transactions(transactions, None, page_size)
+    
+    categories = get_active_categories(request)
     
     context = {
         'active_budget': active_budget,
-        'transactions': transactions,
+        'transactions': page.items,
+        'page': page,
+        'next_cursor': getattr(page, 'next_cursor', None),
+        'prev_cursor': getattr(page, 'prev_cursor', None),
+        'page_size': page_size,
         'categories': categories,
         'filter_type': filter_type,
         'filter_category': category_id,
+        'filter_date_from': date_from,
+        'filter_date_to': date_to,
+        'search_query': search_query,
+        'search_page': page if search_query else None,
     }
     
     return render(request, 'Budgeting/transactions_list.html', context)
@@ -275,14 +298,13 @@ def transactions_list(request):
 @login_required(login_url='login')
 def add_transaction(request):
     """Add a new transaction (income or expense)"""
-    user = request.user
-    active_budget = MonthlyBudget.objects.filter(user=user, is_active=True).first()
+    active_budget = get_active_budget(request)
     
     if not active_budget:
         messages.warning(request, 'Please set up your budget first.')
         return redirect('budget_setup')
     
-    categories = Category.objects.filter(monthly_budget=active_budget)
+    categories = get_active_categories(request)
     
     if request.method == 'POST':
         transaction_type = request.POST.get('transaction_type')
@@ -291,31 +313,17 @@ def add_transaction(request):
         date = request.POST.get('date')
         note = request.POST.get('note', '').strip()
         
-        errors = []
-        
-        if not transaction_type or transaction_type not in ['income', 'expense']:
-            errors.append('Please select transaction type')
-        
-        if not amount:
-            errors.append('Amount is required')
-        else:
-            try:
-                amount = Decimal(amount)
-                if amount <= 0:
-                    errors.append('Amount must be greater than 0')
-            except:
-                errors.append('Invalid amount')
-        
-        if transaction_type == 'expense' and not category_id:
-            errors.append('Category is required for expenses')
-        
-        if not date:
-            errors.append('Date is required')
-        else:
-            try:
-                date = datetime.strptime(date, '%Y-%m-%d').date()
-            except:
-                errors.append('Invalid date format')
+        cleaned, errors = clean_transaction_data(transaction_type, amount, category_id, date)
+        amount, date, category_id = cleaned['amount'], cleaned['date'], cleaned['category_id']
+        if category_id and not Category.objects.filter(categoryId=category_id, monthly_budget=active_budget).exists():
+            errors.append('Please select a valid category')
+        try:
+            goal_id = parse_id(request.POST.get('goal'))
+        except ValueError:
+            goal_id = None
+            errors.append('Please select a valid goal')
+        if goal_id and not Goal.objects.filter(goalId=goal_id, user=request.user).exists():
+            errors.append('Please select a valid goal')
         
         if errors:
             return render(request, 'Budgeting/add_transaction.html', {
@@ -324,21 +332,20 @@ def add_transaction(request):
                 'form_data': request.POST,
             })
         
-        # Create transaction
-        transaction = Transaction.objects.create(
-            monthly_budget=active_budget,
-            transaction_type=transaction_type,
-            amount=amount,
-            category_id=category_id if category_id else None,
-            date=date,
-            note=note
-        )
-        
-        # Update daily summary
-        DailySummary.update_or_create_for_date(active_budget, date)
-        
-        # Update monthly summary
-        MonthlySummary.update_or_create_for_budget(active_budget)
+        with atomic():
+            # Create transaction
+            transaction = Transaction.objects.create(
+                monthly_budget=active_budget,
+                transaction_type=transaction_type,
+                amount=amount,
+                category_id=category_id,
+                goal_id=goal_id,
+                date=date,
+                note=note
+            )
+            
+            # Add it to the daily and monthly summaries
+            transaction.apply_to_summaries()
         
         messages.success(request, f'{transaction_type.capitalize()} of {amount} added successfully!')
         return redirect('transactions_list')
@@ -354,9 +361,11 @@ def add_transaction(request):
 @login_required(login_url='login')
 def edit_transaction(request, transaction_id):
     """Edit an existing transaction"""
-    transaction = get_object_or_404(Transaction, transactionId=transaction_id, monthly_budget__user=request.user)
+    transaction = get_object_or_404(
+        Transaction.objects.select_related('monthly_budget'), transactionId=transaction_id, monthly_budget__user=request.user
+    )
     active_budget = transaction.monthly_budget
-    categories = Category.objects.filter(monthly_budget=active_budget)
+    categories = active_budget.categories.all()
     
     if request.method == 'POST':
         transaction_type = request.POST.get('transaction_type')
@@ -365,31 +374,17 @@ def edit_transaction(request, transaction_id):
         date = request.POST.get('date')
         note = request.POST.get('note', '').strip()
         
-        errors = []
-        
-        if not transaction_type or transaction_type not in ['income', 'expense']:
-            errors.append('Please select transaction type')
-        
-        if not amount:
-            errors.append('Amount is required')
-        else:
-            try:
-                amount = Decimal(amount)
-                if amount <= 0:
-                    errors.append('Amount must be greater than 0')
-            except:
-                errors.append('Invalid amount')
-        
-        if transaction_type == 'expense' and not category_id:
-            errors.append('Category is required for expenses')
-        
-        if not date:
-            errors.append('Date is required')
-        else:
-            try:
-                date = datetime.strptime(date, '%Y-%m-%d').date()
-            except:
-                errors.append('Invalid date format')
+        cleaned, errors = clean_transaction_data(transaction_type, amount, category_id, date)
+        amount, date, category_id = cleaned['amount'], cleaned['date'], cleaned['category_id']
+        if category_id and not Category.objects.filter(categoryId=category_id, monthly_budget=active_budget).exists():
+            errors.append('Please select a valid category')
+        try:
+            goal_id = parse_id(request.POST.get('goal'))
+        except ValueError:
+            goal_id = None
+            errors.append('Please select a valid goal')
+        if goal_id and not Goal.objects.filter(goalId=goal_id, user=request.user).exists():
+            errors.append('Please select a valid goal')
         
         if errors:
             return render(request, 'Budgeting/edit_transaction.html', {
@@ -398,24 +393,21 @@ def edit_transaction(request, transaction_id):
                 'categories': categories,
             })
         
-        # Store old date for summary updates
-        old_date = transaction.date
-        
-        # Update transaction
-        transaction.transaction_type = transaction_type
-        transaction.amount = amount
-        transaction.category_id = category_id if category_id else None
-        transaction.date = date
-        transaction.note = note
-        transaction.save()
-        
-        # Update daily summaries (both old and new dates)
-        DailySummary.update_or_create_for_date(active_budget, old_date)
-        if old_date != date:
-            DailySummary.update_or_create_for_date(active_budget, date)
-        
-        # Update monthly summary
-        MonthlySummary.update_or_create_for_budget(active_budget)
+        with atomic():
+            # Take the old type/amount/date out of the summaries
+            transaction.apply_to_summaries(sign=-1)
+            
+            # Update transaction
+            transaction.transaction_type = transaction_type
+            transaction.amount = amount
+            transaction.category_id = category_id
+            transaction.goal_id = goal_id
+            transaction.date = date
+            transaction.note = note
+            transaction.save()
+            
+            # Add the new values back
+            transaction.apply_to_summaries()
         
         messages.success(request, 'Transaction updated successfully!')
         return redirect('transactions_list')
@@ -434,16 +426,10 @@ def delete_transaction(request, transaction_id):
     transaction = get_object_or_404(Transaction, transactionId=transaction_id, monthly_budget__user=request.user)
     
     if request.method == 'POST':
-        active_budget = transaction.monthly_budget
-        date = transaction.date
-        
-        transaction.delete()
-        
-        # Update daily summary
-        DailySummary.update_or_create_for_date(active_budget, date)
-        
-        # Update monthly summary
-        MonthlySummary.update_or_create_for_budget(active_budget)
+        with atomic():
+            # Remove it from the daily and monthly summaries
+            transaction.apply_to_summaries(sign=-1)
+            transaction.delete()
         
         messages.success(request, 'Transaction deleted successfully!')
         return redirect('transactions_list')
@@ -454,14 +440,14 @@ def delete_transaction(request, transaction_id):
 @login_required(login_url='login')
 def quick_add_transaction(request):
     """Quick add transaction (AJAX-friendly)"""
-    user = request.user
-    active_budget = MonthlyBudget.objects.filter(user=user, is_active=True).first()
+    active_budget = get_active_budget(request)
     
     if not active_budget:
         messages.warning(request, 'Please set up your budget first.')
         return redirect('budget_setup')
     
-    categories = Category.objects.filter(monthly_budget=active_budget)
+    categories = get_active_categories(request)
+    errors = []
     
     if request.method == 'POST':
         transaction_type = request.POST.get('transaction_type')
@@ -469,44 +455,165 @@ def quick_add_transaction(request):
         category_id = request.POST.get('category')
         note = request.POST.get('note', '').strip()
         
-        errors = []
-        
-        if not transaction_type or transaction_type not in ['income', 'expense']:
-            errors.append('Please select transaction type')
-        
-        if not amount:
-            errors.append('Amount is required')
-        else:
-            try:
-                amount = Decimal(amount)
-                if amount <= 0:
-                    errors.append('Amount must be greater than 0')
-            except:
-                errors.append('Invalid amount')
-        
-        if transaction_type == 'expense' and not category_id:
-            errors.append('Category is required for expenses')
+        cleaned, errors = clean_transaction_data(transaction_type, amount, category_id, require_date=False)
+        amount, category_id = cleaned['amount'], cleaned['category_id']
+        if category_id and not Category.objects.filter(categoryId=category_id, monthly_budget=active_budget).exists():
+            errors.append('Please select a valid category')
         
         if not errors:
-            # Create transaction with today's date
-            transaction = Transaction.objects.create(
-                monthly_budget=active_budget,
-                transaction_type=transaction_type,
-                amount=amount,
-                category_id=category_id if category_id else None,
-                date=timezone.now().date(),
-                note=note
-            )
-            
-            # Update summaries
-            DailySummary.update_or_create_for_date(active_budget, timezone.now().date())
-            MonthlySummary.update_or_create_for_budget(active_budget)
+            with atomic():
+                # Create transaction with today's date
+                transaction = Transaction.objects.create(
+                    monthly_budget=active_budget,
+                    transaction_type=transaction_type,
+                    amount=amount,
+                    category_id=category_id,
+                    date=timezone.now().date(),
+                    note=note
+                )
+                
+                # Update summaries
+                transaction.apply_to_summaries()
             
             messages.success(request, f'{transaction_type.capitalize()} added successfully!')
             return redirect('budgeting_dashboard')
     
     context = {
         'categories': categories,
+        'errors': errors,
     }
     
-    return render(request, 'Budgeting/quick_add_transaction.html', context)
\ No newline at end of file
+    return render(request, 'Budgeting/quick_add_transaction.html', context)
+
+
+@login_required(login_url='login')
+def import_transactions(request):
+    """Bulk import transactions from a CSV or OFX bank export"""
+    active_budget = get_active_budget(request)
+    
+    if not active_budget:
+        messages.warning(request, 'Please set up your budget first.')
+        return redirect('budget_setup')
+    
+    if request.method == 'POST':
+        upload = request.FILES.get('file')
+        import_format = request.POST.get('format', '').lower()
+        
+        errors = []
+        
+        if not upload:
+            errors.append('Please choose a file to import')
+        elif import_format not in IMPORT_FORMATS:
+            # Fall back to the file extension
+            import_format = upload.name.rsplit('.', 1)[-1].lower()
+            if import_format not in IMPORT_FORMATS:
+                errors.append('Unsupported file format (use CSV or OFX)')
+        
+        if errors:
+            return render(request, 'Budgeting/import_transactions.html', {
+                'errors': errors,
+                'active_budget': active_budget,
+                'import_formats': IMPORT_FORMATS,
+            })
+        
+        default_category = request.POST.get('default_category', '').strip()
+        result = run_import(active_budget, upload, import_format, default_category=default_category)
+        
+        if result.created:
+            messages.success(request, f'{result.created} transactions imported successfully!')
+        if result.failed or result.error:
+            if result.failed:
+                messages.warning(request, f'{result.failed} rows could not be imported.')
+            return render(request, 'Budgeting/import_transactions.html', {
+                'errors': [result.error] if result.error else [],
+                'active_budget': active_budget,
+                'import_result': result,
+                'import_formats': IMPORT_FORMATS,
+            })
+        return redirect('transactions_list')
+    
+    return render(request, 'Budgeting/import_transactions.html', {
+        'active_budget': active_budget,
+        'import_formats': IMPORT_FORMATS,
+    })
+
+
+@login_required(login_url='login')
+def export_data(request):
+    """Stream the user's transactions, budgets or daily summaries as CSV or NDJSON"""
+    export_format = request.GET.get('format', 'csv')
+    kind = request.GET.get('kind', 'transactions')
+    start = request.GET.get('start')
+    end = request.GET.get('end')
+    budget_id = request.GET.get('budget')
+    
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest('Unsupported export format')
+    if kind not in EXPORT_KINDS:
+        return HttpResponseBadRequest('Unsupported export kind')
+    try:
+        start = datetime.strptime(start, '%Y-%m-%d').date() if start else None
+        end = datetime.strptime(end, '%Y-%m-%d').date() if end else None
+        budget_id = int(budget_id) if budget_id else None
+    except ValueError:
+        return HttpResponseBadRequest('Invalid date or budget filter')
+    
+    model = EXPORT_KINDS[kind][0]
+    columns, rows = get_export_rows(request.user, kind, start, end, budget_id, using=router.db_for_read(model))
+    content_type = 'application/x-ndjson' if export_format == 'ndjson' else 'text/csv'
+    response = StreamingHttpResponse(stream_export(columns, rows, export_format), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{kind}.{export_format}"'
+    return response
+
+
+@login_required(login_url='login')
+def simulate(request):
+    """What-if projections for the active budget"""
+    active_budget = get_active_budget(request)
+    
+    if not active_budget:
+        messages.warning(request, 'Please set up your budget first.')
+        return redirect('budget_setup')
+    
+    errors = []
+    result = None
+    try:
+        scenario = Scenario.from_query(request.GET)
+        result = simulate_budget(
+            active_budget,
+            scenario,
+            months=int(request.GET.get('months', DEFAULT_MONTHS)),
+            paths=int(request.GET.get('paths', DEFAULT_PATHS)),
+        )
+    except ValueError:
+        errors.append('Invalid scenario')
+    
+    return render(request, 'Budgeting/simulate.html', {
+        'active_budget': active_budget,
+        'simulation': result,
+        'errors': errors,
+    })
+
+
+@login_required(login_url='login')
+def trends(request):
+    """Month-over-month (or week-over-week) history across all of the user's budgets"""
+    period = request.GET.get('period', 'month')
+    if period not in PERIODS:
+        period = 'month'
+    try:
+        window = int(request.GET.get('window', DEFAULT_ROLLING_WINDOW))
+        years = int(request.GET.get('years', 5))
+    except ValueError:
+        window, years = DEFAULT_ROLLING_WINDOW, 5
+    
+    context = get_trends(request.user, period, years=years, window=window, today=timezone.now().date())
+    context['periods'] = list(PERIODS)
+    
+    return render(request, 'Budgeting/trends.html', context)
+
+
+@staff_member_required
+def cache_stats(request):
+    """Dashboard cache hit/miss counters for measuring the hit rate"""
+    return JsonResponse(get_cache_stats())
\ No newline at end of file
@@ -0,0 +1,30 @@
+"""
+Password hashers with parameters taken from settings. They keep Django's
+algorithm names, so hashes made with other parameters (or by another
+algorithm still listed in PASSWORD_HASHERS) keep verifying and are
+re-encoded with the current preferred hasher on the user's next login.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher, ScryptPasswordHasher
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2id, by default with the OWASP minimum (19 MiB, 2 passes, 1 lane); needs argon2-cffi"""
+    time_cost = getattr(settings, 'PASSWORD_ARGON2_TIME_COST', 2)
+    memory_cost = getattr(settings, 'PASSWORD_ARGON2_MEMORY_COST', 19456)
+    parallelism = getattr(settings, 'PASSWORD_ARGON2_PARALLELISM', 1)
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    """Scrypt, by default N=2**15, r=8, p=1 (32 MiB, one pass instead of Django's five)"""
+    work_factor = getattr(settings, 'PASSWORD_SCRYPT_WORK_FACTOR', 2 ** 15)
+    block_size = 8
+    parallelism = getattr(settings, 'PASSWORD_SCRYPT_PARALLELISM', 1)
+    # hashlib refuses to use more than 32 MiB unless told otherwise
+    maxmem = 256 * work_factor * block_size
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with a configurable iteration count"""
+    iterations = getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', PBKDF2PasswordHasher.iterations)
+
@@ -0,0 +1,33 @@
+import time
+from django.conf import settings
+
+REFRESHED_AT_KEY = '_session_refreshed_at'
+
+
+class SlidingSessionMiddleware:
+    """
+    Sliding session expiry without a write per request: an unchanged session is
+    only saved again (pushing its expiry SESSION_COOKIE_AGE into the future) once
+    SESSION_REFRESH_INTERVAL seconds have passed since it was last saved. Sessions
+    whose data changed are saved by SessionMiddleware as usual.
+
+    Must be listed after SessionMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.refresh_interval = getattr(settings, 'SESSION_REFRESH_INTERVAL', 3600)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        session = getattr(request, 'session', None)
+        if session is None or not session.accessed or session.is_empty():
+            return response
+
+        now = int(time.time())
+        refreshed_at = session.get(REFRESHED_AT_KEY, 0)
+        if session.modified or now - refreshed_at >= self.refresh_interval:
+            # Setting the key marks the session modified, so SessionMiddleware saves it
+            session[REFRESHED_AT_KEY] = now
+        return response
@@ -1,3 +1,92 @@
+from unittest import mock
+from django.contrib.auth.hashers import get_hasher, identify_hasher, make_password
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from . import throttling
+from .hashers import TunedScryptPasswordHasher
+from .models import User
 
-# Create your tests here.
+
+class LoginThrottleTests(TestCase):
+    """Failed logins lock an email out before any password is hashed; a successful login starts over"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('throttle@example.com', 'Tester', 'right-password')
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def login(self, password, email='throttle@example.com'):
+        return self.client.post(reverse('login'), {'email': email, 'password': password})
+
+    def test_lockout_after_failures(self):
+        for _ in range(throttling.EMAIL_LIMIT):
+            self.assertEqual(self.login('wrong').status_code, 200)
+        with mock.patch('UserAuth.views.authenticate') as authenticate:
+            response = self.login('right-password')
+        self.assertEqual(response.status_code, 429)
+        authenticate.assert_not_called()
+        self.assertNotIn('_auth_user_id', self.client.session)
+        # Other accounts from the same client are still let through
+        self.assertEqual(self.login('wrong', email='someone@example.com').status_code, 200)
+
+    def test_successful_login_resets_the_count(self):
+        for _ in range(throttling.EMAIL_LIMIT - 1):
+            self.login('wrong')
+        self.assertRedirects(self.login('right-password'), reverse('budgeting_dashboard'), fetch_redirect_response=False)
+        self.client.logout()
+        for _ in range(throttling.EMAIL_LIMIT - 1):
+            self.login('wrong')
+        self.assertRedirects(self.login('right-password'), reverse('budgeting_dashboard'), fetch_redirect_response=False)
+
+    def test_ip_limit(self):
+        with mock.patch.object(throttling, 'IP_LIMIT', 2):
+            self.login('wrong', email='a@example.com')
+            self.login('wrong', email='b@example.com')
+            self.assertEqual(self.login('right-password').status_code, 429)
+
+    def test_signups_per_ip(self):
+        with mock.patch.object(throttling, 'SIGNUP_LIMIT', 1):
+            for number, status in ((1, 302), (2, 429)):
+                self.client.logout()
+                response = self.client.post(reverse('signup'), {
+                    'name': 'New', 'email': f'new{number}@example.com',
+                    'password': 'password', 'confirm_password': 'password',
+                })
+                self.assertEqual(response.status_code, status)
+        self.assertFalse(User.objects.filter(email='new2@example.com').exists())
+
+    def test_forwarded_ip(self):
+        request = mock.Mock(META={'HTTP_X_FORWARDED_FOR': '1.1.1.1, 2.2.2.2', 'REMOTE_ADDR': '10.0.0.1'})
+        self.assertEqual(throttling.get_client_ip(request), '10.0.0.1')
+        with mock.patch.object(throttling, 'IP_HEADER', 'HTTP_X_FORWARDED_FOR'):
+            # Only the entry the proxy appended can be trusted
+            self.assertEqual(throttling.get_client_ip(request), '2.2.2.2')
+
+
+class PasswordHasherTests(TestCase):
+    """New hashes use the preferred hasher; older ones are re-encoded on the next login"""
+
+    def test_outdated_hash_is_upgraded_on_login(self):
+        user = User.objects.create_user('upgrade@example.com', 'Tester')
+        user.password = make_password('password', hasher='pbkdf2_sha1')
+        user.save()
+        response = self.client.post(reverse('login'), {'email': 'upgrade@example.com', 'password': 'password'})
+        self.assertEqual(response.status_code, 302)
+        user.refresh_from_db()
+        self.assertEqual(identify_hasher(user.password).algorithm, get_hasher().algorithm)
+        self.assertTrue(user.check_password('password'))
+
+    def test_scrypt_parameters(self):
+        hasher = TunedScryptPasswordHasher()
+        encoded = hasher.encode('password', hasher.salt())
+        decoded = hasher.decode(encoded)
+        self.assertEqual(
+            (decoded['work_factor'], decoded['block_size'], decoded['parallelism']),
+            (hasher.work_factor, 8, hasher.parallelism),
+        )
+        self.assertTrue(hasher.verify('password', encoded))
+        self.assertFalse(hasher.must_update(encoded))
@@ -0,0 +1,83 @@
+"""
+Login attempt limiter. Failed logins are counted in the cache per email and
+per client IP over a fixed window of LOGIN_THROTTLE_WINDOW seconds; once a
+counter reaches its limit further attempts are refused before authenticate()
+runs, so a credential-stuffing burst costs a cache lookup instead of a
+password hash. Signups, which hash a password too, are counted per client IP.
+
+The client IP is REMOTE_ADDR unless LOGIN_THROTTLE_IP_HEADER names the header
+a reverse proxy puts it in; behind a proxy, REMOTE_ADDR is the proxy's address
+and the per-IP limits would apply to all clients together.
+"""
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+
+WINDOW = getattr(settings, 'LOGIN_THROTTLE_WINDOW', 900)
+EMAIL_LIMIT = getattr(settings, 'LOGIN_THROTTLE_EMAIL_LIMIT', 5)
+IP_LIMIT = getattr(settings, 'LOGIN_THROTTLE_IP_LIMIT', 50)
+SIGNUP_LIMIT = getattr(settings, 'LOGIN_THROTTLE_SIGNUP_LIMIT', 10)
+IP_HEADER = getattr(settings, 'LOGIN_THROTTLE_IP_HEADER', None)
+
+
+def get_client_ip(request):
+    if IP_HEADER:
+        # X-Forwarded-For style lists: the last entry is the one the proxy added, the rest can be forged
+        forwarded = request.META.get(IP_HEADER, '').rsplit(',', 1)[-1].strip()
+        if forwarded:
+            return forwarded
+    return request.META.get('REMOTE_ADDR') or 'unknown'
+
+
+def _key(scope, value):
+    # Hash the value: emails can hold characters memcached keys may not
+    digest = hashlib.sha256(value.encode()).hexdigest()[:32]
+    return f'login-throttle:{scope}:{digest}:{int(time.time()) // WINDOW}'
+
+
+def _keys(request, email=None):
+    keys = {_key('ip', get_client_ip(request)): IP_LIMIT}
+    if email:
+        keys[_key('email', email)] = EMAIL_LIMIT
+    return keys
+
+
+def is_throttled(request, email=None):
+    """True when the client IP (or the email, if given) has used up its failed attempts"""
+    keys = _keys(request, email)
+    counts = cache.get_many(list(keys))
+    return any(counts.get(key, 0) >= limit for key, limit in keys.items())
+
+
+def is_signup_throttled(request):
+    """True when the client IP has used up its failed logins or its signups"""
+    keys = {**_keys(request), _key('signup', get_client_ip(request)): SIGNUP_LIMIT}
+    counts = cache.get_many(list(keys))
+    return any(counts.get(key, 0) >= limit for key, limit in keys.items())
+
+
+def _incr(key):
+    # add() is a no-op when the counter exists; incr() is atomic on shared caches
+    cache.add(key, 0, WINDOW)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Expired between add() and incr()
+        cache.set(key, 1, WINDOW)
+
+
+def register_failure(request, email):
+    """Count one failed login against the email and the client IP"""
+    for key in _keys(request, email):
+        _incr(key)
+
+
+def register_signup(request):
+    """Count one account creation against the client IP"""
+    _incr(_key('signup', get_client_ip(request)))
+
+
+def reset(email):
+    """Forget the email's failures after a successful login"""
+    cache.delete(_key('email', email))
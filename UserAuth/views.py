@@ -4,6 +4,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db import IntegrityError
 from .models import User
+from . import throttling
 
 def signup(request):
     """Handle user registration"""
@@ -35,6 +36,15 @@ def signup(request):
         if password != confirm_password:
             errors.append('Passwords do not match')
         
+        # Creating the account hashes the password: refuse clients that are already being throttled
+        if throttling.is_signup_throttled(request):
+            errors.append('Too many attempts. Please try again later.')
+            return render(request, 'UserAuth/signup.html', {
+                'errors': errors,
+                'name': name,
+                'email': email
+            }, status=429)
+        
         # Check if email already exists
         if User.objects.filter(email=email).exists():
             errors.append('An account with this email already exists')
@@ -47,6 +57,7 @@ def signup(request):
             })
         
         try:
+            throttling.register_signup(request)
             # Create user
             user = User.objects.create_user(
                 email=email,
@@ -93,15 +104,25 @@ def login_view(request):
                 'email': email
             })
         
-        # Authenticate user
+        # Refuse over-limit attempts before authenticate() spends time hashing
+        if throttling.is_throttled(request, email):
+            errors.append('Too many failed login attempts. Please try again later.')
+            return render(request, 'UserAuth/login.html', {
+                'errors': errors,
+                'email': email
+            }, status=429)
+        
+        # Authenticate user (an outdated password hash is re-encoded with the preferred hasher here)
         user = authenticate(request, username=email, password=password)
         
         if user is not None:
+            throttling.reset(email)
             auth_login(request, user)
             # Redirect to dashboard or the page they were trying to access
             next_url = request.GET.get('next', 'budgeting_dashboard')
             return redirect(next_url)
         else:
+            throttling.register_failure(request, email)
             errors.append('Invalid email or password')
             return render(request, 'UserAuth/login.html', {
                 'errors': errors,
@@ -0,0 +1,138 @@
+import json
+import logging
+import re
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger(__name__)
+
+QUERY_THRESHOLD = getattr(settings, 'REQUEST_METRICS_QUERY_THRESHOLD', 30)
+REPEAT_THRESHOLD = getattr(settings, 'REQUEST_METRICS_REPEAT_THRESHOLD', 5)
+
+# Metrics of the request being handled, read by the timed template backend
+_current_metrics = ContextVar('request_metrics', default=None)
+
+# Literals are replaced so the same query with different ids counts as a repeat
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+class RequestMetrics:
+    """SQL, view and template timings collected for one request"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.view_time = 0.0
+        self.template_time = 0.0
+        self.view_started = None
+        self.query_shapes = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+            shape = _LITERALS.sub('?', sql)
+            self.query_shapes[shape] = self.query_shapes.get(shape, 0) + 1
+
+    def repeated_queries(self, threshold=REPEAT_THRESHOLD):
+        """Query shapes executed at least threshold times, the signature of an N+1"""
+        return sorted(
+            ((count, shape) for shape, count in self.query_shapes.items() if count >= threshold), reverse=True
+        )
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        metrics = _current_metrics.get()
+        if metrics is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Django template engine that adds render time to the current RequestMetrics"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+class QueryTimingMiddleware:
+    """
+    Opt-in (REQUEST_METRICS=True) per-request instrumentation: SQL query count,
+    DB time, view time and template render time, sent as a Server-Timing header
+    and logged as one JSON line. Requests over REQUEST_METRICS_QUERY_THRESHOLD
+    queries, or running one query shape REQUEST_METRICS_REPEAT_THRESHOLD times,
+    are logged as warnings.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        request._metrics = metrics
+        token = _current_metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+        finished = time.perf_counter()
+        total_time = finished - started
+        if metrics.view_started is not None:
+            # View time includes the DB and template time spent inside the view
+            metrics.view_time = finished - metrics.view_started
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={metrics.db_time * 1000:.2f};desc="{metrics.queries} queries"',
+            f'view;dur={metrics.view_time * 1000:.2f}',
+            f'tpl;dur={metrics.template_time * 1000:.2f}',
+            f'total;dur={total_time * 1000:.2f}',
+        ])
+        self.log(request, response, metrics, total_time)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics.view_started = time.perf_counter()
+
+    def log(self, request, response, metrics, total_time):
+        repeated = metrics.repeated_queries()
+        flagged = metrics.queries > QUERY_THRESHOLD or bool(repeated)
+        match = getattr(request, 'resolver_match', None)
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'queries': metrics.queries,
+            'db_ms': round(metrics.db_time * 1000, 2),
+            'view_ms': round(metrics.view_time * 1000, 2),
+            'template_ms': round(metrics.template_time * 1000, 2),
+            'total_ms': round(total_time * 1000, 2),
+        }
+        if flagged:
+            record['flagged'] = True
+            record['repeated_queries'] = [{'count': count, 'sql': shape[:300]} for count, shape in repeated[:5]]
+            logger.warning(json.dumps(record))
+        else:
+            logger.info(json.dumps(record))
+
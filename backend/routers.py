@@ -0,0 +1,99 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+
+REPLICA_ALIAS = 'replica'
+PIN_COOKIE = 'db_pin'
+REPLICA_APPS = {'Budgeting'}
+
+# Set while a view wrapped in read_only_view runs
+_use_replica = ContextVar('use_replica', default=False)
+
+
+def replica_enabled():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+class ReadReplicaRouter:
+    """
+    Send Budgeting reads made inside read_only_view views to the replica alias.
+    Users and sessions, every other read, all writes and all migrations use the
+    default database.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and model._meta.app_label in REPLICA_APPS:
+            return REPLICA_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+def _should_use_replica(request):
+    # Right after a write the replica may lag behind: read that user's own writes from the primary
+    return (
+        replica_enabled()
+        and request.method in ('GET', 'HEAD')
+        and PIN_COOKIE not in request.COOKIES
+    )
+
+
+def read_only_view(view_func):
+    """Run a view's queries against the read replica (if one is configured)"""
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            token = _use_replica.set(_should_use_replica(request))
+            try:
+                return await view_func(request, *args, **kwargs)
+            finally:
+                _use_replica.reset(token)
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        token = _use_replica.set(_should_use_replica(request))
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            _use_replica.reset(token)
+    return wrapper
+
+
+@contextmanager
+def primary_reads():
+    """
+    Read from the primary inside the block, even within a read_only_view: for
+    results that outlive the request, such as cache entries keyed on a version
+    the replica may not have caught up with yet.
+    """
+    token = _use_replica.set(False)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+class ReplicaPinMiddleware:
+    """After a successful write request, keep that browser on the primary for DATABASE_REPLICA_PIN_SECONDS"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.pin_seconds = getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 5)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400:
+            response.set_cookie(PIN_COOKIE, str(int(time.time())), max_age=self.pin_seconds, httponly=True, samesite='Lax')
+        return response
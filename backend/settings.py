@@ -9,9 +9,11 @@ https://docs.djangoproject.com/en/5.0/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
+from importlib.util import find_spec
 from pathlib import Path
 from dotenv import load_dotenv
 import os
+import sys
 
 load_dotenv()
 
@@ -22,6 +24,9 @@ load_dotenv(BASE_DIR / '.env')
 # See https://docs.djangoproject.com/en/5.0/howto/deployment/checklist/
 
 SECRET_KEY = os.getenv('SECRET_KEY')  # required, fill from .env
+# So `manage.py test` runs on a clean checkout; never used by a server
+if not SECRET_KEY and sys.argv[1:2] == ['test']:
+    SECRET_KEY = 'insecure-test-only-key'
 DEBUG = os.getenv('DEBUG', 'False') == 'True'
 
 # ===== Replace ALLOWED_HOSTS =====
@@ -43,6 +48,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'UserAuth.middleware.SlidingSessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -50,6 +56,9 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+if os.getenv('DATABASE_REPLICA_HOST') or os.getenv('DATABASE_REPLICA_NAME'):
+    MIDDLEWARE.append('backend.routers.ReplicaPinMiddleware')
+
 ROOT_URLCONF = 'backend.urls'
 
 TEMPLATES = [
@@ -87,9 +96,54 @@ DATABASES = {
         'PORT': os.getenv('DATABASE_PORT', ''),
     }
 }
+
+# DATABASE_PROFILE=production: persistent connections with health checks, and for
+# SQLite WAL journaling so readers no longer block on writers
+DATABASE_PROFILE = os.getenv('DATABASE_PROFILE', 'development')
+if DATABASE_PROFILE == 'production':
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DATABASE_CONN_MAX_AGE', 60))
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+    if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+        DATABASES['default']['OPTIONS'] = {
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_SIZE', 134217728))};"
+            ),
+            # busy_timeout: seconds a connection waits for a lock before "database is locked"
+            'timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 20)),
+            # Take the write lock at BEGIN so the busy timeout applies instead of failing on lock upgrade
+            'transaction_mode': 'IMMEDIATE',
+        }
+
+# Optional read replica for the read-only Budgeting views (same engine and credentials unless overridden)
+if os.getenv('DATABASE_REPLICA_HOST') or os.getenv('DATABASE_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('DATABASE_REPLICA_NAME', DATABASES['default']['NAME']),
+        'HOST': os.getenv('DATABASE_REPLICA_HOST', DATABASES['default']['HOST']),
+        'PORT': os.getenv('DATABASE_REPLICA_PORT', DATABASES['default']['PORT']),
+        'USER': os.getenv('DATABASE_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.getenv('DATABASE_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        # Tests read the replica through the default test database; with SQLite the
+        # shared in-memory database locks across connections, so run tests without a replica there
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_ROUTERS = ['backend.routers.ReadReplicaRouter']
+    # Seconds a browser reads from the primary after one of its writes (replication lag)
+    DATABASE_REPLICA_PIN_SECONDS = int(os.getenv('DATABASE_REPLICA_PIN_SECONDS', 5))
 # ============================================================
 
 
+# Cache (local memory by default; point CACHE_BACKEND at redis/memcached to share it between workers)
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'dpbs'),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -103,6 +157,38 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing: PASSWORD_HASHER picks the hasher new hashes use (argon2 needs argon2-cffi).
+# The others stay listed so existing hashes still verify; they are upgraded on the next login.
+PASSWORD_HASHER = os.getenv('PASSWORD_HASHER', 'argon2' if find_spec('argon2') else 'scrypt')
+_PASSWORD_HASHERS = {
+    'argon2': 'UserAuth.hashers.TunedArgon2PasswordHasher',
+    'scrypt': 'UserAuth.hashers.TunedScryptPasswordHasher',
+    'pbkdf2': 'UserAuth.hashers.TunedPBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [
+    _PASSWORD_HASHERS[PASSWORD_HASHER],
+    *(path for name, path in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER),
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+PASSWORD_ARGON2_TIME_COST = int(os.getenv('PASSWORD_ARGON2_TIME_COST', 2))
+PASSWORD_ARGON2_MEMORY_COST = int(os.getenv('PASSWORD_ARGON2_MEMORY_COST', 19456))  # KiB
+PASSWORD_ARGON2_PARALLELISM = int(os.getenv('PASSWORD_ARGON2_PARALLELISM', 1))
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.getenv('PASSWORD_SCRYPT_WORK_FACTOR', 2 ** 15))
+PASSWORD_SCRYPT_PARALLELISM = int(os.getenv('PASSWORD_SCRYPT_PARALLELISM', 1))
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv('PASSWORD_PBKDF2_ITERATIONS', 1_000_000))
+
+# Login throttling: failed logins counted per email and per client IP in the cache;
+# over the limit, logins (and signups from that IP) are refused before any password hashing
+LOGIN_THROTTLE_WINDOW = int(os.getenv('LOGIN_THROTTLE_WINDOW', 900))  # seconds
+LOGIN_THROTTLE_EMAIL_LIMIT = int(os.getenv('LOGIN_THROTTLE_EMAIL_LIMIT', 5))
+LOGIN_THROTTLE_IP_LIMIT = int(os.getenv('LOGIN_THROTTLE_IP_LIMIT', 50))
+# Accounts created per client IP per window
+LOGIN_THROTTLE_SIGNUP_LIMIT = int(os.getenv('LOGIN_THROTTLE_SIGNUP_LIMIT', 10))
+# Behind a reverse proxy REMOTE_ADDR is the proxy, so every client would share one limit: name the
+# META key the proxy sets the client address in (e.g. HTTP_X_FORWARDED_FOR). Never set it without such a proxy
+LOGIN_THROTTLE_IP_HEADER = os.getenv('LOGIN_THROTTLE_IP_HEADER') or None
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
 
@@ -139,4 +225,86 @@ LOGOUT_REDIRECT_URL = 'login'
 # Session settings - expire when browser closes
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 SESSION_COOKIE_AGE = 86400  # 24 hours in seconds
-SESSION_SAVE_EVERY_REQUEST = True
\ No newline at end of file
+# Sessions are read from the cache and written through to the database
+SESSION_ENGINE = os.getenv('SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db')
+# Expiry still slides with activity, but SlidingSessionMiddleware only re-saves an unchanged
+# session once per SESSION_REFRESH_INTERVAL seconds instead of on every request
+SESSION_SAVE_EVERY_REQUEST = False
+SESSION_REFRESH_INTERVAL = int(os.getenv('SESSION_REFRESH_INTERVAL', 3600))
+
+# ============================================================
+# Budgeting Settings
+# ============================================================
+# Transactions list page size (?page_size=) and its upper limit
+BUDGETING_PAGE_SIZE = int(os.getenv('BUDGETING_PAGE_SIZE', 50))
+BUDGETING_MAX_PAGE_SIZE = int(os.getenv('BUDGETING_MAX_PAGE_SIZE', 200))
+
+# Rows per INSERT batch for CSV/OFX transaction imports
+BUDGETING_IMPORT_BATCH_SIZE = int(os.getenv('BUDGETING_IMPORT_BATCH_SIZE', 1000))
+
+# Rows fetched per database round trip when streaming exports
+BUDGETING_EXPORT_CHUNK_SIZE = int(os.getenv('BUDGETING_EXPORT_CHUNK_SIZE', 2000))
+
+# Cache alias and timeout (seconds) for the per-user dashboard cache
+BUDGETING_CACHE_ALIAS = os.getenv('BUDGETING_CACHE_ALIAS', 'default')
+BUDGETING_CACHE_TIMEOUT = int(os.getenv('BUDGETING_CACHE_TIMEOUT', 300))
+
+# Serve the read-heavy views (dashboard, transactions list, API summaries) as async views; enable under ASGI
+BUDGETING_ASYNC_VIEWS = os.getenv('BUDGETING_ASYNC_VIEWS', 'False') == 'True'
+
+# Budget simulation: days of DailySummary history to fit, and the cap on Monte Carlo paths per request
+BUDGETING_SIMULATION_LOOKBACK_DAYS = int(os.getenv('BUDGETING_SIMULATION_LOOKBACK_DAYS', 90))
+BUDGETING_SIMULATION_MAX_PATHS = int(os.getenv('BUDGETING_SIMULATION_MAX_PATHS', 5000))
+
+# Background jobs: recompute summaries in the run_worker command instead of inside the request
+BUDGETING_DEFER_SUMMARIES = os.getenv('BUDGETING_DEFER_SUMMARIES', 'False') == 'True'
+BUDGETING_WORKER_THREADS = int(os.getenv('BUDGETING_WORKER_THREADS', 2))
+# Failed jobs are retried after BUDGETING_JOB_RETRY_DELAY seconds, doubling per attempt
+BUDGETING_JOB_MAX_ATTEMPTS = int(os.getenv('BUDGETING_JOB_MAX_ATTEMPTS', 5))
+BUDGETING_JOB_RETRY_DELAY = int(os.getenv('BUDGETING_JOB_RETRY_DELAY', 2))
+
+# Admin changelists: unfiltered tables with more rows than this show the planner's row estimate
+# instead of COUNT(*); filtered counts stop at BUDGETING_ADMIN_COUNT_LIMIT
+BUDGETING_ADMIN_ESTIMATE_THRESHOLD = int(os.getenv('BUDGETING_ADMIN_ESTIMATE_THRESHOLD', 100000))
+BUDGETING_ADMIN_COUNT_LIMIT = int(os.getenv('BUDGETING_ADMIN_COUNT_LIMIT', 10000))
+# Rebuilding summaries for more selected budgets than this is queued for run_worker
+BUDGETING_ADMIN_INLINE_REBUILD_LIMIT = int(os.getenv('BUDGETING_ADMIN_INLINE_REBUILD_LIMIT', 200))
+
+# Transaction note search (?q=): deepest result page served; ranking gets costlier with the offset
+BUDGETING_SEARCH_MAX_PAGE = int(os.getenv('BUDGETING_SEARCH_MAX_PAGE', 20))
+
+# rollover_budgets: ended budgets rolled over to their next period per database transaction
+BUDGETING_ROLLOVER_BATCH_SIZE = int(os.getenv('BUDGETING_ROLLOVER_BATCH_SIZE', 1000))
+
+# archive_transactions: closed, finalized budgets that ended more than this many days ago move to the archive table,
+# BUDGETING_ARCHIVE_BATCH_SIZE transactions per database transaction
+BUDGETING_ARCHIVE_AFTER_DAYS = int(os.getenv('BUDGETING_ARCHIVE_AFTER_DAYS', 365))
+BUDGETING_ARCHIVE_BATCH_SIZE = int(os.getenv('BUDGETING_ARCHIVE_BATCH_SIZE', 1000))
+
+# ============================================================
+# Request Metrics
+# ============================================================
+# Opt-in per-request query count, DB/view/template timings (Server-Timing header + JSON log line)
+REQUEST_METRICS = os.getenv('REQUEST_METRICS', 'False') == 'True'
+# Requests above this many queries, or repeating one query shape this often (likely N+1), are logged as warnings
+REQUEST_METRICS_QUERY_THRESHOLD = int(os.getenv('REQUEST_METRICS_QUERY_THRESHOLD', 30))
+REQUEST_METRICS_REPEAT_THRESHOLD = int(os.getenv('REQUEST_METRICS_REPEAT_THRESHOLD', 5))
+
+if REQUEST_METRICS:
+    MIDDLEWARE.insert(0, 'backend.middleware.QueryTimingMiddleware')
+    TEMPLATES[0]['BACKEND'] = 'backend.middleware.TimedDjangoTemplates'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'backend.middleware': {
+            'handlers': ['console'],
+            'level': os.getenv('REQUEST_METRICS_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}